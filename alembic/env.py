@@ -0,0 +1,79 @@
+"""
+Окружение Alembic: миграции выполняются асинхронным движком приложения
+(create_database_engine), поэтому работают и с SQLite, и с PostgreSQL.
+"""
+
+import asyncio
+from logging.config import fileConfig
+
+from sqlalchemy.engine import Connection
+
+from alembic import context
+from app.core.config import settings
+from app.core.database import create_database_engine, normalize_database_url
+from app.models.database import Base
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+# Метаданные моделей - для alembic revision --autogenerate
+target_metadata = Base.metadata
+
+
+def database_url() -> str:
+    """
+    URL из -x url=..., иначе DATABASE_URL.
+    """
+    return context.get_x_argument(as_dictionary=True).get("url") or settings.DATABASE_URL
+
+
+def configure_options(dialect_name: str) -> dict:
+    # SQLite не умеет большинство ALTER TABLE - изменения таблиц идут через пересоздание (batch).
+    # Типы в SQLite не сравниваются: колонки UUID в старых базах объявлены как CHAR(32) или TEXT, а в моделях - GUID (BLOB)
+    return {
+        "target_metadata": target_metadata,
+        "render_as_batch": dialect_name == "sqlite",
+        "compare_type": dialect_name != "sqlite",
+    }
+
+
+def run_migrations_offline() -> None:
+    """
+    Генерирует SQL миграций без подключения к базе (alembic upgrade head --sql).
+    """
+    url = normalize_database_url(database_url())
+    context.configure(
+        url=url,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        **configure_options(url.get_backend_name()),
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection: Connection) -> None:
+    context.configure(connection=connection, **configure_options(connection.dialect.name))
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_async_migrations() -> None:
+    engine = create_database_engine(database_url())
+    async with engine.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+    await engine.dispose()
+
+
+def run_migrations_online() -> None:
+    asyncio.run(run_async_migrations())
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
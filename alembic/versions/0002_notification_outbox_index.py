@@ -0,0 +1,31 @@
+"""Индекс outbox уведомлений.
+
+Диспетчер outbox выбирает неотправленные уведомления, время которых наступило:
+индекс Notification(is_sent, notification_time).
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 10:41:07.512904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('idx_notification_pending', 'Notification', ['is_sent', 'notification_time'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_notification_pending', table_name='Notification', if_exists=True)
@@ -0,0 +1,60 @@
+"""Таблицы координации планировщика.
+
+- SchedulerLease - аренда ведущего экземпляра;
+- SchedulerWorker - воркеры шардированного планировщика;
+- SchedulerCheckpoint - время последней завершенной проверки (догоняющий режим).
+
+Таблицы, которые уже есть (create_database.py, create_all), не пересоздаются.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 10:42:18.330471
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(name: str) -> bool:
+    return not op.get_context().as_sql and sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not _has_table('SchedulerLease'):
+        op.create_table('SchedulerLease',
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('holder', sa.String(length=200), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+        )
+    if not _has_table('SchedulerWorker'):
+        op.create_table('SchedulerWorker',
+        sa.Column('worker_id', sa.String(length=200), nullable=False),
+        sa.Column('heartbeat_at', sa.DateTime(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('worker_id')
+        )
+    if not _has_table('SchedulerCheckpoint'):
+        op.create_table('SchedulerCheckpoint',
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('last_tick_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('SchedulerCheckpoint')
+    op.drop_table('SchedulerWorker')
+    op.drop_table('SchedulerLease')
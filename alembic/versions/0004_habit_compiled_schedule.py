@@ -0,0 +1,137 @@
+"""Скомпилированное расписание привычек и next_due_at.
+
+Habit.schedule_weekday_mask (биты дней недели), Habit.schedule_minute (время напоминания,
+минут с начала суток) и Habit.next_due_at (следующее напоминание, UTC) с индексами.
+Привычки, у которых расписание еще не скомпилировано, заполняются по тем же правилам,
+что и при создании привычки (app/utils/schedule_utils.py). В режиме --sql данные
+не заполняются - после такой миграции нужен update_database_schedule.py.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 10:43:52.907215
+
+"""
+import uuid
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = (
+    ('schedule_weekday_mask', sa.Integer()),
+    ('schedule_minute', sa.Integer()),
+    ('next_due_at', sa.DateTime()),
+)
+
+# (индекс, колонки)
+INDEXES = (
+    ('idx_habit_weekday_mask', ['is_active', 'schedule_weekday_mask']),
+    ('idx_habit_schedule_minute', ['schedule_minute']),
+    ('idx_habit_next_due', ['next_due_at']),
+)
+
+BATCH_SIZE = 1000
+
+
+def _local_date(value, habit_timezone):
+    # created_at хранится в UTC; в SQLite - строкой
+    from app.utils.timezone_utils import get_user_timezone
+
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.replace(tzinfo=timezone.utc).astimezone(get_user_timezone(habit_timezone)).date()
+
+
+def _backfill() -> int:
+    # id в SQLite - в любом из форматов хранения; сдвиг пользователя считается от uuid.UUID, как в приложении
+    from app.core import clock
+    from app.models.types import uuid_bytes
+    from app.utils.schedule_utils import compile_schedule, compute_next_due_at, reminder_jitter_minutes
+
+    habit = sa.table(
+        'Habit',
+        sa.column('id'), sa.column('user_id'), sa.column('schedule_type_id'), sa.column('created_at'),
+        sa.column('timezone'), sa.column('custom_schedule_days'), sa.column('custom_schedule_time'),
+        sa.column('custom_schedule_frequency'), sa.column('schedule_weekday_mask', sa.Integer()),
+        sa.column('schedule_minute', sa.Integer()), sa.column('next_due_at', sa.DateTime()),
+    )
+    schedule_type = sa.table('ScheduleType', sa.column('id'), sa.column('name'))
+    user = sa.table('User', sa.column('id'), sa.column('reminder_frequency'))
+
+    # Ключи сравниваются в одном формате: до 0010 в SQLite id справочников (create_database.py)
+    # хранятся с дефисами, а ссылки на них из приложения - 32 символами, и JOIN в SQL их не сопоставит
+    bind = op.get_bind()
+    schedule_types = {uuid_bytes(type_id): name for type_id, name in bind.execute(sa.select(schedule_type))}
+    frequencies = {uuid_bytes(user_id): frequency for user_id, frequency in bind.execute(sa.select(user))}
+    rows = bind.execute(
+        sa.select(
+            habit.c.id, habit.c.user_id, habit.c.schedule_type_id, habit.c.created_at, habit.c.timezone,
+            habit.c.custom_schedule_days, habit.c.custom_schedule_time, habit.c.custom_schedule_frequency,
+        )
+        .where(habit.c.schedule_weekday_mask.is_(None))
+    ).all()
+
+    now = clock.utcnow()
+    values = []
+    for (habit_id, user_id, schedule_type_id, created_at, habit_timezone, days, habit_time, frequency) in rows:
+        user_key = uuid_bytes(user_id)
+        schedule_type_name = schedule_types.get(uuid_bytes(schedule_type_id))
+        if schedule_type_name is None or user_key not in frequencies:
+            continue  # Висячая ссылка - такую привычку приложение тоже не выбрало бы
+        schedule = compile_schedule(schedule_type_name, days, habit_time, frequency)
+        values.append({
+            'habit_id': habit_id,
+            'schedule_weekday_mask': schedule.weekday_mask,
+            'schedule_minute': schedule.minute,
+            'next_due_at': compute_next_due_at(
+                schedule, habit_timezone, frequencies[user_key], now,
+                anchor=_local_date(created_at, habit_timezone),
+                jitter_minutes=reminder_jitter_minutes(uuid.UUID(bytes=user_key)),
+            ),
+        })
+
+    statement = (
+        sa.update(habit)
+        .where(habit.c.id == sa.bindparam('habit_id'))
+        .values(
+            schedule_weekday_mask=sa.bindparam('schedule_weekday_mask'),
+            schedule_minute=sa.bindparam('schedule_minute'),
+            next_due_at=sa.bindparam('next_due_at'),
+        )
+    )
+    for start in range(0, len(values), BATCH_SIZE):
+        bind.execute(statement, values[start:start + BATCH_SIZE])
+    return len(values)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    as_sql = op.get_context().as_sql
+    present = set() if as_sql else {column['name'] for column in sa.inspect(op.get_bind()).get_columns('Habit')}
+    for name, column_type in COLUMNS:
+        if name not in present:
+            op.add_column('Habit', sa.Column(name, column_type, nullable=True))
+    for name, columns in INDEXES:
+        op.create_index(name, 'Habit', columns, if_not_exists=True)
+
+    if not as_sql:
+        _backfill()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, _ in INDEXES:
+        op.drop_index(name, table_name='Habit', if_exists=True)
+    with op.batch_alter_table('Habit', schema=None) as batch_op:
+        for name, _ in reversed(COLUMNS):
+            batch_op.drop_column(name)
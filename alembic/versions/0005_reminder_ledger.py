@@ -0,0 +1,42 @@
+"""Журнал отправленных напоминаний ReminderLedger.
+
+Одна запись на привычку, локальную дату и слот: перезапуск или пересекающиеся
+проверки не отправляют напоминание повторно. Индекс по local_date - для загрузки
+кэша за дату и очистки старых записей.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 10:45:03.116842
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_context().as_sql or not sa.inspect(op.get_bind()).has_table('ReminderLedger'):
+        op.create_table('ReminderLedger',
+        sa.Column('user_id', sa.Uuid(), nullable=False),
+        sa.Column('habit_id', sa.Uuid(), nullable=False),
+        sa.Column('local_date', sa.Date(), nullable=False),
+        sa.Column('slot', sa.Integer(), nullable=False),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('user_id', 'habit_id', 'local_date', 'slot')
+        )
+    op.create_index('idx_reminder_ledger_date', 'ReminderLedger', ['local_date'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_reminder_ledger_date', table_name='ReminderLedger', if_exists=True)
+    op.drop_table('ReminderLedger')
@@ -0,0 +1,35 @@
+"""Состояние доставки сообщений пользователю (User.delivery_state).
+
+Пользователи, заблокировавшие бота или с удаленным чатом, исключаются из напоминаний.
+Существующие пользователи получают состояние 'ok'.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 10:46:11.648230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not op.get_context().as_sql:
+        if 'delivery_state' in {column['name'] for column in sa.inspect(op.get_bind()).get_columns('User')}:
+            return
+    op.add_column('User', sa.Column('delivery_state', sa.String(length=20), nullable=False, server_default='ok'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('User', schema=None) as batch_op:
+        batch_op.drop_column('delivery_state')
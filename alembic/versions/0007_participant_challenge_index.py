@@ -0,0 +1,33 @@
+"""Индекс участников челленджа.
+
+Расчет челленджей выбирает незавершенных участников начавшихся челленджей:
+индекс ChallengeParticipant(challenge_id, completed).
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 10:47:25.201957
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'idx_participant_challenge', 'ChallengeParticipant', ['challenge_id', 'completed'], if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_participant_challenge', table_name='ChallengeParticipant', if_exists=True)
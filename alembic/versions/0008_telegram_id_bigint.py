@@ -0,0 +1,44 @@
+"""User.telegram_id - BIGINT.
+
+Современные Telegram ID не помещаются в 32-битное целое. В PostgreSQL тип колонки
+меняется на bigint; в SQLite INTEGER и так 64-битный - ревизия ничего не делает.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 10:48:40.775163
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, Sequence[str], None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _needs_change() -> bool:
+    context = op.get_context()
+    if context.dialect.name != 'postgresql':
+        return False
+    if context.as_sql:
+        return True
+    columns = sa.inspect(op.get_bind()).get_columns('User')
+    current = next(column['type'] for column in columns if column['name'] == 'telegram_id')
+    return not isinstance(current, sa.BigInteger)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if _needs_change():
+        op.alter_column('User', 'telegram_id', existing_type=sa.Integer(), type_=sa.BigInteger(), existing_nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_context().dialect.name == 'postgresql':
+        op.alter_column('User', 'telegram_id', existing_type=sa.BigInteger(), type_=sa.Integer(), existing_nullable=False)
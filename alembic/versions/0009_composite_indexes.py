@@ -0,0 +1,66 @@
+"""Составные и покрывающие индексы для частых запросов.
+
+- HabitCompletion(habit_id, completion_date, is_completed): отметка привычки за дату,
+  серии, выполненные сегодня привычки;
+- HabitCompletion(user_id, completion_date): отметки пользователя за период (челленджи);
+- User(points DESC): рейтинг;
+- Habit(is_active, user_id): активные привычки пользователя;
+- BugReport(status, created_at): отчеты по статусу, новые первыми.
+
+Индексы, которые раньше создавал только create_database.py, объявлены в моделях
+и создаются, если их нет. Одиночные индексы, ставшие префиксом составных, удаляются.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 08:50:53.883225
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, Sequence[str], None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (таблица, индекс, колонки)
+INDEXES = (
+    ("HabitCompletion", "idx_completion_habit_date", ["habit_id", "completion_date", "is_completed"]),
+    ("HabitCompletion", "idx_completion_user_date", ["user_id", "completion_date"]),
+    ("HabitCompletion", "idx_completion_date", ["completion_date"]),
+    ("User", "idx_user_points", [sa.text("points DESC")]),
+    ("Habit", "idx_habit_active_user", ["is_active", "user_id"]),
+    ("Habit", "idx_habit_user_id", ["user_id"]),
+    ("Habit", "idx_habit_schedule_type", ["schedule_type_id"]),
+    ("Reward", "idx_reward_user_id", ["user_id"]),
+    ("BugReport", "idx_bugreport_status_created", ["status", "created_at"]),
+    ("BugReport", "idx_bugreport_user_id", ["user_id"]),
+)
+
+# Индексы create_database.py, которые покрываются составными (или уникальным ограничением)
+REDUNDANT_INDEXES = (
+    ("HabitCompletion", "idx_completion_habit_id", ["habit_id"]),
+    ("HabitCompletion", "idx_completion_user_id", ["user_id"]),
+    ("BugReport", "idx_bugreport_status", ["status"]),
+    ("User", "idx_user_telegram_id", ["telegram_id"]),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table_name, index_name, columns in INDEXES:
+        op.create_index(index_name, table_name, columns, if_not_exists=True)
+    for table_name, index_name, _ in REDUNDANT_INDEXES:
+        op.drop_index(index_name, table_name=table_name, if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table_name, index_name, columns in REDUNDANT_INDEXES:
+        op.create_index(index_name, table_name, columns, if_not_exists=True)
+    for table_name, index_name, _ in INDEXES:
+        op.drop_index(index_name, table_name=table_name, if_exists=True)
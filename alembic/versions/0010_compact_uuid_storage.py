@@ -0,0 +1,119 @@
+"""UUID в SQLite - 16 байт BLOB вместо текста.
+
+Модели хранят UUID типом GUID (app/models/types.py): в SQLite это 16 байт BLOB,
+а не 32 символа (или 36 с дефисами, как в справочниках create_database.py).
+Ревизия переводит значения всех колонок UUID на месте; оба текстовых формата
+приводятся к одним и тем же байтам. Объявленный тип колонок не меняется: колонка
+с текстовой аффинностью хранит BLOB как есть, а пересоздание таблиц со связями
+ради типа в схеме не нужно. В конце база сжимается (VACUUM), иначе освободившиеся
+страницы остаются в файле.
+
+В PostgreSQL UUID уже хранится в 16 байтах (тип uuid) - ревизия ничего не делает.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17 10:12:31.402518
+
+"""
+import uuid
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, Sequence[str], None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Колонки UUID на момент ревизии
+UUID_COLUMNS = {
+    "ScheduleType": ("id",),
+    "RewardType": ("id",),
+    "FriendStatus": ("id",),
+    "User": ("id",),
+    "Habit": ("id", "user_id", "schedule_type_id"),
+    "HabitCompletion": ("id", "habit_id", "user_id"),
+    "Reward": ("id", "user_id", "reward_type_id"),
+    "Friend": ("id", "user_id", "friend_id", "friend_status_id"),
+    "Challenge": ("id",),
+    "ChallengeParticipant": ("id", "challenge_id", "user_id"),
+    "Notification": ("id", "user_id", "habit_id", "challenge_id"),
+    "ReminderLedger": ("user_id", "habit_id"),
+    "BugReport": ("id", "user_id"),
+}
+
+
+def _uuid_blob(value):
+    if value is None or isinstance(value, bytes):
+        return value
+    return uuid.UUID(value).bytes
+
+
+def _existing_columns(bind) -> dict:
+    inspector = sa.inspect(bind)
+    result = {}
+    for table_name, columns in UUID_COLUMNS.items():
+        if not inspector.has_table(table_name):
+            continue
+        present = {column["name"] for column in inspector.get_columns(table_name)}
+        result[table_name] = [column for column in columns if column in present]
+    return result
+
+
+def _convert(expression: str, stored_type: str) -> None:
+    bind = op.get_bind()
+    columns_by_table = _existing_columns(bind)
+    # Ключи родителей и детей меняются разными UPDATE, поэтому внешние ключи на время
+    # перевода выключаются. PRAGMA foreign_keys действует только вне транзакции:
+    # перевод идет в явной транзакции внутри autocommit_block
+    with op.get_context().autocommit_block():
+        foreign_keys = op.get_bind().exec_driver_sql("PRAGMA foreign_keys").scalar()
+        op.execute("PRAGMA foreign_keys = OFF")
+        op.execute("BEGIN")
+        try:
+            for table_name, columns in columns_by_table.items():
+                if not columns:
+                    continue
+                assignments = ", ".join(
+                    f'"{column}" = CASE WHEN typeof("{column}") = \'{stored_type}\' '
+                    f'THEN {expression.format(column=column)} ELSE "{column}" END'
+                    for column in columns
+                )
+                condition = " OR ".join(f"typeof(\"{column}\") = '{stored_type}'" for column in columns)
+                op.execute(f'UPDATE "{table_name}" SET {assignments} WHERE {condition}')
+            op.execute("COMMIT")
+        except Exception:
+            op.execute("ROLLBACK")
+            raise
+        finally:
+            op.execute(f"PRAGMA foreign_keys = {'ON' if foreign_keys else 'OFF'}")
+        # Иначе освободившиеся страницы остаются в файле
+        op.execute("VACUUM")
+
+
+def _applies() -> bool:
+    context = op.get_context()
+    if context.dialect.name != "sqlite":
+        return False
+    if context.as_sql:
+        raise RuntimeError("Ревизия 0010 переводит существующие данные и выполняется только на базе")
+    return True
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not _applies():
+        return
+    # Разбор обоих текстовых форматов - в Python: unhex() есть только в SQLite 3.41+
+    op.get_bind().connection.dbapi_connection.create_function("uuid_blob", 1, _uuid_blob, deterministic=True)
+    _convert("uuid_blob(\"{column}\")", "text")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if not _applies():
+        return
+    _convert("lower(hex(\"{column}\"))", "blob")
@@ -0,0 +1,41 @@
+"""Захват и устаревание уведомлений outbox.
+
+Notification.claimed_at - диспетчер захватил уведомление и отправляет его (строка
+фиксируется до отправки, блокировки на время доставки не держатся);
+Notification.expired_at - уведомление устарело и не будет отправлено (раньше такие
+уведомления отмечались is_sent).
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-17 14:12:38.204417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0011'
+down_revision: Union[str, Sequence[str], None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ('claimed_at', 'expired_at')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    as_sql = op.get_context().as_sql
+    present = set() if as_sql else {column['name'] for column in sa.inspect(op.get_bind()).get_columns('Notification')}
+    for name in COLUMNS:
+        if name not in present:
+            op.add_column('Notification', sa.Column(name, sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('Notification', schema=None) as batch_op:
+        for name in reversed(COLUMNS):
+            batch_op.drop_column(name)
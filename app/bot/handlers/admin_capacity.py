@@ -0,0 +1,48 @@
+"""
+Административная команда прогноза нагрузки напоминаний.
+"""
+
+import io
+from datetime import date
+from telegram import Update
+from telegram.ext import ContextTypes
+from app.bot.handlers.admin_bugreport import is_admin
+from app.bot.services.capacity_service import (
+    project_reminder_volume, format_capacity_report, capacity_report_csv,
+)
+from app.core.database import get_db_session
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def capacity_report_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    /capacity [ГГГГ-ММ-ДД] - прогноз напоминаний по UTC-минутам суток.
+    Присылает сводку и гистограмму на 1440 минут в CSV.
+    """
+    if not is_admin(update.effective_user.id):
+        await update.message.reply_text("❌ У вас нет прав администратора.")
+        return
+
+    day = None
+    if context.args:
+        try:
+            day = date.fromisoformat(context.args[0])
+        except ValueError:
+            await update.message.reply_text("Укажите дату в формате ГГГГ-ММ-ДД, например: /capacity 2025-01-31")
+            return
+
+    try:
+        async for db in get_db_session():
+            report = await project_reminder_volume(db, day)
+            break
+
+        await update.message.reply_text(format_capacity_report(report))
+        await update.message.reply_document(
+            document=io.BytesIO(capacity_report_csv(report).encode("utf-8")),
+            filename=f"capacity_{report.day.isoformat()}.csv",
+        )
+    except Exception as e:
+        logger.error(f"Ошибка при построении прогноза нагрузки: {e}")
+        await update.message.reply_text("Произошла ошибка при построении прогноза нагрузки.")
@@ -7,6 +7,7 @@ from telegram.ext import ContextTypes, ConversationHandler
 from app.bot.services.habit_service import create_habit, get_available_schedule_types
 from app.bot.services.user_service import get_or_create_user
 from app.core.database import get_db_session
+from app.core.scheduler import refresh_user_reminders
 import logging
 
 logger = logging.getLogger(__name__)
@@ -194,6 +195,9 @@ async def handle_habit_description(update: Update, context: ContextTypes.DEFAULT
                 custom_schedule_frequency=custom_schedule_frequency
             )
             
+            # Добавляем привычку в таблицу напоминаний
+            await refresh_user_reminders(context.application, db, update.effective_user.id)
+            
             # Формируем сообщение об успехе
             message = f"🎉 Привычка успешно создана!\n\n"
             message += f"📝 Название: {habit_name}\n"
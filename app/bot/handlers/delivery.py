@@ -0,0 +1,41 @@
+"""
+Обработчик, возвращающий в напоминания пользователей, которым раньше
+не удавалось доставить сообщение (заблокировали бота).
+"""
+
+from telegram import Update
+from telegram.ext import ContextTypes
+from app.core.database import get_db_session
+from app.core.delivery_state import undeliverable_chats
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def restore_delivery_on_update(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Любое входящее обновление от пользователя означает, что бот снова может ему писать.
+    Регистрируется в группе -1, поэтому выполняется до остальных обработчиков.
+    """
+    user = update.effective_user
+    if user is None:
+        return
+
+    if user.id not in undeliverable_chats and not undeliverable_chats.needs_refresh:
+        return
+
+    try:
+        from app.bot.services.user_service import restore_user_delivery
+        from app.core.scheduler import refresh_user_reminders
+
+        async for db in get_db_session():
+            if undeliverable_chats.needs_refresh:
+                await undeliverable_chats.refresh(db)
+            if user.id in undeliverable_chats:
+                if await restore_user_delivery(db, user.id):
+                    logger.info(f"Пользователь {user.id} снова получает напоминания.")
+                    await refresh_user_reminders(context.application, db, user.id)
+                undeliverable_chats.discard(user.id)
+            break
+    except Exception as e:
+        logger.error(f"Ошибка при восстановлении доставки пользователю {user.id}: {e}")
@@ -8,6 +8,7 @@ from app.bot.services.reward_service import get_user_rewards, get_user_level_inf
 from app.bot.services.habit_service import get_user_statistics
 from app.bot.services.user_service import get_or_create_user, get_top_users_by_points, get_user_position_by_points, update_user_reminder_frequency
 from app.core.database import get_db_session
+from app.core.scheduler import refresh_user_reminders
 import logging
 
 logger = logging.getLogger(__name__)
@@ -329,6 +330,9 @@ async def handle_reminder_frequency_callback(update: Update, context: ContextTyp
             success = await update_user_reminder_frequency(db, telegram_id, selected_frequency)
             
             if success:
+                # Пересчитываем расписание напоминаний с новой частотой
+                await refresh_user_reminders(context.application, db, telegram_id)
+                
                 frequency_descriptions = {
                     "*/10": "каждые 10 минут",
                     "*/15": "каждые 15 минут", 
@@ -13,6 +13,7 @@ from app.bot.services.habit_service import (
     get_all_completions_for_habit,
     get_available_schedule_types,
     calculate_current_streak,
+    remove_habit,
 )
 from app.models.database import ScheduleType, HabitCompletion, Habit
 from app.bot.services.reward_service import award_points_and_rewards
@@ -20,6 +21,7 @@ from app.bot.services.user_service import get_or_create_user
 from app.utils.points_calculator import calculate_total_points_for_completion
 from app.utils.streak_calculator import update_streak_increment
 from app.core.database import get_db_session
+from app.core.scheduler import refresh_user_reminders
 from datetime import date
 from sqlalchemy import select
 import logging
@@ -261,6 +263,9 @@ async def create_habit_command(update: Update, context: ContextTypes.DEFAULT_TYP
                 custom_schedule_frequency=custom_schedule_frequency,
                 timezone="Europe/Moscow"  # По умолчанию московское время
             )
+            
+            # Добавляем привычку в таблицу напоминаний
+            await refresh_user_reminders(context.application, db, user.id)
 
             # Переводим тип расписания на русский
             schedule_type_names = {
@@ -687,9 +692,11 @@ async def handle_delete_confirm_callback(update: Update, context: ContextTypes.D
                 
                 habit_name = habit.name
                 
-                # Удаляем привычку
-                await db.delete(habit)
-                await db.commit()
+                # Удаляем привычку вместе с отметками выполнения
+                await remove_habit(db, habit)
+                
+                # Убираем привычку из таблицы напоминаний
+                await refresh_user_reminders(context.application, db, query.from_user.id)
                 
                 message = f"🗑️ Привычка '{habit_name}' успешно удалена!\n\n"
                 message += "Используйте /habits для просмотра обновленного списка."
@@ -0,0 +1,288 @@
+"""
+Прогноз нагрузки напоминаний для планирования мощности.
+Считает, сколько сообщений-напоминаний планировщик отправит в каждую UTC-минуту суток,
+и сравнивает пики с ограничением частоты запросов Telegram.
+"""
+
+import math
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, FrozenSet, List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core import clock
+from app.core.config import settings
+from app.core.reminder_timetable import reminder_frequency_matches
+from app.models.database import Habit
+from app.utils.schedule_utils import MINUTES_PER_DAY, REMINDER_TOLERANCE_MINUTES, reminder_jitter_minutes
+from app.utils.timezone_utils import get_user_timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+STREAM_CHUNK_SIZE = 1000
+
+
+@dataclass
+class CapacityReport:
+    """
+    Прогноз на сутки: сообщения и привычки по UTC-минутам (индекс - минута с 00:00 UTC).
+    """
+
+    day: date
+    rate_limit: float  # Сообщений в секунду (TELEGRAM_GLOBAL_RATE_LIMIT)
+    messages: List[int] = field(default_factory=lambda: [0] * MINUTES_PER_DAY)
+    habits: List[int] = field(default_factory=lambda: [0] * MINUTES_PER_DAY)
+    users: int = 0
+    active_habits: int = 0
+    jitter_window: int = 0  # REMINDER_JITTER_WINDOW_MINUTES, с которым построен прогноз
+
+    @property
+    def minute_capacity(self) -> int:
+        """
+        Сколько сообщений Telegram пропустит за минуту.
+        """
+        return int(self.rate_limit * 60)
+
+    @property
+    def total_messages(self) -> int:
+        return sum(self.messages)
+
+    @property
+    def peak(self) -> Tuple[int, int]:
+        """
+        Самая нагруженная минута: (минута, сообщений).
+        """
+        minute = max(range(MINUTES_PER_DAY), key=self.messages.__getitem__)
+        return minute, self.messages[minute]
+
+    def over_ceiling(self) -> List[int]:
+        """
+        Минуты, сообщения которых не успевают уйти за эту же минуту.
+        """
+        capacity = self.minute_capacity
+        return [minute for minute, count in enumerate(self.messages) if count > capacity]
+
+    def drain_seconds(self, minute: int) -> float:
+        """
+        За сколько секунд очередь минуты уйдет при предельной частоте.
+        """
+        return self.messages[minute] / self.rate_limit if self.rate_limit else 0.0
+
+    def suggested_jitter_seconds(self) -> int:
+        """
+        Окно разброса отправки, при котором пиковая минута укладывается в предел частоты:
+        сообщения, равномерно распределенные по окну, уходят без очереди.
+        """
+        _, count = self.peak
+        if not self.rate_limit or count <= self.rate_limit:
+            return 0
+        return math.ceil(count / self.rate_limit)
+
+    def suggested_jitter_window_minutes(self) -> int:
+        """
+        Значение REMINDER_JITTER_WINDOW_MINUTES, при котором пиковая минута укладывается
+        в минутный предел. Пик без сдвига оценивается как текущий пик, умноженный на текущее окно.
+        """
+        _, count = self.peak
+        capacity = self.minute_capacity
+        if not capacity or count <= capacity:
+            return self.jitter_window
+        return math.ceil(count * max(self.jitter_window, 1) / capacity)
+
+    def top_minutes(self, limit: int = 10) -> List[Tuple[int, int]]:
+        ordered = sorted(range(MINUTES_PER_DAY), key=self.messages.__getitem__, reverse=True)
+        return [(minute, self.messages[minute]) for minute in ordered[:limit] if self.messages[minute]]
+
+    def to_dict(self) -> dict:
+        peak_minute, peak_count = self.peak
+        return {
+            "day": self.day.isoformat(),
+            "users": self.users,
+            "active_habits": self.active_habits,
+            "rate_limit_per_second": self.rate_limit,
+            "minute_capacity": self.minute_capacity,
+            "total_messages": self.total_messages,
+            "peak": {"minute": format_minute(peak_minute), "messages": peak_count},
+            "over_ceiling": [format_minute(minute) for minute in self.over_ceiling()],
+            "suggested_jitter_seconds": self.suggested_jitter_seconds(),
+            "jitter_window_minutes": self.jitter_window,
+            "suggested_jitter_window_minutes": self.suggested_jitter_window_minutes(),
+            "messages_per_minute": self.messages,
+            "habits_per_minute": self.habits,
+        }
+
+
+def format_minute(minute: int) -> str:
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def _frequency_minutes(frequency: Optional[str], jitter_minutes: int = 0) -> FrozenSet[int]:
+    """
+    UTC-минуты суток, в которые срабатывает частота напоминаний пользователя со сдвигом
+    jitter_minutes (та же проверка, что в ReminderTimetable._fires: reminder_frequency_matches
+    по UTC-минуте без сдвига).
+    """
+    minutes = set()
+    for minute in range(MINUTES_PER_DAY):
+        unshifted = (minute - jitter_minutes) % MINUTES_PER_DAY
+        if reminder_frequency_matches(frequency, unshifted // 60, unshifted % 60):
+            minutes.add(minute)
+    return frozenset(minutes)
+
+
+class _ZoneDay:
+    """
+    Соответствие UTC-минут суток локальным датам и минутам часового пояса.
+    Смещение берется на начало суток UTC, как в ReminderTimetable.
+    """
+
+    def __init__(self, day: date, habit_timezone: Optional[str]):
+        local = datetime.combine(day, time(), tzinfo=timezone.utc).astimezone(get_user_timezone(habit_timezone))
+        self.first_date = local.date()  # Локальная дата в 00:00 UTC
+        self.first_minute = local.hour * 60 + local.minute  # Локальная минута в 00:00 UTC
+        self.boundary = MINUTES_PER_DAY - self.first_minute  # UTC-минута локальной полуночи
+
+    def local_date(self, utc_minute: int) -> date:
+        return self.first_date if utc_minute < self.boundary else self.first_date + timedelta(days=1)
+
+    def utc_minutes(self, local_minute: int) -> List[Tuple[int, date]]:
+        """
+        UTC-минуты суток (с локальной датой), на которые приходится локальная минута.
+        """
+        result = []
+        utc_minute = local_minute - self.first_minute
+        if utc_minute >= 0:
+            result.append((utc_minute, self.first_date))
+        utc_minute += MINUTES_PER_DAY
+        if utc_minute < MINUTES_PER_DAY:
+            result.append((utc_minute, self.first_date + timedelta(days=1)))
+        return result
+
+
+async def project_reminder_volume(db: AsyncSession, day: Optional[date] = None) -> CapacityReport:
+    """
+    Прогнозирует число напоминаний по UTC-минутам суток day (по умолчанию - сегодня).
+
+    Правила те же, что у рассылки: пользователю уходит одно сообщение в минуту, когда
+    срабатывает его частота напоминаний и хотя бы одна привычка выполняется в этот
+    локальный день (маска дней и "каждый N день", как в get_users_with_uncompleted_daily_habits),
+    а привычка со временем - еще и в пределах REMINDER_TOLERANCE_MINUTES от него.
+    Сдвиг пользователя (REMINDER_JITTER_WINDOW_MINUTES) учитывается.
+    Отметки выполнения не учитываются: прогноз - верхняя граница, когда никто не отметил привычки.
+    """
+    from app.bot.services.habit_service import _schedule_query, _row_schedule, _local_date
+
+    day = day or clock.now(timezone.utc).date()
+    report = CapacityReport(
+        day=day,
+        rate_limit=settings.TELEGRAM_GLOBAL_RATE_LIMIT,
+        jitter_window=settings.REMINDER_JITTER_WINDOW_MINUTES,
+    )
+    frequency_minutes: Dict[Tuple[Optional[str], int], FrozenSet[int]] = {}
+    zones: Dict[Optional[str], _ZoneDay] = {}
+
+    def flush(user_minutes: Dict[int, int]):
+        if not user_minutes:
+            return
+        report.users += 1
+        for minute, habits_count in user_minutes.items():
+            report.messages[minute] += 1
+            report.habits[minute] += habits_count
+
+    # Строки упорядочены по пользователю, поэтому минуты собираются по одному пользователю
+    query = _schedule_query().order_by(Habit.user_id).execution_options(yield_per=STREAM_CHUNK_SIZE)
+    result = await db.stream(query)
+    current_user = None
+    user_minutes: Dict[int, int] = {}
+    async for row in result:
+        if row.user_id != current_user:
+            flush(user_minutes)
+            current_user, user_minutes = row.user_id, {}
+        report.active_habits += 1
+
+        key = (row.reminder_frequency, reminder_jitter_minutes(row.user_id))
+        minutes = frequency_minutes.get(key)
+        if minutes is None:
+            minutes = frequency_minutes[key] = _frequency_minutes(*key)
+        zone = zones.get(row.timezone)
+        if zone is None:
+            zone = zones[row.timezone] = _ZoneDay(day, row.timezone)
+        schedule = _row_schedule(row)
+        anchor = _local_date(row.created_at, row.timezone)
+
+        if schedule.minute is None:
+            # Без времени - каждое срабатывание частоты в дни расписания
+            due_dates = {
+                local_date: schedule.is_due_on_date(local_date, anchor)
+                for local_date in (zone.first_date, zone.first_date + timedelta(days=1))
+            }
+            for minute in minutes:
+                if due_dates[zone.local_date(minute)]:
+                    user_minutes[minute] = user_minutes.get(minute, 0) + 1
+            continue
+
+        # Со временем - окно допуска, не переходящее через локальную полночь (как в is_habit_time_now),
+        # сдвинутое вместе с частотой
+        start = max(0, schedule.minute - REMINDER_TOLERANCE_MINUTES)
+        end = min(MINUTES_PER_DAY - 1, schedule.minute + REMINDER_TOLERANCE_MINUTES)
+        for local_minute in range(start, end + 1):
+            for minute, _ in zone.utc_minutes(local_minute):
+                minute = (minute + key[1]) % MINUTES_PER_DAY
+                if minute in minutes and schedule.is_due_on_date(zone.local_date(minute), anchor):
+                    user_minutes[minute] = user_minutes.get(minute, 0) + 1
+    flush(user_minutes)
+
+    logger.info(
+        f"Прогноз нагрузки на {day}: {report.total_messages} сообщений, "
+        f"пик {report.peak[1]} в {format_minute(report.peak[0])} UTC."
+    )
+    return report
+
+
+def format_capacity_report(report: CapacityReport, top: int = 10) -> str:
+    """
+    Краткая текстовая сводка прогноза (для админ-команды и CLI).
+    """
+    peak_minute, peak_count = report.peak
+    over = report.over_ceiling()
+    lines = [
+        f"📈 Прогноз напоминаний на {report.day.isoformat()} (UTC)",
+        f"Пользователей с напоминаниями: {report.users}, активных привычек: {report.active_habits}",
+        f"Всего сообщений: {report.total_messages}",
+        f"Предел Telegram: {report.rate_limit:g}/с = {report.minute_capacity} в минуту",
+        f"Пик: {peak_count} в {format_minute(peak_minute)}, очередь уйдет за {report.drain_seconds(peak_minute):.0f} с",
+    ]
+    if over:
+        lines.append(f"⚠️ Минут сверх предела: {len(over)} ({', '.join(format_minute(m) for m in over[:top])})")
+    else:
+        lines.append("✅ Ни одна минута не превышает предел")
+
+    lines.append(f"Сдвиг напоминаний: {report.jitter_window} мин")
+    jitter = report.suggested_jitter_seconds()
+    if jitter:
+        lines.append(
+            f"Рекомендуемый разброс отправки: {jitter} с "
+            f"(REMINDER_JITTER_WINDOW_MINUTES={report.suggested_jitter_window_minutes()})"
+        )
+    else:
+        lines.append("Разброс отправки не нужен")
+
+    top_minutes = report.top_minutes(top)
+    if top_minutes:
+        lines.append("")
+        lines.append("Самые нагруженные минуты:")
+        for minute, count in top_minutes:
+            lines.append(f"  {format_minute(minute)} - {count}")
+    return "\n".join(lines)
+
+
+def capacity_report_csv(report: CapacityReport) -> str:
+    """
+    Гистограмма по минутам в CSV: minute_utc, messages, habits, over_ceiling.
+    """
+    capacity = report.minute_capacity
+    lines = ["minute_utc,messages,habits,over_ceiling"]
+    for minute in range(MINUTES_PER_DAY):
+        count = report.messages[minute]
+        lines.append(f"{format_minute(minute)},{count},{report.habits[minute]},{int(count > capacity)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,235 @@
+"""
+Сервисы для работы с челленджами: подсчет прогресса участников и выдача наград.
+"""
+
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, insert, and_, or_, case, cast, distinct, exists, func, literal, String
+from app.models.database import (
+    Challenge, ChallengeParticipant, HabitCompletion, Reward, RewardType, User,
+)
+from app.core import clock
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Завершившиеся челленджи пересчитываются еще столько дней (пропущенный запуск еженедельной задачи)
+SETTLEMENT_LOOKBACK_DAYS = 14
+# Очков на уровень (как в award_points_and_rewards)
+POINTS_PER_LEVEL = 100
+
+
+@dataclass
+class SettlementResult:
+    challenges: int = 0
+    participants_updated: int = 0
+    winners: int = 0
+    points_awarded: int = 0
+    badges_awarded: int = 0
+    level_ups: int = 0
+
+
+def challenge_target_days(challenge_start: date, challenge_end: date) -> int:
+    """
+    Цель челленджа - хотя бы одна выполненная привычка в каждый его день.
+    """
+    return (challenge_end - challenge_start).days + 1
+
+
+def _new_uuid(db: AsyncSession):
+    """
+    SQL-выражение нового UUID для INSERT ... SELECT (без генерации строк в Python).
+    В SQLite UUID хранится как 16 байт BLOB, как у типа GUID.
+    """
+    if db.bind.dialect.name == "postgresql":
+        return func.gen_random_uuid()
+    return func.randomblob(16)
+
+
+async def settle_challenges(db: AsyncSession, today: Optional[date] = None) -> SettlementResult:
+    """
+    Пересчитывает прогресс участников начавшихся челленджей и награждает тех,
+    кто достиг цели: начисляет points_reward (с повышением уровня), выдает badge_reward
+    и отмечает участие выполненным.
+
+    Все шаги - групповые UPDATE и INSERT ... SELECT в одной транзакции; в Python
+    перебираются только челленджи. Повторный запуск не награждает повторно:
+    награды получают только участники с completed = false (или NULL в старых записях).
+    """
+    today = today or clock.today()
+    result = SettlementResult()
+
+    challenges_result = await db.execute(
+        select(Challenge.id, Challenge.start_date, Challenge.end_date)
+        .where(Challenge.start_date.is_not(None))
+        .where(Challenge.end_date.is_not(None))
+        .where(Challenge.start_date <= today)
+        .where(Challenge.end_date >= today - timedelta(days=SETTLEMENT_LOOKBACK_DAYS))
+    )
+    targets: Dict = {
+        challenge_id: challenge_target_days(start_date, end_date)
+        for challenge_id, start_date, end_date in challenges_result.all()
+    }
+    if not targets:
+        return result
+    result.challenges = len(targets)
+    challenge_ids = list(targets)
+
+    # В базах из create_database.py completed допускает NULL - такие записи тоже не выполнены
+    not_completed = or_(ChallengeParticipant.completed.is_(None), ChallengeParticipant.completed == False)
+
+    try:
+        # 1. Прогресс - число дней челленджа (не позже сегодняшнего) с выполненными привычками
+        progress = (
+            select(
+                ChallengeParticipant.id.label("participant_id"),
+                func.count(distinct(HabitCompletion.completion_date)).label("days"),
+            )
+            .join(Challenge, Challenge.id == ChallengeParticipant.challenge_id)
+            .join(
+                HabitCompletion,
+                and_(
+                    HabitCompletion.user_id == ChallengeParticipant.user_id,
+                    HabitCompletion.is_completed == True,
+                    HabitCompletion.completion_date >= Challenge.start_date,
+                    HabitCompletion.completion_date <= Challenge.end_date,
+                    HabitCompletion.completion_date <= today,
+                ),
+            )
+            .where(ChallengeParticipant.challenge_id.in_(challenge_ids))
+            .where(not_completed)
+            .group_by(ChallengeParticipant.id)
+            .subquery()
+        )
+        updated = await db.execute(
+            update(ChallengeParticipant)
+            .where(ChallengeParticipant.id == progress.c.participant_id)
+            .where(ChallengeParticipant.progress != progress.c.days)
+            .values(progress=progress.c.days)
+            .execution_options(synchronize_session=False)
+        )
+        result.participants_updated = updated.rowcount
+
+        # 2. Победители - участники, набравшие цель своего челленджа
+        # Сравнение с колонкой, а не case(targets, value=...): так id привязывается типом колонки (GUID)
+        target = case(*(
+            (ChallengeParticipant.challenge_id == challenge_id, days) for challenge_id, days in targets.items()
+        ))
+        winners = (
+            select(ChallengeParticipant.id, ChallengeParticipant.user_id, ChallengeParticipant.challenge_id)
+            .where(ChallengeParticipant.challenge_id.in_(challenge_ids))
+            .where(not_completed)
+            .where(ChallengeParticipant.progress >= target)
+            .subquery()
+        )
+        gains = (
+            select(winners.c.user_id, func.sum(Challenge.points_reward).label("points"))
+            .join(Challenge, Challenge.id == winners.c.challenge_id)
+            .group_by(winners.c.user_id)
+            .subquery()
+        )
+
+        stats = (await db.execute(
+            select(func.count(), func.coalesce(func.sum(Challenge.points_reward), 0))
+            .select_from(winners)
+            .join(Challenge, Challenge.id == winners.c.challenge_id)
+        )).one()
+        result.winners, result.points_awarded = stats[0], int(stats[1])
+        if not result.winners:
+            await db.commit()
+            return result
+
+        reward_types = dict((await db.execute(select(RewardType.name, RewardType.id))).all())
+        awarded_at = clock.utcnow()
+
+        # 3. Бейджи челленджей (тип награды "challenge"), без повторной выдачи того же бейджа
+        challenge_type_id = reward_types.get("challenge")
+        if challenge_type_id is not None:
+            earned = (
+                select(
+                    winners.c.user_id,
+                    Challenge.badge_reward.label("badge"),
+                    func.min(literal("Челлендж: ") + Challenge.name).label("description"),
+                )
+                .join(Challenge, Challenge.id == winners.c.challenge_id)
+                .where(Challenge.badge_reward.is_not(None))
+                .group_by(winners.c.user_id, Challenge.badge_reward)
+                .subquery()
+            )
+            badges = (
+                select(
+                    _new_uuid(db),
+                    earned.c.user_id,
+                    literal(challenge_type_id, Reward.reward_type_id.type),
+                    earned.c.badge,
+                    earned.c.description,
+                    literal(awarded_at, Reward.awarded_at.type),
+                )
+                .where(~exists().where(
+                    Reward.user_id == earned.c.user_id,
+                    Reward.reward_type_id == challenge_type_id,
+                    Reward.name == earned.c.badge,
+                ))
+            )
+            inserted = await db.execute(
+                insert(Reward).from_select(
+                    ["id", "user_id", "reward_type_id", "name", "description", "awarded_at"], badges
+                )
+            )
+            result.badges_awarded = inserted.rowcount
+
+        # 4. Награды за новый уровень - до обновления очков, пока виден прежний уровень
+        new_level = (User.points + gains.c.points) // POINTS_PER_LEVEL + 1
+        level_type_id = reward_types.get("level")
+        if level_type_id is not None:
+            levels = (
+                select(
+                    _new_uuid(db),
+                    User.id,
+                    literal(level_type_id, Reward.reward_type_id.type),
+                    literal("Уровень ") + cast(new_level, String),
+                    literal("Достигнут уровень ") + cast(new_level, String),
+                    literal(awarded_at, Reward.awarded_at.type),
+                )
+                .join(gains, gains.c.user_id == User.id)
+                .where(new_level > User.level)
+            )
+            inserted = await db.execute(
+                insert(Reward).from_select(
+                    ["id", "user_id", "reward_type_id", "name", "description", "awarded_at"], levels
+                )
+            )
+            result.level_ups = inserted.rowcount
+
+        # 5. Очки и уровень
+        await db.execute(
+            update(User)
+            .where(User.id == gains.c.user_id)
+            .values(
+                points=User.points + gains.c.points,
+                level=case((new_level > User.level, new_level), else_=User.level),
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+        # 6. Участие выполнено - повторно не награждается
+        await db.execute(
+            update(ChallengeParticipant)
+            .where(ChallengeParticipant.id.in_(select(winners.c.id)))
+            .values(completed=True)
+            .execution_options(synchronize_session=False)
+        )
+
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+    logger.info(
+        f"Челленджи рассчитаны: {result.challenges} челленджей, прогресс обновлен у "
+        f"{result.participants_updated} участников, победителей {result.winners}, "
+        f"очков {result.points_awarded}, бейджей {result.badges_awarded}, новых уровней {result.level_ups}."
+    )
+    return result
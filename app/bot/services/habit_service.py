@@ -2,11 +2,28 @@
 Сервисы для работы с привычками.
 """
 
-from typing import List, Optional, Sequence
+from typing import Iterable, List, Optional, Sequence, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
-from app.models.database import Habit, HabitCompletion, User, ScheduleType
-from datetime import date
+from sqlalchemy import select, update, delete, and_, case, func, literal
+from app.models.database import Habit, HabitCompletion, Notification, User, ScheduleType, DELIVERY_OK
+from app.core import clock
+from app.utils.schedule_utils import (
+    CompiledSchedule,
+    compile_schedule,
+    compute_next_due_at,
+    compute_next_due_window,
+    matches_day_frequency,
+    reminder_jitter_minutes,
+    weekday_bit,
+)
+from datetime import date, datetime
+
+# Максимальное число идентификаторов в одном IN (...) (ограничение SQLite на параметры)
+HABIT_IDS_CHUNK_SIZE = 500
+# Если идентификаторов больше, выгоднее один проход по всем активным привычкам
+HABIT_IDS_MAX_CHUNKS = 4
+# Размер порции строк при потоковом чтении результатов
+STREAM_CHUNK_SIZE = 1000
 
 
 async def create_habit(
@@ -24,10 +41,11 @@ async def create_habit(
     Создаёт новую привычку для пользователя.
     """
     # Найти пользователя по telegram_id
-    result = await db.execute(select(User.id).where(User.telegram_id == telegram_id))
-    user_db_id = result.scalar_one_or_none()
-    if not user_db_id:
+    result = await db.execute(select(User.id, User.reminder_frequency).where(User.telegram_id == telegram_id))
+    user_row = result.one_or_none()
+    if not user_row:
         raise ValueError(f"Пользователь с telegram_id {telegram_id} не найден.")
+    user_db_id, reminder_frequency = user_row
 
     # Получить UUID для указанного типа расписания
     schedule_result = await db.execute(select(ScheduleType.id).where(ScheduleType.name == schedule_type))
@@ -35,6 +53,9 @@ async def create_habit(
     if not schedule_type_id:
         raise ValueError(f"Тип расписания '{schedule_type}' не найден в справочнике.")
 
+    schedule = compile_schedule(schedule_type, custom_schedule_days, custom_schedule_time, custom_schedule_frequency)
+    created_at = clock.utcnow()
+
     habit = Habit(
         user_id=user_db_id,
         name=name,
@@ -44,6 +65,14 @@ async def create_habit(
         custom_schedule_time=custom_schedule_time,
         custom_schedule_frequency=custom_schedule_frequency,
         timezone=timezone,
+        schedule_weekday_mask=schedule.weekday_mask,
+        schedule_minute=schedule.minute,
+        created_at=created_at,
+        next_due_at=compute_next_due_at(
+            schedule, timezone, reminder_frequency, created_at,
+            anchor=_local_date(created_at, timezone),
+            jitter_minutes=reminder_jitter_minutes(user_db_id),
+        ),
     )
     db.add(habit)
     await db.commit()
@@ -100,6 +129,7 @@ async def mark_habit_completed(
         existing.is_completed = True
         existing.streak_increment = streak_increment
         await db.commit()
+        await reschedule_habits(db, habit_ids=[habit_id], skip_date=completion_date)
         await db.refresh(existing)
         return existing
     else:
@@ -113,6 +143,7 @@ async def mark_habit_completed(
         )
         db.add(completion)
         await db.commit()
+        await reschedule_habits(db, habit_ids=[habit_id], skip_date=completion_date)
         await db.refresh(completion)
         return completion
 
@@ -126,6 +157,23 @@ async def get_habit_by_id(db: AsyncSession, habit_id: str) -> Optional[Habit]:
     return habit
 
 
+async def remove_habit(db: AsyncSession, habit: Habit) -> None:
+    """
+    Удаляет привычку вместе с отметками выполнения; уведомления остаются без ссылки на привычку.
+    Зависимые строки убираются явно: при PRAGMA foreign_keys=ON (SQLITE_FOREIGN_KEYS)
+    удаление привычки, на которую ссылаются другие таблицы, завершится ошибкой.
+    """
+    await db.execute(delete(HabitCompletion).where(HabitCompletion.habit_id == habit.id))
+    await db.execute(
+        update(Notification)
+        .where(Notification.habit_id == habit.id)
+        .values(habit_id=None)
+        .execution_options(synchronize_session=False)
+    )
+    await db.delete(habit)
+    await db.commit()
+
+
 async def get_all_completions_for_habit(
     db: AsyncSession, habit_id: str
 ) -> Sequence[HabitCompletion]:
@@ -260,70 +308,293 @@ async def calculate_current_streak(db: AsyncSession, habit_id) -> int:
     return streak
 
 
-async def get_users_with_uncompleted_daily_habits(db: AsyncSession, target_date: date = None):
+async def get_users_with_uncompleted_daily_habits(
+    db: AsyncSession,
+    target_date: date = None,
+    habit_ids: Optional[Iterable] = None,
+):
     """
     Возвращает пользователей с незавершенными привычками на указанную дату.
     Учитывает все типы привычек: daily, weekly, custom.
+    Если передан habit_ids, проверяются только эти привычки.
+    Пользователи, которым сообщения не доставляются, не возвращаются.
+
+    Отметки выполнения подтягиваются тем же запросом через LEFT JOIN,
+    а строки читаются из курсора частями по STREAM_CHUNK_SIZE.
+    День недели проверяется в SQL по маске schedule_weekday_mask; строки
+    без скомпилированного расписания проверяются в Python.
     """
-    from app.utils.timezone_utils import is_habit_day_today, get_user_timezone
-    from datetime import datetime
+    from app.utils.timezone_utils import ZoneClock
     
     if target_date is None:
-        target_date = date.today()
+        target_date = clock.today()
     
-    # Получаем всех пользователей с активными привычками
-    result = await db.execute(
-        select(User, Habit, ScheduleType)
+    if habit_ids is not None:
+        habit_ids = list(habit_ids)
+        if not habit_ids:
+            return []
+    
+    zone_clock = ZoneClock()  # Локальное время считается один раз на часовой пояс
+    is_due_today = await _weekday_due_expression(db, zone_clock)
+    
+    # Активные привычки вместе с пользователем, типом расписания и признаками выполнения и дня
+    query = (
+        select(
+            User,
+            Habit,
+            ScheduleType,
+            HabitCompletion.id.is_not(None).label("is_completed"),
+            is_due_today.label("is_due_today"),
+        )
         .join(Habit, User.id == Habit.user_id)
         .join(ScheduleType, Habit.schedule_type_id == ScheduleType.id)
+        .outerjoin(
+            HabitCompletion,
+            and_(
+                HabitCompletion.habit_id == Habit.id,
+                HabitCompletion.completion_date == target_date,
+                HabitCompletion.is_completed == True,
+            ),
+        )
         .where(Habit.is_active == True)
+        .where(User.delivery_state == DELIVERY_OK)
+        .execution_options(yield_per=STREAM_CHUNK_SIZE)
     )
     
-    user_habits = result.all()
+    if habit_ids is None or len(habit_ids) > HABIT_IDS_CHUNK_SIZE * HABIT_IDS_MAX_CHUNKS:
+        # Один проход по всем активным привычкам; лишние отбрасываются в Python
+        wanted = set(habit_ids) if habit_ids is not None else None
+        queries = [query]
+    else:
+        # Ограничиваем выборку привычками из расписания, разбивая список на части
+        wanted = None
+        queries = [
+            query.where(Habit.id.in_(habit_ids[start:start + HABIT_IDS_CHUNK_SIZE]))
+            for start in range(0, len(habit_ids), HABIT_IDS_CHUNK_SIZE)
+        ]
     
-    # Группируем по пользователям
     users_with_habits = {}
-    for user, habit, schedule_type in user_habits:
-        if user.id not in users_with_habits:
-            users_with_habits[user.id] = {
-                'user': user,
-                'habits': [],
-                'uncompleted_habits': []
-            }
-        users_with_habits[user.id]['habits'].append((habit, schedule_type))
     
-    # Проверяем, какие привычки не выполнены
-    for user_id, data in users_with_habits.items():
-        for habit, schedule_type in data['habits']:
-            # Проверяем, должна ли выполняться привычка сегодня
-            should_execute_today = False
-            
-            if schedule_type.name == "daily":
-                # Ежедневные привычки выполняются каждый день
-                should_execute_today = True
-            elif schedule_type.name == "weekly":
-                # Еженедельные привычки выполняются раз в неделю
-                # Для простоты считаем, что они должны выполняться в понедельник
-                should_execute_today = datetime.now(get_user_timezone(habit.timezone)).weekday() == 0
-            elif schedule_type.name == "custom":
-                # Custom привычки выполняются по расписанию
-                if habit.custom_schedule_days:
-                    should_execute_today = is_habit_day_today(habit.custom_schedule_days, habit.timezone)
-                else:
-                    # Если дни не указаны, считаем ежедневной
+    for chunk_query in queries:
+        result = await db.stream(chunk_query)
+        async for rows in result.partitions():
+            for user, habit, schedule_type, is_completed, due_today in rows:
+                if wanted is not None and habit.id not in wanted:
+                    continue
+                
+                # Группируем по пользователям
+                data = users_with_habits.get(user.id)
+                if data is None:
+                    data = users_with_habits[user.id] = {
+                        'user': user,
+                        'habits': [],
+                        'uncompleted_habits': []
+                    }
+                data['habits'].append((habit, schedule_type))
+                
+                if is_completed:
+                    continue
+                
+                # Custom привычки с частотой "каждый N день"
+                if (
+                    schedule_type.name == "custom"
+                    and habit.custom_schedule_frequency > 1
+                    and not matches_day_frequency(
+                        zone_clock.local(habit.timezone).date(),
+                        habit.custom_schedule_frequency,
+                        _local_date(habit.created_at, habit.timezone),
+                    )
+                ):
+                    continue
+                
+                if due_today is not None:
+                    if due_today:
+                        data['uncompleted_habits'].append(habit)
+                    continue
+                
+                # Расписание еще не скомпилировано - проверяем по строковым полям
+                should_execute_today = False
+                
+                if schedule_type.name == "daily":
+                    # Ежедневные привычки выполняются каждый день
                     should_execute_today = True
-            
-            if should_execute_today:
-                # Проверяем, была ли привычка выполнена в этот день
-                completion_result = await db.execute(
-                    select(HabitCompletion)
-                    .where(HabitCompletion.habit_id == habit.id)
-                    .where(HabitCompletion.completion_date == target_date)
-                    .where(HabitCompletion.is_completed == True)
-                )
+                elif schedule_type.name == "weekly":
+                    # Еженедельные привычки выполняются раз в неделю
+                    # Для простоты считаем, что они должны выполняться в понедельник
+                    should_execute_today = zone_clock.weekday(habit.timezone) == 0
+                elif schedule_type.name == "custom":
+                    # Custom привычки выполняются по расписанию
+                    if habit.custom_schedule_days:
+                        should_execute_today = zone_clock.is_habit_day(habit.custom_schedule_days, habit.timezone)
+                    else:
+                        # Если дни не указаны, считаем ежедневной
+                        should_execute_today = True
                 
-                if not completion_result.scalar_one_or_none():
+                if should_execute_today:
                     data['uncompleted_habits'].append(habit)
     
     # Возвращаем только пользователей с незавершенными привычками
     return [data for data in users_with_habits.values() if data['uncompleted_habits']]
+
+
+async def _weekday_due_expression(db: AsyncSession, zone_clock):
+    """
+    Строит SQL-условие "привычка выполняется сегодня" по маске дней недели.
+    Бит текущего дня выбирается по часовому поясу привычки через CASE,
+    поэтому день недели вычисляется один раз на пояс.
+    """
+    from app.utils.timezone_utils import DEFAULT_TIMEZONE
+    
+    result = await db.execute(select(Habit.timezone).where(Habit.is_active == True).distinct())
+    bits = {
+        habit_timezone: weekday_bit(zone_clock.weekday(habit_timezone))
+        for habit_timezone in result.scalars()
+        if habit_timezone is not None
+    }
+    default_bit = weekday_bit(zone_clock.weekday(DEFAULT_TIMEZONE))
+    
+    if bits:
+        bit = case(bits, value=Habit.timezone, else_=default_bit)
+    else:
+        bit = literal(default_bit)
+    return Habit.schedule_weekday_mask.op("&")(bit) != 0
+
+
+def _local_date(moment: Optional[datetime], habit_timezone: Optional[str]) -> Optional[date]:
+    """
+    Локальная дата момента в UTC (например, даты создания привычки).
+    """
+    from app.utils.timezone_utils import get_user_timezone
+    from datetime import timezone
+    
+    if moment is None:
+        return None
+    return moment.replace(tzinfo=timezone.utc).astimezone(get_user_timezone(habit_timezone)).date()
+
+
+def _schedule_query():
+    """
+    Запрос данных, нужных для расчета next_due_at активных привычек.
+    """
+    return (
+        select(
+            Habit.id,
+            Habit.user_id,
+            Habit.next_due_at,
+            Habit.timezone,
+            Habit.created_at,
+            Habit.schedule_weekday_mask,
+            Habit.schedule_minute,
+            Habit.custom_schedule_days,
+            Habit.custom_schedule_time,
+            Habit.custom_schedule_frequency,
+            ScheduleType.name.label("schedule_type"),
+            User.reminder_frequency,
+        )
+        .join(User, Habit.user_id == User.id)
+        .join(ScheduleType, Habit.schedule_type_id == ScheduleType.id)
+        .where(Habit.is_active == True)
+        .where(User.delivery_state == DELIVERY_OK)
+    )
+
+
+def _row_schedule(row) -> CompiledSchedule:
+    """
+    Скомпилированное расписание строки _schedule_query. Если оно еще не заполнено
+    в базе, строится из строковых полей.
+    """
+    schedule = compile_schedule(
+        row.schedule_type, row.custom_schedule_days, row.custom_schedule_time, row.custom_schedule_frequency
+    )
+    if row.schedule_weekday_mask is not None:
+        schedule = CompiledSchedule(row.schedule_weekday_mask, row.schedule_minute, schedule.frequency)
+    return schedule
+
+
+def next_due_for_row(row, after: datetime, skip_date: date = None) -> Optional[datetime]:
+    """
+    Вычисляет next_due_at для строки _schedule_query после момента after (UTC).
+    """
+    return compute_next_due_at(
+        _row_schedule(row),
+        row.timezone,
+        row.reminder_frequency,
+        after,
+        anchor=_local_date(row.created_at, row.timezone),
+        skip_date=skip_date,
+        jitter_minutes=reminder_jitter_minutes(row.user_id),
+    )
+
+
+def next_due_window_for_row(row, after: datetime) -> Optional[Tuple[datetime, datetime]]:
+    """
+    Как next_due_for_row, но возвращает еще и конец окна напоминания: (момент, конец окна).
+    """
+    return compute_next_due_window(
+        _row_schedule(row),
+        row.timezone,
+        row.reminder_frequency,
+        after,
+        anchor=_local_date(row.created_at, row.timezone),
+        jitter_minutes=reminder_jitter_minutes(row.user_id),
+    )
+
+
+async def get_due_habits(db: AsyncSession, now: datetime) -> List:
+    """
+    Возвращает активные привычки, момент напоминания которых наступил (next_due_at <= now).
+    Выборка идет диапазоном по индексу idx_habit_next_due.
+    """
+    result = await db.execute(
+        _schedule_query()
+        .where(Habit.next_due_at <= now)
+        .order_by(Habit.next_due_at)
+    )
+    return result.all()
+
+
+async def get_earliest_due_at(db: AsyncSession) -> Optional[datetime]:
+    """
+    Возвращает ближайший момент напоминания среди активных привычек (UTC) или None.
+    """
+    result = await db.execute(select(func.min(Habit.next_due_at)).where(Habit.is_active == True))
+    return result.scalar_one_or_none()
+
+
+async def set_next_due(db: AsyncSession, values: Sequence[dict]) -> int:
+    """
+    Массово записывает next_due_at. Каждый элемент: {"id", "next_due_at"}.
+    """
+    if not values:
+        return 0
+    await db.execute(update(Habit), list(values))
+    await db.commit()
+    return len(values)
+
+
+async def reschedule_habits(
+    db: AsyncSession,
+    habit_ids: Optional[Iterable] = None,
+    telegram_id: int = None,
+    after: datetime = None,
+    skip_date: date = None,
+) -> int:
+    """
+    Пересчитывает next_due_at привычек (по списку или всех привычек пользователя)
+    после создания, выполнения или изменения расписания и частоты напоминаний.
+    """
+    if after is None:
+        after = clock.utcnow()
+    
+    query = _schedule_query()
+    if habit_ids is not None:
+        query = query.where(Habit.id.in_(list(habit_ids)))
+    if telegram_id is not None:
+        query = query.where(User.telegram_id == telegram_id)
+    
+    result = await db.execute(query)
+    values = [
+        {"id": row.id, "next_due_at": next_due_for_row(row, after, skip_date)}
+        for row in result.all()
+    ]
+    return await set_next_due(db, values)
@@ -0,0 +1,229 @@
+"""
+Сервисы для работы с очередью уведомлений (outbox) в таблице Notification
+и с журналом отправленных напоминаний ReminderLedger.
+"""
+
+from typing import AsyncIterator, Iterable, List, Sequence, Set, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, update, delete, and_, or_
+from app.core import clock
+from app.models.database import Notification, ReminderLedger, User
+from datetime import date, datetime, timedelta
+
+# Максимальное число идентификаторов в одном IN (...) (ограничение SQLite на параметры)
+IDS_CHUNK_SIZE = 500
+
+
+async def enqueue_notifications(db: AsyncSession, notifications: Sequence[dict]) -> int:
+    """
+    Массово добавляет уведомления в outbox.
+    Каждый элемент: {"user_id", "habit_id", "notification_time", "message"}.
+    """
+    if not notifications:
+        return 0
+
+    rows = [{**notification, "is_sent": False} for notification in notifications]
+    await db.execute(insert(Notification), rows)
+    await db.commit()
+    return len(rows)
+
+
+def _claimable(claimed_before: datetime):
+    """
+    Условие: уведомление не занято другим диспетчером (или его захват устарел).
+    """
+    return or_(Notification.claimed_at.is_(None), Notification.claimed_at < claimed_before)
+
+
+async def claim_pending_notifications(
+    db: AsyncSession, now: datetime, limit: int, not_before: datetime = None, claim_timeout: int = 300
+) -> List[Tuple]:
+    """
+    Захватывает пачку неотправленных уведомлений, время которых наступило.
+    Использует индекс (is_sent, notification_time).
+    Выбранные строки отмечаются claimed_at и фиксируются до отправки, поэтому блокировки
+    строк не держатся, пока идет доставка. Уведомления, захваченные раньше чем
+    claim_timeout секунд назад и так и не отправленные (диспетчер упал), захватываются снова.
+    Возвращает список кортежей (id уведомления, telegram_id, текст).
+    """
+    claimed_before = now - timedelta(seconds=claim_timeout)
+    conditions = [
+        Notification.is_sent == False,
+        Notification.expired_at.is_(None),
+        Notification.notification_time <= now,
+        _claimable(claimed_before),
+    ]
+    if not_before is not None:
+        conditions.append(Notification.notification_time >= not_before)
+
+    result = await db.execute(
+        select(Notification.id, User.telegram_id, Notification.message)
+        .join(User, Notification.user_id == User.id)
+        .where(and_(*conditions))
+        .order_by(Notification.notification_time)
+        .limit(limit)
+        .with_for_update(of=Notification, skip_locked=True)  # Для PostgreSQL; SQLite игнорирует
+    )
+    rows = result.all()
+    if not rows:
+        await db.commit()
+        return []
+
+    # Условие захвата проверяется повторно: без блокировок строк (SQLite) ту же строку
+    # мог успеть захватить другой процесс
+    claimed = set()
+    ids = [row[0] for row in rows]
+    for start in range(0, len(ids), IDS_CHUNK_SIZE):
+        chunk = ids[start:start + IDS_CHUNK_SIZE]
+        result = await db.execute(
+            update(Notification)
+            .where(Notification.id.in_(chunk))
+            .where(Notification.is_sent == False)
+            .where(_claimable(claimed_before))
+            .values(claimed_at=now)
+            .returning(Notification.id)
+        )
+        claimed.update(result.scalars())
+    await db.commit()
+    return [row for row in rows if row[0] in claimed]
+
+
+async def mark_notifications_sent(db: AsyncSession, notification_ids: Iterable) -> int:
+    """
+    Массово отмечает уведомления как отправленные.
+    """
+    notification_ids = list(notification_ids)
+    for start in range(0, len(notification_ids), IDS_CHUNK_SIZE):
+        chunk = notification_ids[start:start + IDS_CHUNK_SIZE]
+        await db.execute(
+            update(Notification)
+            .where(Notification.id.in_(chunk))
+            .values(is_sent=True)
+        )
+    await db.commit()
+    return len(notification_ids)
+
+
+async def release_notifications(db: AsyncSession, notification_ids: Iterable) -> int:
+    """
+    Снимает захват с неотправленных уведомлений, чтобы следующий запуск диспетчера
+    отправил их снова, не дожидаясь истечения захвата.
+    """
+    notification_ids = list(notification_ids)
+    for start in range(0, len(notification_ids), IDS_CHUNK_SIZE):
+        chunk = notification_ids[start:start + IDS_CHUNK_SIZE]
+        await db.execute(
+            update(Notification)
+            .where(Notification.id.in_(chunk))
+            .where(Notification.is_sent == False)
+            .values(claimed_at=None)
+        )
+    await db.commit()
+    return len(notification_ids)
+
+
+async def expire_stale_notifications(
+    db: AsyncSession, older_than: datetime, now: datetime = None, claim_timeout: int = 300
+) -> int:
+    """
+    Отмечает устаревшими (expired_at) неотправленные уведомления старше указанного времени,
+    чтобы после долгого простоя не рассылать устаревшие напоминания. is_sent остается False:
+    такие уведомления не считаются отправленными. Уведомления, которые сейчас отправляет
+    диспетчер (захват не истек), не трогаются.
+    """
+    now = now or clock.utcnow()
+    result = await db.execute(
+        update(Notification)
+        .where(Notification.is_sent == False)
+        .where(Notification.expired_at.is_(None))
+        .where(Notification.notification_time < older_than)
+        .where(_claimable(now - timedelta(seconds=claim_timeout)))
+        .values(expired_at=now)
+    )
+    await db.commit()
+    return result.rowcount or 0
+
+
+# Ключ записи журнала: (user_id, habit_id, local_date, slot)
+LedgerKey = Tuple
+
+
+async def get_sent_reminder_keys(db: AsyncSession, keys: Sequence[LedgerKey]) -> Set[LedgerKey]:
+    """
+    Возвращает те из ключей, которые уже есть в журнале отправленных напоминаний.
+    """
+    keys = list(keys)
+    found = set()
+    for start in range(0, len(keys), IDS_CHUNK_SIZE):
+        chunk = keys[start:start + IDS_CHUNK_SIZE]
+        wanted = set(chunk)
+        result = await db.execute(
+            select(ReminderLedger.user_id, ReminderLedger.habit_id, ReminderLedger.local_date, ReminderLedger.slot)
+            .where(ReminderLedger.habit_id.in_({key[1] for key in chunk}))
+            .where(ReminderLedger.local_date.in_({key[2] for key in chunk}))
+        )
+        found.update(tuple(row) for row in result.all() if tuple(row) in wanted)
+    return found
+
+
+async def stream_sent_reminder_keys(db: AsyncSession, local_date: date) -> AsyncIterator[LedgerKey]:
+    """
+    Потоково возвращает ключи журнала за локальную дату.
+    """
+    result = await db.stream(
+        select(ReminderLedger.user_id, ReminderLedger.habit_id, ReminderLedger.local_date, ReminderLedger.slot)
+        .where(ReminderLedger.local_date == local_date)
+        .execution_options(yield_per=1000)
+    )
+    async for row in result:
+        yield tuple(row)
+
+
+async def record_sent_reminders(
+    db: AsyncSession, keys: Sequence[LedgerKey], sent_at: datetime = None
+) -> List[LedgerKey]:
+    """
+    Массово записывает напоминания в журнал и возвращает ключи действительно добавленных записей.
+    Уже существующие записи пропускаются: если тот же ключ одновременно записал другой
+    процесс, он достается только одному из них (INSERT ... ON CONFLICT DO NOTHING RETURNING,
+    SQLite 3.35+ и PostgreSQL).
+    """
+    if not keys:
+        return []
+    if sent_at is None:
+        sent_at = clock.utcnow()
+
+    rows = [
+        {"user_id": user_id, "habit_id": habit_id, "local_date": local_date, "slot": slot, "sent_at": sent_at}
+        for user_id, habit_id, local_date, slot in keys
+    ]
+    result = await db.execute(
+        _insert_ignore(db, ReminderLedger).returning(
+            ReminderLedger.user_id, ReminderLedger.habit_id, ReminderLedger.local_date, ReminderLedger.slot
+        ),
+        rows,
+    )
+    inserted = {tuple(row) for row in result.all()}
+    await db.commit()
+    return [key for key in keys if key in inserted]
+
+
+async def purge_sent_reminders(db: AsyncSession, before: date) -> int:
+    """
+    Удаляет записи журнала с локальной датой раньше указанной.
+    """
+    result = await db.execute(delete(ReminderLedger).where(ReminderLedger.local_date < before))
+    await db.commit()
+    return result.rowcount or 0
+
+
+def _insert_ignore(db: AsyncSession, model):
+    """
+    INSERT, пропускающий строки с уже существующим первичным ключом (SQLite и PostgreSQL).
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert(model).on_conflict_do_nothing()
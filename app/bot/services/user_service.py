@@ -2,10 +2,10 @@
 Сервисы для работы с пользователями.
 """
 
-from typing import Optional, List, Tuple
+from typing import Dict, Optional, List, Set, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc
-from app.models.database import User
+from sqlalchemy import select, desc, update
+from app.models.database import User, Habit, DELIVERY_OK
 from datetime import datetime
 import logging
 
@@ -166,4 +166,55 @@ async def update_user_reminder_frequency(db: AsyncSession, telegram_id: int, fre
     except Exception as e:
         logger.error(f"Ошибка при обновлении частоты напоминаний для пользователя {telegram_id}: {e}")
         await db.rollback()
-        return False
\ No newline at end of file
+        return False
+
+
+async def mark_users_undeliverable(db: AsyncSession, states: Dict[int, str]) -> List:
+    """
+    Записывает пользователям состояние доставки (заблокировал бота, чат не найден)
+    и снимает их привычки с расписания напоминаний (next_due_at = NULL).
+    states: {telegram_id: delivery_state}. Возвращает id обновленных пользователей.
+    """
+    if not states:
+        return []
+    
+    result = await db.execute(
+        select(User.id, User.telegram_id)
+        .where(User.telegram_id.in_(list(states)))
+        .where(User.delivery_state == DELIVERY_OK)
+    )
+    rows = result.all()
+    if not rows:
+        return []
+    
+    await db.execute(
+        update(User),
+        [{"id": user_id, "delivery_state": states[telegram_id]} for user_id, telegram_id in rows],
+    )
+    user_ids = [user_id for user_id, _ in rows]
+    await db.execute(update(Habit).where(Habit.user_id.in_(user_ids)).values(next_due_at=None))
+    await db.commit()
+    return user_ids
+
+
+async def restore_user_delivery(db: AsyncSession, telegram_id: int) -> bool:
+    """
+    Возвращает пользователю состояние доставки DELIVERY_OK (после его нового сообщения боту).
+    Возвращает True, если состояние было изменено.
+    """
+    result = await db.execute(
+        update(User)
+        .where(User.telegram_id == telegram_id)
+        .where(User.delivery_state != DELIVERY_OK)
+        .values(delivery_state=DELIVERY_OK)
+    )
+    await db.commit()
+    return result.rowcount > 0
+
+
+async def get_undeliverable_telegram_ids(db: AsyncSession) -> Set[int]:
+    """
+    Возвращает telegram_id пользователей, которым сообщения не доставляются.
+    """
+    result = await db.execute(select(User.telegram_id).where(User.delivery_state != DELIVERY_OK))
+    return set(result.scalars().all())
@@ -0,0 +1,85 @@
+"""
+Догоняющий режим планировщика напоминаний.
+Время последней завершенной проверки хранится в базе данных, чтобы после простоя
+или задержки цикла событий можно было найти пропущенные минуты.
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from app.models.database import SchedulerCheckpoint
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Политики обработки пропущенных напоминаний
+CATCHUP_ALL = "all"  # Отправить напоминания за каждую пропущенную минуту
+CATCHUP_LATEST = "latest"  # Свернуть пропущенное в одно напоминание вместе с текущей проверкой
+CATCHUP_SKIP = "skip"  # Не отправлять пропущенные напоминания
+CATCHUP_POLICIES = (CATCHUP_ALL, CATCHUP_LATEST, CATCHUP_SKIP)
+
+# Проход рассылки: (минута, которую он представляет; {user_id: set(habit_id)})
+ReminderPass = Tuple[datetime, Dict]
+
+
+async def load_last_tick(db: AsyncSession, name: str) -> Optional[datetime]:
+    """
+    Возвращает время последней завершенной проверки (UTC, без tzinfo) или None.
+    """
+    result = await db.execute(select(SchedulerCheckpoint.last_tick_at).where(SchedulerCheckpoint.name == name))
+    return result.scalar_one_or_none()
+
+
+async def save_last_tick(db: AsyncSession, name: str, tick: datetime):
+    """
+    Сохраняет время завершенной проверки (UTC, без tzinfo).
+    """
+    result = await db.execute(
+        update(SchedulerCheckpoint)
+        .where(SchedulerCheckpoint.name == name)
+        .values(last_tick_at=tick)
+    )
+    if result.rowcount == 0:
+        db.add(SchedulerCheckpoint(name=name, last_tick_at=tick))
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+
+
+def missed_range(last_tick: Optional[datetime], tick: datetime, max_minutes: int) -> Optional[Tuple[datetime, datetime]]:
+    """
+    Возвращает полуинтервал [начало, конец) пропущенных минут между последней
+    завершенной проверкой и текущей, не длиннее max_minutes, или None.
+    """
+    if last_tick is None:
+        return None
+    start = max(last_tick + timedelta(minutes=1), tick - timedelta(minutes=max_minutes))
+    if start >= tick:
+        return None
+    return start, tick
+
+
+def apply_policy(policy: str, current: ReminderPass, missed: List[ReminderPass]) -> List[ReminderPass]:
+    """
+    Объединяет текущий проход с пропущенными по политике догоняющего режима.
+    """
+    missed = [(moment, due) for moment, due in missed if due]
+    if not missed or policy == CATCHUP_SKIP:
+        return [current]
+
+    total = sum(len(habits) for _, due in missed for habits in due.values())
+    logger.warning(f"Найдено {total} пропущенных напоминаний за {len(missed)} мин., политика '{policy}'.")
+
+    if policy == CATCHUP_ALL:
+        return missed + [current]
+
+    # CATCHUP_LATEST: одно напоминание на пользователя в текущую минуту
+    moment, due = current
+    merged = {user_id: set(habits) for user_id, habits in due.items()}
+    for _, missed_due in missed:
+        for user_id, habits in missed_due.items():
+            merged.setdefault(user_id, set()).update(habits)
+    return [(moment, merged)]
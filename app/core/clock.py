@@ -0,0 +1,80 @@
+"""
+Источник текущего времени для планировщика напоминаний.
+По умолчанию - системные часы; для симуляции подставляются виртуальные часы
+(set_clock), чтобы прогнать сутки напоминаний быстрее реального времени.
+"""
+
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from typing import Optional
+
+
+class SystemClock:
+    """
+    Системные часы.
+    """
+
+    def now(self, tz: Optional[tzinfo] = None) -> datetime:
+        return datetime.now(tz)
+
+
+class VirtualClock:
+    """
+    Виртуальные часы: время меняется только через set() и advance().
+    """
+
+    def __init__(self, start: datetime):
+        self._now = self._as_utc(start)
+
+    @staticmethod
+    def _as_utc(moment: datetime) -> datetime:
+        if moment.tzinfo is None:
+            return moment.replace(tzinfo=timezone.utc)
+        return moment.astimezone(timezone.utc)
+
+    def now(self, tz: Optional[tzinfo] = None) -> datetime:
+        if tz is None:
+            # Как datetime.now(): локальное время сервера без tzinfo
+            return self._now.astimezone().replace(tzinfo=None)
+        return self._now.astimezone(tz)
+
+    def set(self, moment: datetime):
+        self._now = self._as_utc(moment)
+
+    def advance(self, delta: timedelta):
+        self._now += delta
+
+
+_clock = SystemClock()
+
+
+def get_clock():
+    return _clock
+
+
+def set_clock(clock):
+    """
+    Подменяет источник времени (None - вернуть системные часы).
+    """
+    global _clock
+    _clock = clock if clock is not None else SystemClock()
+
+
+def now(tz: Optional[tzinfo] = None) -> datetime:
+    """
+    Текущее время, как datetime.now(tz).
+    """
+    return _clock.now(tz)
+
+
+def utcnow() -> datetime:
+    """
+    Текущее время UTC без tzinfo, как datetime.utcnow().
+    """
+    return _clock.now(timezone.utc).replace(tzinfo=None)
+
+
+def today() -> date:
+    """
+    Текущая дата сервера, как date.today().
+    """
+    return _clock.now().date()
@@ -0,0 +1,97 @@
+"""
+Объединение напоминаний пользователя перед доставкой.
+Привычки, которым пора напомнить, накапливаются в течение окна, после чего
+пользователь получает одно сообщение со всеми привычками вместо нескольких.
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ReminderCoalescer:
+    """
+    Буфер напоминаний по пользователям.
+
+    Окно пользователя открывается первым напоминанием и закрывается через window
+    секунд; напоминания, пришедшие за это время, добавляются в то же сообщение.
+    Закрытые окна передаются в flush одной пачкой: [{'user': ..., 'uncompleted_habits': [...]}].
+    """
+
+    def __init__(self, window: float, flush: Callable[[List[Dict]], Awaitable[None]]):
+        self.window = window
+        self._flush = flush
+        self._pending: Dict = {}  # user_id -> {'user': ..., 'habits': {habit_id: habit}}
+        self._deadlines: Dict = {}  # user_id -> time.monotonic() закрытия окна
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"buffered": 0, "messages": 0}
+
+    @property
+    def pending_users(self) -> int:
+        return len(self._pending)
+
+    async def start(self):
+        """
+        Запускает фоновую отправку закрытых окон.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="reminder-coalescer")
+
+    async def stop(self):
+        """
+        Останавливает фоновую задачу и отправляет все накопленные напоминания.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self._flush_users(list(self._pending))
+
+    def add(self, user_data: Dict):
+        """
+        Добавляет напоминание пользователя в его окно.
+        """
+        user = user_data['user']
+        entry = self._pending.get(user.id)
+        if entry is None:
+            entry = self._pending[user.id] = {'user': user, 'habits': {}}
+            self._deadlines[user.id] = time.monotonic() + self.window
+            self._wakeup.set()
+        for habit in user_data['uncompleted_habits']:
+            entry['habits'].setdefault(habit.id, habit)
+            self.stats["buffered"] += 1
+
+    async def _run(self):
+        while True:
+            now = time.monotonic()
+            closed = [user_id for user_id, deadline in self._deadlines.items() if deadline <= now]
+            if closed:
+                await self._flush_users(closed)
+                continue
+
+            self._wakeup.clear()
+            timeout = min(self._deadlines.values()) - now if self._deadlines else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _flush_users(self, user_ids: List):
+        batch = []
+        for user_id in user_ids:
+            entry = self._pending.pop(user_id, None)
+            self._deadlines.pop(user_id, None)
+            if entry is not None:
+                batch.append({'user': entry['user'], 'uncompleted_habits': list(entry['habits'].values())})
+        if not batch:
+            return
+
+        self.stats["messages"] += len(batch)
+        try:
+            await self._flush(batch)
+        except Exception as e:
+            logger.error(f"Ошибка при отправке объединенных напоминаний: {e}")
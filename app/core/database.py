@@ -1,23 +1,143 @@
 """
-Модуль для настройки подключения к базе данных с использованием SQLAlchemy и aiosqlite.
+Модуль для настройки подключения к базе данных с использованием SQLAlchemy
+(SQLite через aiosqlite или PostgreSQL через asyncpg).
 """
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from typing import Optional, Union
+from sqlalchemy import event
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
 from sqlalchemy.pool import StaticPool
 from .config import settings
 
-# Создаем асинхронный движок
-# Для SQLite используем aiosqlite
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    # Параметры для SQLite
-    connect_args={
-        "check_same_thread": False,  # Необходимо для SQLite
-    },
-    # Пул подключений
-    poolclass=StaticPool,  # Используем StaticPool для SQLite в тестовых целях
-    echo=False,  # Установите True для логирования SQL-запросов
-)
+# Профили движка SQLite (DATABASE_PROFILE)
+PROFILE_STATIC = "static"  # Одно общее подключение (StaticPool), без настройки PRAGMA
+PROFILE_PRODUCTION = "production"  # Пул подключений, WAL и PRAGMA из настроек
+DATABASE_PROFILES = (PROFILE_STATIC, PROFILE_PRODUCTION)
+
+# Асинхронный драйвер PostgreSQL по умолчанию
+POSTGRES_ASYNC_DRIVER = "postgresql+asyncpg"
+# Справочники, которые должны быть в новой базе (как в create_database.py)
+REFERENCE_DATA = {
+    "ScheduleType": ("daily", "weekly", "custom"),
+    "RewardType": ("badge", "level", "challenge"),
+    "FriendStatus": ("pending", "accepted", "rejected"),
+}
+
+
+def normalize_database_url(url: Union[str, URL]) -> URL:
+    """
+    Приводит URL PostgreSQL без асинхронного драйвера (postgres://, postgresql://,
+    postgresql+psycopg2://) к postgresql+asyncpg://. Остальные URL не меняются.
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "postgres" or parsed.drivername in ("postgresql", "postgresql+psycopg2"):
+        return parsed.set(drivername=POSTGRES_ASYNC_DRIVER)
+    return parsed
+
+
+def sqlite_pragmas() -> dict:
+    """
+    PRAGMA, которые профиль production выполняет на каждом новом подключении SQLite.
+    """
+    return {
+        "journal_mode": settings.SQLITE_JOURNAL_MODE,
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "cache_size": settings.SQLITE_CACHE_SIZE,
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+        "foreign_keys": "ON" if settings.SQLITE_FOREIGN_KEYS else "OFF",
+        "temp_store": "MEMORY",
+    }
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    # journal_mode=WAL сохраняется в файле базы, остальные PRAGMA действуют на подключение
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in sqlite_pragmas().items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def _create_postgres_engine(url: URL) -> AsyncEngine:
+    """
+    Движок PostgreSQL: пул подключений с переиспользованием (pool_recycle) и проверкой
+    перед выдачей (pool_pre_ping), кэш подготовленных запросов asyncpg на подключение.
+    """
+    connect_args = {"command_timeout": settings.DATABASE_COMMAND_TIMEOUT}
+    if url.get_driver_name() == "asyncpg":
+        # prepared_statement_cache_size - кэш диалекта SQLAlchemy, statement_cache_size - самого asyncpg.
+        # За PgBouncer в режиме transaction оба должны быть 0
+        connect_args["prepared_statement_cache_size"] = settings.DATABASE_STATEMENT_CACHE_SIZE
+        connect_args["statement_cache_size"] = settings.DATABASE_STATEMENT_CACHE_SIZE
+        connect_args["server_settings"] = {"application_name": settings.DATABASE_APPLICATION_NAME}
+    else:
+        connect_args = {}
+
+    return create_async_engine(
+        url,
+        connect_args=connect_args,
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+        pool_recycle=settings.DATABASE_POOL_RECYCLE,
+        pool_pre_ping=settings.DATABASE_POOL_PRE_PING,
+        echo=False,
+    )
+
+
+def create_database_engine(url: Optional[str] = None, profile: Optional[str] = None) -> AsyncEngine:
+    """
+    Создает асинхронный движок для url (по умолчанию DATABASE_URL) с профилем
+    profile (по умолчанию DATABASE_PROFILE).
+
+    Для SQLite профиль static оставляет одно общее подключение (StaticPool), как раньше;
+    production открывает пул подключений и настраивает каждое через событие connect
+    (WAL, synchronous, cache_size, mmap_size, busy_timeout, foreign_keys).
+    База в памяти всегда использует StaticPool: у каждого подключения была бы своя база.
+
+    PostgreSQL подключается через asyncpg (postgres:// и postgresql:// приводятся к нему)
+    с пулом из DATABASE_POOL_*; профиль на него не влияет.
+    """
+    profile = (profile or settings.DATABASE_PROFILE).lower()
+    if profile not in DATABASE_PROFILES:
+        raise ValueError(f"Неизвестный профиль базы данных '{profile}', допустимы: {', '.join(DATABASE_PROFILES)}")
+
+    parsed = normalize_database_url(url or settings.DATABASE_URL)
+    if parsed.get_backend_name() == "postgresql":
+        return _create_postgres_engine(parsed)
+    if parsed.get_backend_name() != "sqlite":
+        return create_async_engine(parsed, echo=False)
+    url = parsed
+
+    in_memory = parsed.database in (None, "", ":memory:") or parsed.query.get("mode") == "memory"
+    if profile == PROFILE_STATIC or in_memory:
+        return create_async_engine(
+            url,
+            connect_args={"check_same_thread": False},  # Необходимо для SQLite
+            poolclass=StaticPool,  # Все сессии используют одно подключение
+            echo=False,  # Установите True для логирования SQL-запросов
+        )
+
+    engine = create_async_engine(
+        url,
+        connect_args={
+            "check_same_thread": False,
+            "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+        },
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+        echo=False,
+    )
+    event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas)
+    return engine
+
+
+# Создаем асинхронный движок по настройкам
+engine = create_database_engine()
 
 # Создаем асинхронный сессионный фабрику с использованием async_sessionmaker
 AsyncSessionLocal = async_sessionmaker(
@@ -35,3 +155,23 @@ async def get_db_session():
             yield session
         finally:
             await session.close()
+
+
+async def create_schema(target_engine: Optional[AsyncEngine] = None):
+    """
+    Создает таблицы и индексы по моделям и заполняет справочники, если их еще нет.
+    Используется для PostgreSQL; файл SQLite создает create_database.py.
+    """
+    import uuid
+    from sqlalchemy import select
+    from app.models.database import Base
+
+    target_engine = target_engine or engine
+    async with target_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        for table_name, names in REFERENCE_DATA.items():
+            table = Base.metadata.tables[table_name]
+            existing = set((await conn.execute(select(table.c.name))).scalars())
+            missing = [{"id": uuid.uuid4(), "name": name} for name in names if name not in existing]
+            if missing:
+                await conn.execute(table.insert(), missing)
@@ -0,0 +1,213 @@
+"""
+Конвейер доставки напоминаний.
+Сообщения ставятся в ограниченную очередь и отправляются пулом воркеров
+с соблюдением лимитов Telegram Bot API.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Optional
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter
+from app.core.config import settings
+from app.core.rate_limit import TokenBucket, ChatRateLimiter, retry_after_seconds
+from app.core.outbound import PRIORITY_REMINDER, get_outbound_limiter
+from app.models.database import DELIVERY_BLOCKED, DELIVERY_CHAT_NOT_FOUND
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OutgoingMessage:
+    """
+    Сообщение, ожидающее отправки.
+    """
+
+    chat_id: int
+    text: str
+    attempts: int = 0
+    # Результат доставки: True - сообщение обработано (отправлено или отклонено Telegram),
+    # False - не отправлено и может быть повторено позже
+    result: Optional[asyncio.Future] = None
+
+    def resolve(self, processed: bool):
+        if self.result is not None and not self.result.done():
+            self.result.set_result(processed)
+
+
+class ReminderDeliveryPipeline:
+    """
+    Пул воркеров для отправки напоминаний.
+
+    Общий лимит задается корзиной токенов (по умолчанию 30 сообщений в секунду),
+    для каждого чата - не чаще одного сообщения в секунду. Если у бота подключена
+    приоритетная очередь (PriorityRateLimiter), общий лимит соблюдает она, а напоминания
+    отправляются в ней с приоритетом PRIORITY_REMINDER. При RetryAfter
+    все воркеры приостанавливаются на указанное Telegram время, а сообщение
+    возвращается в очередь.
+
+    Лимит Telegram общий для всех процессов бота, поэтому при шардировании собственная
+    корзина конвейера получает долю общего лимита по числу живых шардов (set_shard_count).
+    """
+
+    def __init__(
+        self,
+        bot,
+        workers: int = None,
+        global_rate: float = None,
+        per_chat_interval: float = None,
+        queue_size: int = None,
+        max_retries: int = None,
+    ):
+        self.bot = bot
+        self.workers = workers or settings.REMINDER_DELIVERY_WORKERS
+        self.max_retries = max_retries if max_retries is not None else settings.REMINDER_MAX_RETRIES
+        self.global_rate = global_rate or settings.TELEGRAM_GLOBAL_RATE_LIMIT
+        self.global_limiter = TokenBucket(self.global_rate)
+        # Общий регулятор бота: собственная корзина конвейера не используется
+        self.outbound = get_outbound_limiter(bot)
+        self._send_kwargs = {"rate_limit_args": PRIORITY_REMINDER} if self.outbound is not None else {}
+        self.chat_limiter = ChatRateLimiter(
+            per_chat_interval if per_chat_interval is not None else settings.TELEGRAM_PER_CHAT_INTERVAL
+        )
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size or settings.REMINDER_QUEUE_SIZE)
+        self._tasks = []
+        self._paused_until = 0.0
+        self.stats = {"sent": 0, "failed": 0, "retried": 0, "dropped": 0, "undeliverable": 0}
+        # Чаты, в которые сообщение не может быть доставлено: {chat_id: delivery_state}.
+        # Забираются планировщиком через pop_undeliverable() и записываются в базу
+        self._undeliverable = {}
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self):
+        """
+        Запускает воркеры.
+        """
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"reminder-delivery-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"Конвейер доставки напоминаний запущен ({self.workers} воркеров).")
+
+    async def stop(self, drain: bool = False):
+        """
+        Останавливает воркеры. При drain=True сначала дожидается опустошения очереди.
+        """
+        if drain:
+            await self.queue.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Неотправленные сообщения остаются неподтвержденными
+        while not self.queue.empty():
+            self.queue.get_nowait().resolve(False)
+            self.queue.task_done()
+        logger.info("Конвейер доставки напоминаний остановлен.")
+
+    def set_shard_count(self, shard_count: int):
+        """
+        Делит общий лимит отправки между shard_count процессами: каждый отправляет
+        не больше global_rate / shard_count сообщений в секунду.
+        """
+        rate = self.global_rate / max(shard_count, 1)
+        if rate != self.global_limiter.rate:
+            self.global_limiter.set_rate(rate)
+            logger.info(f"Лимит отправки напоминаний: {rate:g} сообщений в секунду ({shard_count} шардов).")
+
+    def submit(self, chat_id: int, text: str, result: Optional[asyncio.Future] = None) -> bool:
+        """
+        Ставит сообщение в очередь без ожидания.
+        Возвращает False, если очередь переполнена и сообщение отброшено.
+        Если передан result, в него будет записан итог доставки.
+        """
+        message = OutgoingMessage(chat_id=chat_id, text=text, result=result)
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            logger.warning(f"Очередь доставки переполнена, напоминание для {chat_id} отброшено.")
+            message.resolve(False)
+            return False
+
+    async def _worker(self):
+        while True:
+            message = await self.queue.get()
+            try:
+                await self._deliver(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["failed"] += 1
+                logger.error(f"Ошибка при отправке напоминания пользователю {message.chat_id}: {e}")
+                message.resolve(True)
+            finally:
+                self.queue.task_done()
+
+    async def _wait_for_pause(self):
+        delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _deliver(self, message: OutgoingMessage):
+        await self._wait_for_pause()
+        await self.chat_limiter.wait(message.chat_id)
+        if self.outbound is None:
+            await self.global_limiter.acquire()
+
+        try:
+            await self.bot.send_message(chat_id=message.chat_id, text=message.text, **self._send_kwargs)
+            self.stats["sent"] += 1
+            logger.info(f"Напоминание отправлено пользователю {message.chat_id}")
+            message.resolve(True)
+        except RetryAfter as e:
+            delay = retry_after_seconds(e.retry_after)
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            logger.warning(f"Превышен лимит Telegram, пауза {delay:.0f} с.")
+            self._retry(message)
+        except Forbidden:
+            self._mark_undeliverable(message, DELIVERY_BLOCKED)
+        except BadRequest as e:
+            # BadRequest наследуется от NetworkError, но повтор не поможет
+            if "chat not found" in str(e).lower():
+                self._mark_undeliverable(message, DELIVERY_CHAT_NOT_FOUND)
+                return
+            raise
+        except NetworkError as e:
+            logger.warning(f"Сетевая ошибка при отправке напоминания пользователю {message.chat_id}: {e}")
+            self._retry(message)
+
+    def _mark_undeliverable(self, message: OutgoingMessage, state: str):
+        self._undeliverable[message.chat_id] = state
+        self.stats["undeliverable"] += 1
+        logger.info(f"Сообщение пользователю {message.chat_id} не доставлено ({state}).")
+        message.resolve(True)
+
+    def pop_undeliverable(self) -> dict:
+        """
+        Возвращает и очищает накопленные недоставляемые чаты.
+        """
+        undeliverable, self._undeliverable = self._undeliverable, {}
+        return undeliverable
+
+    def _retry(self, message: OutgoingMessage):
+        message.attempts += 1
+        if message.attempts > self.max_retries:
+            self.stats["failed"] += 1
+            logger.error(f"Напоминание пользователю {message.chat_id} не отправлено после {self.max_retries} попыток.")
+            message.resolve(False)
+            return
+        self.stats["retried"] += 1
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            logger.warning(f"Очередь доставки переполнена, повтор для {message.chat_id} отброшен.")
+            message.resolve(False)
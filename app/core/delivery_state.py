@@ -0,0 +1,49 @@
+"""
+Пользователи, которым сообщения не доставляются (заблокировали бота или чат не найден).
+Набор в памяти позволяет обработчику входящих обновлений без запроса к базе
+понять, что пользователя нужно снова включить в напоминания.
+"""
+
+import time
+from typing import Iterable, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class UndeliverableChats:
+    """
+    Кэш telegram_id пользователей с delivery_state != ok.
+    Периодически перечитывается из базы, чтобы видеть состояния, записанные
+    планировщиком в отдельном процессе.
+    """
+
+    # Интервал перечитывания из базы, секунд
+    REFRESH_INTERVAL = 300
+
+    def __init__(self):
+        self.chats = set()
+        self._loaded_at: Optional[float] = None
+
+    def __contains__(self, telegram_id: int) -> bool:
+        return telegram_id in self.chats
+
+    @property
+    def needs_refresh(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.REFRESH_INTERVAL
+
+    async def refresh(self, db: AsyncSession):
+        from app.bot.services.user_service import get_undeliverable_telegram_ids
+
+        self.chats = await get_undeliverable_telegram_ids(db)
+        self._loaded_at = time.monotonic()
+
+    def add(self, telegram_ids: Iterable[int]):
+        self.chats.update(telegram_ids)
+
+    def discard(self, telegram_id: int):
+        self.chats.discard(telegram_id)
+
+
+undeliverable_chats = UndeliverableChats()
@@ -0,0 +1,92 @@
+"""
+Выбор ведущего экземпляра планировщика через аренду (lease) в базе данных.
+"""
+
+import time
+from datetime import timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import update, or_
+from sqlalchemy.exc import IntegrityError
+from app.core import clock
+from app.models.database import SchedulerLease
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderLease:
+    """
+    Аренда строки SchedulerLease.
+
+    Экземпляр становится ведущим, если ему удалось атомарно записать себя в строку
+    аренды, срок которой истек (или которая уже принадлежит ему). Ведущий продлевает
+    аренду каждые несколько секунд; если он перестает это делать, другой экземпляр
+    забирает аренду после истечения ttl.
+    """
+
+    def __init__(self, name: str, holder: str, ttl: int):
+        self.name = name
+        self.holder = holder
+        self.ttl = ttl
+        self._acquired = False
+        self._valid_until = 0.0
+
+    @property
+    def is_leader(self) -> bool:
+        """
+        True, пока аренда получена и ее срок не истек по локальным часам
+        (даже если очередное продление задерживается).
+        """
+        return self._acquired and time.monotonic() < self._valid_until
+
+    async def acquire_or_renew(self, db: AsyncSession) -> bool:
+        """
+        Пытается получить или продлить аренду. Возвращает True, если экземпляр ведущий.
+        """
+        started = time.monotonic()
+        now = clock.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl)
+
+        result = await db.execute(
+            update(SchedulerLease)
+            .where(SchedulerLease.name == self.name)
+            .where(or_(SchedulerLease.holder == self.holder, SchedulerLease.expires_at < now))
+            .values(holder=self.holder, expires_at=expires_at, heartbeat_at=now)
+        )
+        acquired = result.rowcount == 1
+        await db.commit()
+
+        if not acquired:
+            # Строки аренды еще нет - пробуем создать ее
+            db.add(SchedulerLease(name=self.name, holder=self.holder, expires_at=expires_at, heartbeat_at=now))
+            try:
+                await db.commit()
+                acquired = True
+            except IntegrityError:
+                await db.rollback()
+
+        if acquired != self._acquired:
+            if acquired:
+                logger.info(f"Экземпляр {self.holder} стал ведущим ({self.name}).")
+            else:
+                logger.warning(f"Экземпляр {self.holder} потерял статус ведущего ({self.name}).")
+        self._acquired = acquired
+        if acquired:
+            self._valid_until = started + self.ttl
+        return acquired
+
+    async def release(self, db: AsyncSession):
+        """
+        Освобождает аренду, чтобы другой экземпляр мог забрать ее без ожидания ttl.
+        """
+        if not self._acquired:
+            return
+        await db.execute(
+            update(SchedulerLease)
+            .where(SchedulerLease.name == self.name)
+            .where(SchedulerLease.holder == self.holder)
+            .values(expires_at=clock.utcnow())
+        )
+        await db.commit()
+        self._acquired = False
+        logger.info(f"Экземпляр {self.holder} освободил аренду ({self.name}).")
@@ -0,0 +1,161 @@
+"""
+Общая приоритетная очередь исходящих запросов к Telegram Bot API.
+Подключается к приложению как rate limiter (ApplicationBuilder().rate_limiter),
+поэтому через нее проходят и ответы обработчиков, и напоминания планировщика.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Tuple
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+from app.core.config import settings
+from app.core.rate_limit import TokenBucket, retry_after_seconds
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Классы приоритета (меньше - важнее). Передаются в методы бота через rate_limit_args
+PRIORITY_INTERACTIVE = 0  # Ответы на действия пользователя (по умолчанию)
+PRIORITY_REMINDER = 1  # Напоминания
+PRIORITY_BROADCAST = 2  # Массовые рассылки
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_REMINDER: "reminder",
+    PRIORITY_BROADCAST: "broadcast",
+}
+
+
+class PriorityRateLimiter(BaseRateLimiter[int]):
+    """
+    Единый регулятор частоты запросов бота с очередью по приоритетам.
+
+    Запросы ждут в куче (приоритет, порядок поступления); токены общей корзины
+    (TELEGRAM_GLOBAL_RATE_LIMIT в секунду) выдаются самому важному из ожидающих,
+    поэтому ответ на нажатие кнопки обгоняет накопившиеся напоминания.
+    При RetryAfter выдача токенов приостанавливается для всех запросов.
+    """
+
+    def __init__(self, rate: float = None, interactive_retries: int = 1):
+        self.bucket = TokenBucket(rate or settings.TELEGRAM_GLOBAL_RATE_LIMIT)
+        self.interactive_retries = interactive_retries
+        self._heap: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._paused_until = 0.0
+        self.stats = {
+            "granted": {name: 0 for name in PRIORITY_NAMES.values()},
+            "wait_seconds": {name: 0.0 for name in PRIORITY_NAMES.values()},
+            "retry_after": 0,
+            "max_depth": 0,
+        }
+
+    async def initialize(self) -> None:
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._dispatch(), name="outbound-rate-limiter")
+
+    async def shutdown(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for _, _, future in self._heap:
+            if not future.done():
+                future.cancel()
+        self._heap = []
+
+    def depth(self) -> Dict[str, int]:
+        """
+        Число ожидающих запросов по классам приоритета.
+        """
+        depth = {name: 0 for name in PRIORITY_NAMES.values()}
+        for priority, _, future in self._heap:
+            if not future.done():
+                depth[PRIORITY_NAMES[priority]] += 1
+        return depth
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Метрики очереди: глубина, выданные токены и среднее ожидание по классам.
+        """
+        granted = self.stats["granted"]
+        return {
+            "depth": self.depth(),
+            "max_depth": self.stats["max_depth"],
+            "granted": dict(granted),
+            "avg_wait_ms": {
+                name: round(self.stats["wait_seconds"][name] / granted[name] * 1000, 1) if granted[name] else 0.0
+                for name in granted
+            },
+            "retry_after": self.stats["retry_after"],
+        }
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Any]],
+        args: Any,
+        kwargs: Dict[str, Any],
+        endpoint: str,
+        data: Dict[str, Any],
+        rate_limit_args: Optional[int],
+    ):
+        priority = rate_limit_args if rate_limit_args in PRIORITY_NAMES else PRIORITY_INTERACTIVE
+        retries = self.interactive_retries if priority == PRIORITY_INTERACTIVE else 0
+
+        while True:
+            await self._acquire(priority)
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                delay = retry_after_seconds(e.retry_after)
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                self.stats["retry_after"] += 1
+                logger.warning(f"Превышен лимит Telegram ({endpoint}), пауза {delay:.0f} с.")
+                # Напоминания повторяет конвейер доставки, ответы пользователю - здесь
+                if retries <= 0:
+                    raise
+                retries -= 1
+
+    async def _acquire(self, priority: int):
+        await self.initialize()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (priority, next(self._sequence), future))
+        self.stats["max_depth"] = max(self.stats["max_depth"], len(self._heap))
+        self._wakeup.set()
+
+        queued_at = time.monotonic()
+        await future
+        name = PRIORITY_NAMES[priority]
+        self.stats["granted"][name] += 1
+        self.stats["wait_seconds"][name] += time.monotonic() - queued_at
+
+    async def _dispatch(self):
+        while True:
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            delay = self._paused_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self.bucket.acquire()
+
+            # Токен получает самый важный запрос на момент выдачи
+            while self._heap:
+                _, _, future = heapq.heappop(self._heap)
+                if not future.done():
+                    future.set_result(None)
+                    break
+
+
+def get_outbound_limiter(bot) -> Optional[PriorityRateLimiter]:
+    """
+    Возвращает приоритетную очередь бота, если она подключена.
+    """
+    limiter = getattr(bot, "rate_limiter", None)
+    return limiter if isinstance(limiter, PriorityRateLimiter) else None
@@ -0,0 +1,91 @@
+"""
+Ограничители частоты запросов к Telegram Bot API.
+"""
+
+import asyncio
+import time
+from datetime import timedelta
+from typing import Dict, Union
+
+
+class TokenBucket:
+    """
+    Корзина токенов: не более rate операций в секунду с запасом capacity на всплески.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def set_rate(self, rate: float):
+        """
+        Меняет скорость пополнения; запас на всплески становится равным новой скорости.
+        """
+        self._refill()
+        self.rate = rate
+        self.capacity = rate
+        self._tokens = min(self._tokens, self.capacity)
+
+    async def acquire(self):
+        """
+        Ожидает, пока в корзине появится токен, и забирает его.
+        """
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class ChatRateLimiter:
+    """
+    Ограничение частоты сообщений в один чат: не чаще одного сообщения за interval секунд.
+    """
+
+    # Порог, после которого из словаря удаляются устаревшие записи
+    CLEANUP_THRESHOLD = 10000
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next_allowed: Dict[int, float] = {}
+
+    async def wait(self, chat_id: int):
+        """
+        Ожидает, пока в чат снова можно будет отправить сообщение, и резервирует слот.
+        """
+        now = time.monotonic()
+        next_allowed = self._next_allowed.get(chat_id, now)
+        slot = max(now, next_allowed)
+        self._next_allowed[chat_id] = slot + self.interval
+
+        if len(self._next_allowed) > self.CLEANUP_THRESHOLD:
+            self._cleanup(now)
+
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def _cleanup(self, now: float):
+        self._next_allowed = {
+            chat_id: next_allowed
+            for chat_id, next_allowed in self._next_allowed.items()
+            if next_allowed > now
+        }
+
+
+def retry_after_seconds(retry_after: Union[int, float, timedelta]) -> float:
+    """
+    Приводит RetryAfter.retry_after (секунды или timedelta) к числу секунд.
+    """
+    if isinstance(retry_after, timedelta):
+        return retry_after.total_seconds()
+    return float(retry_after)
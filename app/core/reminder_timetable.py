@@ -0,0 +1,332 @@
+"""
+Расписание напоминаний в памяти.
+Сопоставляет каждой UTC-минуте суток привычки и пользователей, которым в эту минуту
+нужно отправить напоминание, чтобы задача планировщика не перебирала все привычки.
+"""
+
+from datetime import datetime, date, timedelta, timezone
+from typing import Dict, Optional, Set, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from app.core import clock
+from app.models.database import Habit, User, DELIVERY_OK
+from app.utils.timezone_utils import get_user_timezone
+from app.utils.schedule_utils import (
+    parse_habit_time, reminder_jitter_minutes, MINUTES_PER_DAY, REMINDER_TOLERANCE_MINUTES,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def reminder_frequency_matches(frequency: Optional[str], hour: int, minute: int) -> bool:
+    """
+    Проверяет, срабатывает ли частота напоминаний пользователя в указанные час и минуту.
+    """
+    frequency = frequency or "0"
+
+    # Если частота не задана или "0" - каждый час в начале часа
+    if frequency == "0":
+        return minute == 0
+
+    # Если частота задана как cron-выражение (например, "*/10", "*/15", "*/30", "*/45")
+    if frequency.startswith("*/"):
+        try:
+            interval = int(frequency[2:])  # Извлекаем число после "*/"
+            return minute % interval == 0
+        except (ValueError, ZeroDivisionError):
+            return False
+
+    # Если частота "daily_start" - каждый день в начале дня (00:00)
+    if frequency == "daily_start":
+        return hour == 0 and minute == 0
+
+    # Если частота "daily_end" - каждый день в конце дня (18:00)
+    if frequency == "daily_end":
+        return hour == 18 and minute == 0
+
+    # По умолчанию - каждый час
+    return minute == 0
+
+
+class ReminderTimetable:
+    """
+    Таблица напоминаний по UTC-минутам суток.
+
+    Привычки со временем (custom_schedule_time) раскладываются по корзинам минут,
+    попадающих в окно допуска вокруг их локального времени. Привычки без времени
+    напоминаются, когда срабатывает частота напоминаний их владельца.
+    Сдвиг пользователя (reminder_jitter_minutes) применяется и к частоте, и к корзинам.
+    Таблица обновляется по одному пользователю при создании, удалении
+    или изменении привычек и пересчитывается при смене UTC-даты (переходы на летнее время).
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """
+        Очищает таблицу.
+        """
+        self._timed_buckets: list = [dict() for _ in range(MINUTES_PER_DAY)]  # минута -> {habit_id: user_id}
+        self._habit_minutes: Dict = {}  # habit_id -> список UTC-минут
+        self._habit_timing: Dict = {}  # habit_id -> (user_id, минуты с начала суток, часовой пояс)
+        self._user_habits: Dict = {}  # user_id -> set(habit_id)
+        self._untimed_habits: Dict = {}  # user_id -> set(habit_id)
+        self._user_frequency: Dict = {}  # user_id -> (частота напоминаний, сдвиг в минутах)
+        self._frequency_users: Dict[Tuple[str, int], Set] = {}  # (частота, сдвиг) -> set(user_id)
+        self._zone_offsets: Dict[Optional[str], int] = {}  # часовой пояс -> смещение от UTC, мин
+        self.built_for: Optional[date] = None
+        self.is_loaded = False
+
+    # --- Загрузка ---
+
+    async def load(self, db: AsyncSession, today: Optional[date] = None):
+        """
+        Полностью строит таблицу из базы данных.
+        """
+        self.clear()
+        result = await db.stream(
+            select(
+                User.id, User.reminder_frequency, Habit.id,
+                Habit.custom_schedule_time, Habit.schedule_minute, Habit.timezone,
+            )
+            .join(Habit, User.id == Habit.user_id)
+            .where(Habit.is_active == True)
+            .where(User.delivery_state == DELIVERY_OK)
+            .execution_options(yield_per=1000)
+        )
+        async for user_id, frequency, habit_id, habit_time, schedule_minute, habit_timezone in result:
+            self._set_frequency(user_id, frequency)
+            self._add_habit(user_id, habit_id, habit_time, habit_timezone, today, schedule_minute)
+
+        self.built_for = today or clock.now(timezone.utc).date()
+        self.is_loaded = True
+        logger.info(f"Таблица напоминаний построена: {len(self._habit_timing)} привычек, {len(self._user_habits)} пользователей.")
+
+    async def reload_user(self, db: AsyncSession, telegram_id: int):
+        """
+        Перестраивает записи одного пользователя (после создания, удаления
+        или изменения расписания привычки либо частоты напоминаний).
+        """
+        if not self.is_loaded:
+            return
+
+        user_result = await db.execute(
+            select(User.id, User.reminder_frequency, User.delivery_state).where(User.telegram_id == telegram_id)
+        )
+        row = user_result.one_or_none()
+        if row is None:
+            return
+        user_id, frequency, delivery_state = row
+
+        self.remove_user(user_id)
+        if delivery_state != DELIVERY_OK:
+            return
+        habits_result = await db.execute(
+            select(Habit.id, Habit.custom_schedule_time, Habit.schedule_minute, Habit.timezone)
+            .where(Habit.user_id == user_id)
+            .where(Habit.is_active == True)
+        )
+        habits = habits_result.all()
+        if not habits:
+            return
+
+        self._set_frequency(user_id, frequency)
+        for habit_id, habit_time, schedule_minute, habit_timezone in habits:
+            self._add_habit(user_id, habit_id, habit_time, habit_timezone, self.built_for, schedule_minute)
+
+    # --- Изменение ---
+
+    def remove_user(self, user_id):
+        """
+        Удаляет пользователя и все его привычки из таблицы.
+        """
+        for habit_id in list(self._user_habits.get(user_id, ())):
+            self.remove_habit(habit_id)
+        frequency = self._user_frequency.pop(user_id, None)
+        if frequency is not None:
+            self._frequency_users.get(frequency, set()).discard(user_id)
+
+    def remove_habit(self, habit_id):
+        """
+        Удаляет привычку из таблицы.
+        """
+        timing = self._habit_timing.pop(habit_id, None)
+        if timing is None:
+            return
+        user_id = timing[0]
+        for minute in self._habit_minutes.pop(habit_id, ()):
+            self._timed_buckets[minute].pop(habit_id, None)
+        self._untimed_habits.get(user_id, set()).discard(habit_id)
+        user_habits = self._user_habits.get(user_id)
+        if user_habits is not None:
+            user_habits.discard(habit_id)
+            if not user_habits:
+                del self._user_habits[user_id]
+                self._untimed_habits.pop(user_id, None)
+
+    def _set_frequency(self, user_id, frequency: Optional[str]):
+        frequency = (frequency or "0", reminder_jitter_minutes(user_id))
+        previous = self._user_frequency.get(user_id)
+        if previous == frequency:
+            return
+        if previous is not None:
+            self._frequency_users.get(previous, set()).discard(user_id)
+        self._user_frequency[user_id] = frequency
+        self._frequency_users.setdefault(frequency, set()).add(user_id)
+
+    def _add_habit(
+        self,
+        user_id,
+        habit_id,
+        habit_time: Optional[str],
+        habit_timezone: Optional[str],
+        today: Optional[date],
+        schedule_minute: Optional[int] = None,
+    ):
+        self._user_habits.setdefault(user_id, set()).add(habit_id)
+
+        # Строка разбирается, только если скомпилированное время еще не заполнено
+        if schedule_minute is not None:
+            local_minute = schedule_minute
+        else:
+            local_minute = parse_habit_time(habit_time) if habit_time else None
+        self._habit_timing[habit_id] = (user_id, local_minute, habit_timezone)
+
+        if not habit_time:
+            self._untimed_habits.setdefault(user_id, set()).add(habit_id)
+            return
+        if local_minute is None:
+            logger.warning(f"Не удалось разобрать время '{habit_time}' привычки {habit_id}, напоминание пропущено.")
+            return
+
+        minutes = self._utc_minutes(
+            local_minute, self._zone_offset(habit_timezone, today), reminder_jitter_minutes(user_id)
+        )
+        self._habit_minutes[habit_id] = minutes
+        for minute in minutes:
+            self._timed_buckets[minute][habit_id] = user_id
+
+    def _zone_offset(self, habit_timezone: Optional[str], today: Optional[date]) -> int:
+        """
+        Смещение часового пояса от UTC в минутах на дату построения таблицы.
+        Считается один раз на пояс; сбрасывается при пересчете таблицы.
+        """
+        offset_minutes = self._zone_offsets.get(habit_timezone)
+        if offset_minutes is None:
+            user_tz = get_user_timezone(habit_timezone)
+            reference = clock.now(user_tz)
+            if today is not None:
+                reference = datetime.combine(today, reference.time(), tzinfo=user_tz)
+            offset_minutes = int(reference.utcoffset().total_seconds() // 60)
+            self._zone_offsets[habit_timezone] = offset_minutes
+        return offset_minutes
+
+    @staticmethod
+    def _utc_minutes(local_minute: int, offset_minutes: int, jitter_minutes: int = 0) -> list:
+        """
+        Переводит окно допуска вокруг локального времени привычки в UTC-минуты суток
+        (со сдвигом пользователя jitter_minutes).
+        """
+        # Окно не переходит через полночь, как и в is_habit_time_now
+        start = max(0, local_minute - REMINDER_TOLERANCE_MINUTES)
+        end = min(MINUTES_PER_DAY - 1, local_minute + REMINDER_TOLERANCE_MINUTES)
+        return [(minute - offset_minutes + jitter_minutes) % MINUTES_PER_DAY for minute in range(start, end + 1)]
+
+    def _rebuild_timed(self, today: date):
+        """
+        Пересчитывает корзины привычек со временем под новую дату.
+        """
+        self._timed_buckets = [dict() for _ in range(MINUTES_PER_DAY)]
+        self._habit_minutes = {}
+        self._zone_offsets = {}
+        for habit_id, (user_id, local_minute, habit_timezone) in self._habit_timing.items():
+            if local_minute is None:
+                continue
+            minutes = self._utc_minutes(
+                local_minute, self._zone_offset(habit_timezone, today), reminder_jitter_minutes(user_id)
+            )
+            self._habit_minutes[habit_id] = minutes
+            for minute in minutes:
+                self._timed_buckets[minute][habit_id] = user_id
+        self.built_for = today
+
+    # --- Выборка ---
+
+    @staticmethod
+    def _fires(key: Tuple[str, int], moment: datetime) -> bool:
+        # Частота со сдвигом срабатывает в moment, если без сдвига сработала бы на jitter минут раньше
+        frequency, jitter_minutes = key
+        if jitter_minutes:
+            moment = moment - timedelta(minutes=jitter_minutes)
+        return reminder_frequency_matches(frequency, moment.hour, moment.minute)
+
+    def firing_users(self, now_utc: datetime) -> Set:
+        """
+        Возвращает пользователей, у которых в эту минуту срабатывает частота напоминаний.
+        """
+        users = set()
+        for key, frequency_users in self._frequency_users.items():
+            if frequency_users and self._fires(key, now_utc):
+                users |= frequency_users
+        return users
+
+    def due(self, now_utc: datetime) -> Dict:
+        """
+        Возвращает привычки, напоминание о которых нужно отправить в эту минуту,
+        сгруппированные по пользователям: {user_id: set(habit_id)}.
+        """
+        if self.built_for != now_utc.date():
+            self._rebuild_timed(now_utc.date())
+
+        firing = self.firing_users(now_utc)
+        if not firing:
+            return {}
+
+        due_habits: Dict = {}
+        for user_id in firing:
+            untimed = self._untimed_habits.get(user_id)
+            if untimed:
+                due_habits[user_id] = set(untimed)
+
+        bucket = self._timed_buckets[now_utc.hour * 60 + now_utc.minute]
+        for habit_id, user_id in bucket.items():
+            if user_id in firing:
+                due_habits.setdefault(user_id, set()).add(habit_id)
+
+        return due_habits
+
+    def next_due(self, start_utc: datetime, horizon_minutes: int = MINUTES_PER_DAY) -> Optional[datetime]:
+        """
+        Возвращает первую минуту начиная со start_utc (в пределах horizon_minutes),
+        в которую due() вернет хотя бы одну привычку, или None.
+        Корзины берутся для текущей даты таблицы; после полуночи результат уточняется
+        при следующем вызове.
+        """
+        start = start_utc.replace(second=0, microsecond=0)
+        # Частоты, у пользователей которых есть привычки без времени
+        untimed_frequencies = {
+            frequency
+            for frequency, frequency_users in self._frequency_users.items()
+            if any(self._untimed_habits.get(user_id) for user_id in frequency_users)
+        }
+
+        for offset in range(horizon_minutes):
+            moment = start + timedelta(minutes=offset)
+            firing = [
+                key
+                for key, frequency_users in self._frequency_users.items()
+                if frequency_users and self._fires(key, moment)
+            ]
+            if not firing:
+                continue
+            if untimed_frequencies.intersection(firing):
+                return moment
+            bucket = self._timed_buckets[moment.hour * 60 + moment.minute]
+            if bucket and any(self._user_frequency.get(user_id) in firing for user_id in bucket.values()):
+                return moment
+        return None
+
+    def __len__(self) -> int:
+        return len(self._habit_timing)
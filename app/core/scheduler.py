@@ -6,7 +6,20 @@
 import asyncio
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.date import DateTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from telegram.ext import Application
+from app.core import clock
+from app.core.config import settings
+from app.core.reminder_timetable import ReminderTimetable
+from app.core.timing_wheel import ReminderWheel
+from app.core.delivery import ReminderDeliveryPipeline
+from app.core.leader import LeaderLease
+from app.core.sharding import ShardMembership
+from app.core.sent_ledger import SentLedger
+from app.core.coalescer import ReminderCoalescer
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,26 +30,120 @@ class HabitReminderScheduler:
     Класс для управления планировщиком задач напоминаний.
     """
 
-    def __init__(self, telegram_app: Application):
+    def __init__(self, telegram_app: Application, instance_id: str = None):
         self.scheduler = AsyncIOScheduler()
         self.telegram_app = telegram_app
+        self.instance_id = instance_id or settings.INSTANCE_ID
+        # Колесо таймеров хранит по записи на привычку и заменяет поминутную таблицу
+        self.timetable = ReminderWheel() if settings.REMINDER_TIMING_WHEEL_ENABLED else ReminderTimetable()
+        self.delivery = ReminderDeliveryPipeline(telegram_app.bot)
+        self.ledger = SentLedger() if settings.REMINDER_LEDGER_ENABLED else None
+        # Окно объединения напоминаний пользователя в одно сообщение
+        self.coalescer = (
+            ReminderCoalescer(settings.REMINDER_COALESCE_WINDOW_SECONDS, self._flush_coalesced)
+            if settings.REMINDER_COALESCE_WINDOW_SECONDS > 0
+            else None
+        )
+        # При нескольких репликах задачи выполняет только ведущий экземпляр
+        self.leader = (
+            LeaderLease("reminder_scheduler", self.instance_id, settings.LEADER_LEASE_TTL)
+            if settings.LEADER_ELECTION_ENABLED
+            else None
+        )
+        # При шардировании каждый воркер обрабатывает только своих пользователей
+        self.shards = (
+            ShardMembership(
+                self.instance_id,
+                settings.SHARD_WORKER_TTL,
+                shard_count=settings.SCHEDULER_SHARD_COUNT,
+                shard_index=settings.SCHEDULER_SHARD_INDEX,
+            )
+            if settings.SCHEDULER_SHARDING_ENABLED
+            else None
+        )
         self.is_running = False
+        # Время следующей проверки напоминаний (при адаптивном пробуждении)
+        self.next_check_at: Optional[datetime] = None
+
+    @property
+    def is_active(self) -> bool:
+        """
+        Должен ли этот экземпляр выполнять задачи планировщика.
+        """
+        return self.leader is None or self.leader.is_leader
+
+    @property
+    def handles_reminders(self) -> bool:
+        """
+        Должен ли этот экземпляр рассылать напоминания (при шардировании - по своему шарду).
+        """
+        if self.shards is not None:
+            return self.shards.index is not None
+        return self.is_active
 
     async def start(self):
         """
         Запускает планировщик задач.
         """
         if not self.is_running:
+            await self.delivery.start()
+            if self.coalescer is not None:
+                await self.coalescer.start()
             self.scheduler.start()
             self.is_running = True
             logger.info("Планировщик задач запущен.")
 
-            # Проверка напоминаний каждую минуту для более точного контроля
-            self.scheduler.add_job(
-                self.send_daily_reminders,
-                CronTrigger(minute="*"),  # Каждую минуту
-                id="habit_reminder_check",
-            )
+            if self.leader is not None:
+                # Продление аренды ведущего; первый запуск - сразу
+                self.scheduler.add_job(
+                    self.leader_heartbeat,
+                    IntervalTrigger(seconds=settings.LEADER_HEARTBEAT_INTERVAL),
+                    id="leader_heartbeat",
+                    next_run_time=datetime.now(timezone.utc),
+                    max_instances=1,
+                    coalesce=True,
+                )
+
+            if self.shards is not None:
+                self.scheduler.add_job(
+                    self.shard_heartbeat,
+                    IntervalTrigger(seconds=settings.SHARD_HEARTBEAT_INTERVAL),
+                    id="shard_heartbeat",
+                    next_run_time=datetime.now(timezone.utc),
+                    max_instances=1,
+                    coalesce=True,
+                )
+
+            if self.leader is not None or self.shards is not None:
+                # Привычки могли измениться на других репликах - периодически перечитываем таблицу
+                self.scheduler.add_job(
+                    self.reload_timetable,
+                    IntervalTrigger(minutes=settings.REMINDER_TIMETABLE_REFRESH_MINUTES),
+                    id="timetable_refresh",
+                    max_instances=1,
+                    coalesce=True,
+                )
+
+            if settings.REMINDER_ADAPTIVE_WAKEUP_ENABLED:
+                # Проверка напоминаний к ближайшему моменту, когда есть что отправить
+                await self.arm_reminder_check()
+            else:
+                # Проверка напоминаний каждую минуту для более точного контроля
+                self.scheduler.add_job(
+                    self.send_daily_reminders,
+                    CronTrigger(minute="*"),  # Каждую минуту
+                    id="habit_reminder_check",
+                )
+
+            # Диспетчер outbox отправляет записанные в Notification напоминания
+            if settings.REMINDER_OUTBOX_ENABLED:
+                self.scheduler.add_job(
+                    self.dispatch_outbox,
+                    IntervalTrigger(seconds=settings.OUTBOX_DISPATCH_INTERVAL),
+                    id="outbox_dispatch",
+                    max_instances=1,
+                    coalesce=True,
+                )
 
             # Пример: Еженедельная проверка челленджей в понедельник в 9:00
             self.scheduler.add_job(
@@ -51,6 +158,28 @@ class HabitReminderScheduler:
         """
         if self.is_running:
             self.scheduler.shutdown()
+            if self.coalescer is not None:
+                # Накопленные напоминания отправляются до остановки доставки
+                await self.coalescer.stop()
+            await self.delivery.stop()
+            try:
+                from app.core.database import get_db_session
+                async for db in get_db_session():
+                    await self.record_undeliverable(db)
+                    break
+            except Exception as e:
+                logger.error(f"Ошибка при записи недоставляемых пользователей: {e}")
+            if self.leader is not None or self.shards is not None:
+                try:
+                    from app.core.database import get_db_session
+                    async for db in get_db_session():
+                        if self.leader is not None:
+                            await self.leader.release(db)
+                        if self.shards is not None:
+                            await self.shards.leave(db)
+                        break
+                except Exception as e:
+                    logger.error(f"Ошибка при выходе из группы планировщиков: {e}")
             self.is_running = False
             logger.info("Планировщик задач остановлен.")
 
@@ -58,121 +187,562 @@ class HabitReminderScheduler:
         """
         Асинхронная задача для отправки ежедневных напоминаний пользователям.
         Учитывает индивидуальные настройки частоты напоминаний.
+        Привычки, которым пора напомнить, берутся из таблицы напоминаний
+        (или диапазоном по индексу next_due_at, если включен REMINDER_DUE_INDEX_ENABLED),
+        поэтому база данных опрашивается только по ним. Пропущенные с последней
+        завершенной проверки напоминания обрабатываются по REMINDER_CATCHUP_POLICY.
+        Сообщения передаются в конвейер доставки (или записываются в outbox,
+        если он включен), и задача не ждет их отправки.
         """
+        if not self.handles_reminders:
+            return
+        
         logger.info("Запуск задачи отправки ежедневных напоминаний.")
         
         try:
             from app.core.database import get_db_session
-            from app.bot.services.habit_service import get_users_with_uncompleted_daily_habits
-            from datetime import date, datetime
-            from app.utils.timezone_utils import is_habit_time_now, get_user_timezone
+            from app.core.catchup import save_last_tick
+            from datetime import datetime, timezone
+            
+            now_utc = clock.now(timezone.utc)
+            tick = now_utc.replace(second=0, microsecond=0, tzinfo=None)
             
-            # Получаем пользователей с незавершенными привычками
             async for db in get_db_session():
-                users_to_notify = await get_users_with_uncompleted_daily_habits(db)
+                # Пользователи, заблокировавшие бота, исключаются до выборки
+                await self.record_undeliverable(db)
                 
-                if not users_to_notify:
-                    logger.info("Нет пользователей для отправки напоминаний.")
-                    break
+                if settings.REMINDER_TIMING_WHEEL_ENABLED:
+                    passes = await self._wheel_passes(db, tick)
+                elif settings.REMINDER_DUE_INDEX_ENABLED:
+                    passes = await self._claim_due_habits(db, now_utc)
+                else:
+                    if not self.timetable.is_loaded:
+                        await self.timetable.load(db)
+                    passes = await self._timetable_passes(db, tick)
                 
-                logger.info(f"Найдено {len(users_to_notify)} пользователей с незавершенными привычками.")
+                if self.shards is not None:
+                    passes = [
+                        (moment, {
+                            user_id: habits
+                            for user_id, habits in due_habits.items()
+                            if self.shards.owns(user_id)
+                        })
+                        for moment, due_habits in passes
+                    ]
+                passes = [(moment, due_habits) for moment, due_habits in passes if due_habits]
                 
-                for user_data in users_to_notify:
-                    user = user_data['user']
-                    uncompleted_habits = user_data['uncompleted_habits']
-                    
-                    if not uncompleted_habits:
-                        continue
-                    
-                    # Проверяем, нужно ли отправлять напоминание этому пользователю
-                    if not self._should_send_reminder(user):
-                        continue
-                    
-                    # Фильтруем привычки по времени напоминания
-                    habits_to_remind = []
-                    for habit in uncompleted_habits:
-                        if habit.custom_schedule_time:
-                            # Проверяем, наступило ли время для напоминания
-                            if is_habit_time_now(habit.custom_schedule_time, habit.timezone):
-                                habits_to_remind.append(habit)
-                        else:
-                            # Для привычек без времени добавляем в список
-                            habits_to_remind.append(habit)
-                    
-                    if not habits_to_remind:
-                        continue
-                    
-                    # Формируем сообщение с незавершенными привычками
-                    habit_names = [habit.name for habit in habits_to_remind]
-                    message = (
-                        f"🔔 Напоминание о привычках\n\n"
-                        f"Привет, {user.first_name or user.username or 'пользователь'}!\n"
-                        f"Не забудьте выполнить свои привычки:\n\n"
-                    )
-                    
-                    for i, habit_name in enumerate(habit_names, 1):
-                        message += f"{i}. {habit_name}\n"
-                    
-                    message += f"\nИспользуйте /complete <номер> для отметки выполнения."
-                    
-                    try:
-                        await self.telegram_app.bot.send_message(
-                            chat_id=user.telegram_id,
-                            text=message
-                        )
-                        logger.info(f"Напоминание отправлено пользователю {user.telegram_id}")
-                        await asyncio.sleep(0.1)  # Небольшая задержка между сообщениями
-                    except Exception as e:
-                        logger.error(f"Ошибка при отправке напоминания пользователю {user.telegram_id}: {e}")
+                if not passes:
+                    logger.info("Нет привычек для напоминания в эту минуту.")
+                else:
+                    await self._send_reminder_passes(db, passes)
                 
+                await save_last_tick(db, self._checkpoint_name, tick)
                 break
                 
         except Exception as e:
             logger.error(f"Ошибка в задаче отправки напоминаний: {e}")
 
-    def _should_send_reminder(self, user):
+    @property
+    def _checkpoint_name(self) -> str:
         """
-        Проверяет, нужно ли отправлять напоминание пользователю в данный момент.
-        Учитывает индивидуальные настройки частоты напоминаний.
+        Имя записи с временем последней проверки (у каждого шарда своя).
+        """
+        if self.shards is not None:
+            return f"reminder_tick:{self.shards.index}/{self.shards.count}"
+        return "reminder_tick"
+
+    async def _timetable_passes(self, db, tick: datetime) -> list:
         """
-        from datetime import datetime
+        Проходы рассылки по таблице напоминаний: текущая минута и, по политике
+        догоняющего режима, минуты, пропущенные с последней завершенной проверки.
+        """
+        from app.core.catchup import CATCHUP_SKIP, apply_policy, load_last_tick, missed_range
+        
+        missed = []
+        if settings.REMINDER_CATCHUP_POLICY != CATCHUP_SKIP:
+            window = missed_range(
+                await load_last_tick(db, self._checkpoint_name), tick, settings.REMINDER_CATCHUP_MAX_MINUTES
+            )
+            if window is not None:
+                moment, end = (value.replace(tzinfo=timezone.utc) for value in window)
+                while moment < end:
+                    horizon = int((end - moment).total_seconds() // 60)
+                    moment = self.timetable.next_due(moment, horizon)
+                    if moment is None:
+                        break
+                    missed.append((moment, self.timetable.due(moment)))
+                    moment += timedelta(minutes=1)
         
-        frequency = user.reminder_frequency or "0"
-        now = datetime.now()
+        # Текущая минута последней: таблица пересчитывается под ее дату
+        current = (tick.replace(tzinfo=timezone.utc), self.timetable.due(tick.replace(tzinfo=timezone.utc)))
+        return apply_policy(settings.REMINDER_CATCHUP_POLICY, current, missed)
+
+    async def _wheel_passes(self, db, tick: datetime) -> list:
+        """
+        Проходы рассылки по колесу таймеров. При построении колесо начинает отсчет
+        с последней завершенной проверки, поэтому пропущенные минуты срабатывают
+        отдельными проходами и объединяются по политике догоняющего режима.
+        """
+        from app.core.catchup import CATCHUP_SKIP, apply_policy, load_last_tick, missed_range
+        from app.utils.schedule_utils import REMINDER_TOLERANCE_MINUTES
         
-        # Если частота не задана или "0" - каждый час в начале часа
-        if frequency == "0":
-            return now.minute == 0
+        if not self.timetable.is_loaded:
+            start = None
+            if settings.REMINDER_CATCHUP_POLICY != CATCHUP_SKIP:
+                window = missed_range(
+                    await load_last_tick(db, self._checkpoint_name), tick, settings.REMINDER_CATCHUP_MAX_MINUTES
+                )
+                if window is not None:
+                    start = window[0]
+            await self.timetable.load(db, start)
         
-        # Если частота задана как cron-выражение (например, "*/10", "*/15", "*/30", "*/45")
-        if frequency.startswith("*/"):
-            try:
-                interval = int(frequency[2:])  # Извлекаем число после "*/"
-                return now.minute % interval == 0
-            except ValueError:
-                return False
+        current_moment = tick.replace(tzinfo=timezone.utc)
+        stale_before = current_moment - timedelta(minutes=REMINDER_TOLERANCE_MINUTES)
+        current = {}
+        missed = []
+        for moment, due_habits in self.timetable.advance(current_moment):
+            if moment >= stale_before:
+                for user_id, habits in due_habits.items():
+                    current.setdefault(user_id, set()).update(habits)
+            else:
+                missed.append((moment, due_habits))
+        return apply_policy(settings.REMINDER_CATCHUP_POLICY, (current_moment, current), missed)
+
+    async def _send_reminder_passes(self, db, passes: list):
+        """
+        Формирует и отправляет напоминания для проходов рассылки одним пакетом:
+        незавершенные привычки выбираются одним запросом, журнал пополняется одной записью.
+        """
+        from app.bot.services.habit_service import get_users_with_uncompleted_daily_habits
+        
+        habit_ids = set()
+        for _, due_habits in passes:
+            for habits in due_habits.values():
+                habit_ids |= habits
+        
+        # Получаем пользователей с незавершенными привычками среди запланированных
+        users_to_notify = await get_users_with_uncompleted_daily_habits(db, habit_ids=habit_ids)
+        if not users_to_notify:
+            logger.info("Нет пользователей для отправки напоминаний.")
+            return
+        
+        logger.info(f"Найдено {len(users_to_notify)} пользователей с незавершенными привычками.")
+        
+        users_by_id = {user_data['user'].id: user_data for user_data in users_to_notify}
+        reminders = []  # (минута прохода, данные пользователя с привычками этого прохода)
+        for moment, due_habits in passes:
+            for user_id, habits in due_habits.items():
+                user_data = users_by_id.get(user_id)
+                if user_data is None:
+                    continue
+                uncompleted = [habit for habit in user_data['uncompleted_habits'] if habit.id in habits]
+                if uncompleted:
+                    reminders.append((moment, {**user_data, 'uncompleted_habits': uncompleted}))
+        
+        if self.ledger is not None:
+            # Напоминания, уже отправленные в этот слот (после перезапуска
+            # или пересекающейся проверкой), отбрасываются
+            reminders = await self._claim_reminders(db, reminders)
+        
+        if self.coalescer is not None:
+            # Напоминания пользователя за окно объединяются в одно сообщение
+            for _, user_data in reminders:
+                self.coalescer.add(user_data)
+            logger.info(f"В окно объединения добавлено {len(reminders)} напоминаний.")
+            return
+        
+        await self._dispatch_reminders(db, [user_data for _, user_data in reminders])
+
+    async def _dispatch_reminders(self, db, reminders: list):
+        """
+        Формирует сообщения и передает их в конвейер доставки (или в outbox).
+        """
+        from app.bot.services.notification_service import enqueue_notifications
+        
+        queued = 0
+        outbox_rows = []
+        notification_time = clock.utcnow()
+        for user_data in reminders:
+            user = user_data['user']
+            habits_to_remind = user_data['uncompleted_habits']
+            
+            message = self._build_reminder_message(user, habits_to_remind)
+            if settings.REMINDER_OUTBOX_ENABLED:
+                outbox_rows.append({
+                    "user_id": user.id,
+                    "habit_id": habits_to_remind[0].id if len(habits_to_remind) == 1 else None,
+                    "notification_time": notification_time,
+                    "message": message,
+                })
+            elif self.delivery.submit(user.telegram_id, message):
+                queued += 1
+        
+        if settings.REMINDER_OUTBOX_ENABLED:
+            queued = await enqueue_notifications(db, outbox_rows)
+            logger.info(f"В outbox записано {queued} напоминаний.")
+        else:
+            logger.info(f"В очередь доставки поставлено {queued} напоминаний.")
+        if self.delivery.outbound is not None:
+            logger.info(f"Очередь запросов бота: {self.delivery.outbound.depth()}")
+
+    async def _flush_coalesced(self, batch: list):
+        """
+        Отправляет закрытые окна объединения. Привычки, выполненные за время окна,
+        из напоминания убираются.
+        """
+        from app.core.database import get_db_session
+        from app.bot.services.habit_service import get_users_with_uncompleted_daily_habits
+        
+        habit_ids = {habit.id for user_data in batch for habit in user_data['uncompleted_habits']}
+        async for db in get_db_session():
+            current = await get_users_with_uncompleted_daily_habits(db, habit_ids=habit_ids)
+            still_due = {habit.id for user_data in current for habit in user_data['uncompleted_habits']}
+            
+            reminders = []
+            for user_data in batch:
+                habits = [habit for habit in user_data['uncompleted_habits'] if habit.id in still_due]
+                if habits:
+                    reminders.append({**user_data, 'uncompleted_habits': habits})
+            if reminders:
+                await self._dispatch_reminders(db, reminders)
+            break
+
+    async def record_undeliverable(self, db):
+        """
+        Записывает пользователям, которым не удалось доставить сообщение, состояние
+        доставки и убирает их из таблицы напоминаний. Напоминания им возобновятся
+        после их следующего сообщения боту.
+        """
+        from app.bot.services.user_service import mark_users_undeliverable
+        from app.core.delivery_state import undeliverable_chats
+        
+        states = self.delivery.pop_undeliverable()
+        if not states:
+            return
+        
+        user_ids = await mark_users_undeliverable(db, states)
+        for user_id in user_ids:
+            self.timetable.remove_user(user_id)
+        undeliverable_chats.add(states)
+        logger.info(f"Напоминания приостановлены для {len(user_ids)} пользователей, заблокировавших бота.")
+
+    async def run_reminder_check(self):
+        """
+        Проверка напоминаний при адаптивном пробуждении: отправляет напоминания
+        и планирует следующее пробуждение.
+        """
+        await self.send_daily_reminders()
+        await self.arm_reminder_check()
+
+    async def arm_reminder_check(self, db=None, earlier_only: bool = False):
+        """
+        Планирует следующую проверку напоминаний на ближайшую минуту, в которую есть
+        что отправить, но не позже чем через REMINDER_MAX_SLEEP_MINUTES.
+        При earlier_only=True проверка только переносится на более раннее время
+        (после создания или изменения привычки).
+        """
+        if not settings.REMINDER_ADAPTIVE_WAKEUP_ENABLED or not self.is_running:
+            return
+        
+        next_minute = clock.now(timezone.utc).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        latest = next_minute + timedelta(minutes=max(settings.REMINDER_MAX_SLEEP_MINUTES - 1, 0))
+        run_at = latest
+        
+        try:
+            if self.handles_reminders:
+                due_at = await self._next_reminder_time(db, next_minute, latest)
+                if due_at is not None:
+                    run_at = min(max(due_at, next_minute), latest)
+        except Exception as e:
+            # Не удалось определить время - проверяем в следующую минуту
+            logger.error(f"Ошибка при расчете времени следующей проверки напоминаний: {e}")
+            run_at = next_minute
+        
+        if earlier_only and self.next_check_at is not None and self.next_check_at <= run_at:
+            return
+        
+        self.scheduler.add_job(
+            self.run_reminder_check,
+            DateTrigger(run_date=run_at),
+            id="habit_reminder_check",
+            replace_existing=True,
+            misfire_grace_time=None,  # Пропуск запуска остановил бы цепочку пробуждений
+        )
+        self.next_check_at = run_at
+        logger.debug(f"Следующая проверка напоминаний: {run_at.isoformat()}")
+
+    async def _next_reminder_time(self, db, start: datetime, latest: datetime) -> Optional[datetime]:
+        """
+        Ближайшая минута (UTC) не раньше start, в которую есть напоминания к отправке.
+        """
+        if settings.REMINDER_DUE_INDEX_ENABLED and not settings.REMINDER_TIMING_WHEEL_ENABLED:
+            from app.bot.services.habit_service import get_earliest_due_at
+            
+            if db is None:
+                from app.core.database import get_db_session
+                async for session in get_db_session():
+                    due_at = await get_earliest_due_at(session)
+                    break
+            else:
+                due_at = await get_earliest_due_at(db)
+            return due_at.replace(tzinfo=timezone.utc) if due_at is not None else None
         
-        # Если частота "daily_start" - каждый день в начале дня (00:00)
-        if frequency == "daily_start":
-            return now.hour == 0 and now.minute == 0
+        if not self.timetable.is_loaded:
+            # Таблица будет построена при ближайшей проверке
+            return start
+        horizon = int((latest - start).total_seconds() // 60) + 1
+        return self.timetable.next_due(start, horizon)
+
+    async def _claim_due_habits(self, db, now_utc) -> list:
+        """
+        Выбирает привычки с наступившим next_due_at и сразу переносит их next_due_at
+        на следующий момент напоминания. Напоминания, просроченные больше чем на окно
+        допуска (например, после простоя), обрабатываются по политике догоняющего режима;
+        старше REMINDER_CATCHUP_MAX_MINUTES - не отправляются.
+        Возвращает проходы рассылки [(минута, {user_id: set(habit_id)})].
+        """
+        from app.bot.services.habit_service import get_due_habits, next_due_for_row, set_next_due
+        from app.core.catchup import apply_policy
+        from app.utils.schedule_utils import REMINDER_TOLERANCE_MINUTES
+        
+        now = now_utc.replace(tzinfo=None)
+        tick = now.replace(second=0, microsecond=0)
+        rows = await get_due_habits(db, now)
+        if self.shards is not None:
+            # Привычки чужих шардов переносит их воркер
+            rows = [row for row in rows if self.shards.owns(row.user_id)]
+        if not rows:
+            return []
+        
+        stale_before = now - timedelta(minutes=REMINDER_TOLERANCE_MINUTES)
+        oldest = now - timedelta(minutes=settings.REMINDER_CATCHUP_MAX_MINUTES)
+        current = {}
+        missed = {}  # минута -> {user_id: set(habit_id)}
+        for row in rows:
+            if row.next_due_at >= stale_before:
+                current.setdefault(row.user_id, set()).add(row.id)
+            elif row.next_due_at >= oldest:
+                moment = row.next_due_at.replace(second=0, microsecond=0, tzinfo=timezone.utc)
+                missed.setdefault(moment, {}).setdefault(row.user_id, set()).add(row.id)
+        
+        await set_next_due(db, [{"id": row.id, "next_due_at": next_due_for_row(row, now)} for row in rows])
+        
+        passes = apply_policy(
+            settings.REMINDER_CATCHUP_POLICY,
+            (tick.replace(tzinfo=timezone.utc), current),
+            sorted(missed.items(), key=lambda item: item[0]),
+        )
+        
+        handled = sum(len(habits) for habits in current.values()) + sum(
+            len(habits) for due in missed.values() for habits in due.values()
+        )
+        if handled < len(rows):
+            logger.warning(f"Пропущено {len(rows) - handled} просроченных напоминаний.")
+        return passes
+
+    async def _claim_reminders(self, db, reminders: list) -> list:
+        """
+        Записывает напоминания в журнал отправленных и оставляет у пользователей
+        только привычки, которые в этот слот еще не напоминались.
+        Слот - минута прохода рассылки в часовом поясе привычки.
+        """
+        from app.utils.timezone_utils import ZoneClock
+        
+        clocks = {}
+        keys = []
+        for moment, user_data in reminders:
+            zone_clock = clocks.get(moment)
+            if zone_clock is None:
+                zone_clock = clocks[moment] = ZoneClock(moment)
+            for habit in user_data['uncompleted_habits']:
+                local = zone_clock.local(habit.timezone)
+                keys.append((user_data['user'].id, habit.id, local.date(), local.hour * 60 + local.minute))
+        
+        claimed = set(await self.ledger.claim(db, keys))
+        
+        result = []
+        for moment, user_data in reminders:
+            zone_clock = clocks[moment]
+            habits = []
+            for habit in user_data['uncompleted_habits']:
+                local = zone_clock.local(habit.timezone)
+                if (user_data['user'].id, habit.id, local.date(), local.hour * 60 + local.minute) in claimed:
+                    habits.append(habit)
+            if habits:
+                result.append((moment, {**user_data, 'uncompleted_habits': habits}))
+        return result
+
+    async def dispatch_outbox(self):
+        """
+        Отправляет накопленные в outbox напоминания пачками по OUTBOX_BATCH_SIZE.
+        Пачка захватывается (claimed_at) и фиксируется до отправки, так что блокировки
+        строк на время доставки не держатся. Уведомление отмечается отправленным только
+        после того, как конвейер доставки его обработал; необработанные освобождаются,
+        а при падении процесса захват истекает через OUTBOX_CLAIM_TIMEOUT, поэтому
+        уведомление будет отправлено повторно.
+        """
+        if not self.is_active:
+            return
+        
+        try:
+            from app.core.database import get_db_session
+            from app.bot.services.notification_service import (
+                claim_pending_notifications,
+                mark_notifications_sent,
+                release_notifications,
+                expire_stale_notifications,
+            )
+            from datetime import datetime, timedelta
+            
+            now = clock.utcnow()
+            
+            async for db in get_db_session():
+                await self.record_undeliverable(db)
+                expired = await expire_stale_notifications(
+                    db, now - timedelta(minutes=settings.OUTBOX_MAX_AGE_MINUTES),
+                    now=now, claim_timeout=settings.OUTBOX_CLAIM_TIMEOUT,
+                )
+                if expired:
+                    logger.warning(f"Пропущено {expired} устаревших напоминаний из outbox.")
+                
+                while True:
+                    batch = await claim_pending_notifications(
+                        db, now, settings.OUTBOX_BATCH_SIZE, claim_timeout=settings.OUTBOX_CLAIM_TIMEOUT
+                    )
+                    if not batch:
+                        break
+                    
+                    loop = asyncio.get_running_loop()
+                    pending = []
+                    for notification_id, chat_id, message in batch:
+                        result = loop.create_future()
+                        self.delivery.submit(chat_id, message, result=result)
+                        pending.append((notification_id, result))
+                    
+                    await asyncio.gather(*(result for _, result in pending))
+                    processed = [notification_id for notification_id, result in pending if result.result()]
+                    await mark_notifications_sent(db, processed)
+                    logger.info(f"Из outbox обработано {len(processed)} из {len(batch)} напоминаний.")
+                    
+                    if len(processed) < len(batch):
+                        # Остальные будут повторены при следующем запуске диспетчера
+                        failed = [notification_id for notification_id, result in pending if not result.result()]
+                        await release_notifications(db, failed)
+                        break
+                break
+                
+        except Exception as e:
+            logger.error(f"Ошибка в диспетчере outbox: {e}")
+
+    async def leader_heartbeat(self):
+        """
+        Получает или продлевает аренду ведущего экземпляра.
+        Новый ведущий перечитывает таблицу напоминаний при следующей проверке.
+        """
+        try:
+            from app.core.database import get_db_session
+            
+            was_leader = self.leader.is_leader
+            async for db in get_db_session():
+                await self.leader.acquire_or_renew(db)
+                break
+            
+            if self.leader.is_leader and not was_leader:
+                self.timetable.is_loaded = False
+                await self.arm_reminder_check()
+        except Exception as e:
+            logger.error(f"Ошибка при продлении аренды ведущего: {e}")
+
+    async def shard_heartbeat(self):
+        """
+        Отмечает воркер в группе шардирования, пересчитывает его шард и долю
+        общего лимита отправки.
+        """
+        try:
+            from app.core.database import get_db_session
+            
+            shard = (self.shards.index, self.shards.count)
+            async for db in get_db_session():
+                await self.shards.heartbeat(db)
+                break
+            
+            # Лимит Telegram один на бота - делим его между живыми шардами
+            self.delivery.set_shard_count(self.shards.count)
+            
+            if (self.shards.index, self.shards.count) != shard:
+                await self.arm_reminder_check()
+        except Exception as e:
+            logger.error(f"Ошибка при обновлении шарда воркера: {e}")
+
+    async def reload_timetable(self):
+        """
+        Перестраивает таблицу напоминаний из базы данных и уточняет время
+        следующей проверки (привычки могли измениться в другом процессе).
+        """
+        if not self.handles_reminders:
+            return
+        
+        try:
+            if settings.REMINDER_TIMING_WHEEL_ENABLED or not settings.REMINDER_DUE_INDEX_ENABLED:
+                from app.core.database import get_db_session
+                
+                async for db in get_db_session():
+                    await self.timetable.load(db)
+                    break
+            await self.arm_reminder_check(earlier_only=True)
+        except Exception as e:
+            logger.error(f"Ошибка при перестроении таблицы напоминаний: {e}")
+
+    async def refresh_user_reminders(self, db, telegram_id: int):
+        """
+        Обновляет записи пользователя в таблице напоминаний после изменения его привычек
+        или частоты напоминаний.
+        """
+        try:
+            await self.timetable.reload_user(db, telegram_id)
+            # Новая привычка может напоминать раньше запланированной проверки
+            await self.arm_reminder_check(db, earlier_only=True)
+        except Exception as e:
+            logger.error(f"Ошибка при обновлении таблицы напоминаний для пользователя {telegram_id}: {e}")
+
+    @staticmethod
+    def _build_reminder_message(user, habits) -> str:
+        """
+        Формирует текст напоминания с незавершенными привычками.
+        """
+        habit_names = [habit.name for habit in habits]
+        message = (
+            f"🔔 Напоминание о привычках\n\n"
+            f"Привет, {user.first_name or user.username or 'пользователь'}!\n"
+            f"Не забудьте выполнить свои привычки:\n\n"
+        )
         
-        # Если частота "daily_end" - каждый день в конце дня (18:00)
-        if frequency == "daily_end":
-            return now.hour == 18 and now.minute == 0
+        for i, habit_name in enumerate(habit_names, 1):
+            message += f"{i}. {habit_name}\n"
         
-        # По умолчанию - каждый час
-        return now.minute == 0
+        message += f"\nИспользуйте /complete <номер> для отметки выполнения."
+        return message
 
     async def check_weekly_challenges(self):
         """
         Асинхронная задача для проверки и обновления статуса недельных челленджей.
         """
+        if not self.is_active:
+            return
+        # При шардировании челленджи рассчитывает только воркер первого шарда
+        if self.shards is not None and self.shards.index != 0:
+            return
+        
         logger.info("Запуск задачи проверки недельных челленджей.")
-        # Логика проверки прогресса участников челленджей
-        # и начисления наград
-        # Пример:
-        # await update_weekly_challenge_progress()
-        # await award_challenge_rewards()
+        try:
+            from app.core.database import get_db_session
+            from app.bot.services.challenge_service import settle_challenges
+            
+            async for db in get_db_session():
+                await settle_challenges(db)
+                break
+        except Exception as e:
+            logger.error(f"Ошибка при расчете челленджей: {e}")
 
     # Метод для добавления пользовательской задачи (опционально)
     def add_job(self, func, trigger, id=None, **kwargs):
@@ -183,6 +753,23 @@ class HabitReminderScheduler:
         logger.info(f"Добавлена задача с ID: {id}")
 
 
+async def refresh_user_reminders(application: Application, db, telegram_id: int):
+    """
+    Пересчитывает next_due_at привычек пользователя и обновляет таблицу напоминаний
+    планировщика приложения (если он запущен) после изменения привычек пользователя.
+    """
+    from app.bot.services.habit_service import reschedule_habits
+    
+    try:
+        await reschedule_habits(db, telegram_id=telegram_id)
+    except Exception as e:
+        logger.error(f"Ошибка при пересчете напоминаний пользователя {telegram_id}: {e}")
+    
+    scheduler = application.bot_data.get("scheduler")
+    if scheduler is not None:
+        await scheduler.refresh_user_reminders(db, telegram_id)
+
+
 # Глобальный экземпляр планировщика (можно заменить на DI при необходимости)
 # scheduler_instance = None
 
@@ -0,0 +1,121 @@
+"""
+Журнал отправленных напоминаний с кэшем в памяти.
+Защищает от повторной отправки после перезапуска или при пересекающихся проверках.
+"""
+
+import asyncio
+import hashlib
+import math
+from datetime import date, timedelta
+from typing import Dict, Iterable, List
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.bot.services.notification_service import (
+    LedgerKey,
+    get_sent_reminder_keys,
+    stream_sent_reminder_keys,
+    record_sent_reminders,
+    purge_sent_reminders,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Фильтр Блума: "нет" - ключа точно нет, "есть" - ключ, возможно, есть.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(capacity, 1)
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key) -> Iterable[int]:
+        digest = hashlib.blake2b(repr(key).encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, key):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class SentLedger:
+    """
+    Журнал отправленных напоминаний (таблица ReminderLedger) с фильтром Блума на каждую
+    локальную дату. Фильтр строится из базы при первом обращении к дате, поэтому после
+    перезапуска уже отправленные напоминания тоже отсекаются. Для ключей, которых нет
+    в фильтре (обычный случай), база данных не читается.
+    """
+
+    def __init__(self, capacity: int = None, retention_days: int = None):
+        self.capacity = capacity or settings.REMINDER_LEDGER_CAPACITY
+        self.retention_days = retention_days or settings.REMINDER_LEDGER_RETENTION_DAYS
+        self._filters: Dict[date, BloomFilter] = {}
+        self._purged_before: date = None
+        # Проверка и запись выполняются под блокировкой, чтобы пересекающиеся проверки
+        # одного процесса не заняли один и тот же слот
+        self._lock = asyncio.Lock()
+        self.stats = {"recorded": 0, "duplicates": 0, "db_checks": 0}
+
+    async def claim(self, db: AsyncSession, keys: Iterable[LedgerKey]) -> List[LedgerKey]:
+        """
+        Записывает в журнал еще не отправленные напоминания и возвращает ключи тех,
+        которые записал именно этот вызов: только их можно отправлять.
+        Ключ: (user_id, habit_id, локальная дата, слот).
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return []
+
+        async with self._lock:
+            await self._ensure_filters(db, {key[2] for key in keys})
+
+            maybe_sent = [key for key in keys if key in self._filters[key[2]]]
+            sent = set()
+            if maybe_sent:
+                self.stats["db_checks"] += len(maybe_sent)
+                sent = await get_sent_reminder_keys(db, maybe_sent)
+
+            # Блокировка защищает только этот процесс: ключ, который между проверкой и записью
+            # занял другой процесс (смена ведущего, перебалансировка шардов), INSERT пропустит
+            unsent = [key for key in keys if key not in sent]
+            new_keys = await record_sent_reminders(db, unsent)
+            for key in new_keys:
+                self._filters[key[2]].add(key)
+
+        skipped = len(keys) - len(new_keys)
+        self.stats["recorded"] += len(new_keys)
+        if skipped:
+            self.stats["duplicates"] += skipped
+            logger.warning(f"Пропущено {skipped} уже отправленных напоминаний.")
+        return new_keys
+
+    async def _ensure_filters(self, db: AsyncSession, dates: set):
+        for local_date in sorted(dates - self._filters.keys()):
+            bloom = BloomFilter(self.capacity)
+            async for key in stream_sent_reminder_keys(db, local_date):
+                bloom.add(key)
+            self._filters[local_date] = bloom
+            logger.info(f"Журнал напоминаний за {local_date}: загружено {bloom.count} записей.")
+
+        # Фильтры за прошедшие даты больше не нужны
+        oldest = min(dates) - timedelta(days=1)
+        for local_date in [d for d in self._filters if d < oldest]:
+            del self._filters[local_date]
+
+        purge_before = max(dates) - timedelta(days=self.retention_days)
+        if self._purged_before is None or purge_before > self._purged_before:
+            purged = await purge_sent_reminders(db, purge_before)
+            self._purged_before = purge_before
+            if purged:
+                logger.info(f"Из журнала напоминаний удалено {purged} записей старше {purge_before}.")
@@ -0,0 +1,104 @@
+"""
+Шардирование напоминаний между несколькими воркерами планировщика.
+Пользователи распределяются по hash(user_id) % N, где N - число живых воркеров.
+"""
+
+import uuid
+from datetime import timedelta
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete
+from sqlalchemy.exc import IntegrityError
+from app.core import clock
+from app.models.database import SchedulerWorker
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def shard_of(user_id, shard_count: int) -> int:
+    """
+    Возвращает номер шарда пользователя. Хеш стабилен между процессами.
+    """
+    if isinstance(user_id, uuid.UUID):
+        return user_id.int % shard_count
+    return uuid.UUID(str(user_id)).int % shard_count
+
+
+class ShardMembership:
+    """
+    Членство воркера в группе шардирования.
+
+    При фиксированном числе шардов (shard_count > 0) номер шарда задается настройкой.
+    Иначе каждый воркер регулярно отмечается в таблице SchedulerWorker, а номер шарда -
+    его позиция среди живых воркеров, отсортированных по идентификатору. Когда воркер
+    появляется или перестает отмечаться, шарды перераспределяются при следующем heartbeat.
+    """
+
+    # Записи воркеров, молчащих дольше ttl * STALE_FACTOR, удаляются из таблицы
+    STALE_FACTOR = 20
+
+    def __init__(self, worker_id: str, ttl: int, shard_count: int = 0, shard_index: int = 0):
+        self.worker_id = worker_id
+        self.ttl = ttl
+        self.is_static = shard_count > 0
+        self.count = shard_count
+        self.index: Optional[int] = shard_index if self.is_static else None
+
+    def owns(self, user_id) -> bool:
+        """
+        Относится ли пользователь к шарду этого воркера.
+        """
+        if self.index is None or not self.count:
+            return False
+        return shard_of(user_id, self.count) == self.index
+
+    async def heartbeat(self, db: AsyncSession):
+        """
+        Отмечает воркер как живой и пересчитывает его шард.
+        """
+        if self.is_static:
+            return
+
+        now = clock.utcnow()
+        result = await db.execute(
+            update(SchedulerWorker)
+            .where(SchedulerWorker.worker_id == self.worker_id)
+            .values(heartbeat_at=now)
+        )
+        if result.rowcount == 0:
+            db.add(SchedulerWorker(worker_id=self.worker_id, heartbeat_at=now, started_at=now))
+        await db.execute(
+            delete(SchedulerWorker)
+            .where(SchedulerWorker.heartbeat_at < now - timedelta(seconds=self.ttl * self.STALE_FACTOR))
+        )
+        try:
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+
+        alive_result = await db.execute(
+            select(SchedulerWorker.worker_id)
+            .where(SchedulerWorker.heartbeat_at >= now - timedelta(seconds=self.ttl))
+            .order_by(SchedulerWorker.worker_id)
+        )
+        alive = list(alive_result.scalars().all())
+        if self.worker_id not in alive:
+            alive.append(self.worker_id)
+            alive.sort()
+
+        index, count = alive.index(self.worker_id), len(alive)
+        if (index, count) != (self.index, self.count):
+            logger.info(f"Воркер {self.worker_id}: шард {index} из {count}.")
+        self.index, self.count = index, count
+
+    async def leave(self, db: AsyncSession):
+        """
+        Удаляет воркер из группы, чтобы остальные забрали его шард при следующем heartbeat,
+        не дожидаясь истечения ttl.
+        """
+        if self.is_static:
+            return
+        await db.execute(delete(SchedulerWorker).where(SchedulerWorker.worker_id == self.worker_id))
+        await db.commit()
+        self.index = None
@@ -0,0 +1,280 @@
+"""
+Иерархическое колесо таймеров для напоминаний о привычках.
+Каждая привычка хранится одной записью в слоте минуты своего следующего напоминания,
+поэтому планировщику не нужно проверять все привычки каждую минуту.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Hashable, Iterator, List, Optional, Set, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core import clock
+from app.models.database import User
+from app.utils.schedule_utils import MINUTES_PER_DAY
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Начало отсчета минут колеса (UTC)
+WHEEL_EPOCH = datetime(2000, 1, 1)
+
+
+def minute_index(moment: datetime) -> int:
+    """
+    Номер минуты от WHEEL_EPOCH для момента UTC (с tzinfo или без).
+    """
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return int((moment - WHEEL_EPOCH).total_seconds() // 60)
+
+
+def minute_moment(index: int) -> datetime:
+    """
+    Момент UTC (с tzinfo) для номера минуты колеса.
+    """
+    return (WHEEL_EPOCH + timedelta(minutes=index)).replace(tzinfo=timezone.utc)
+
+
+class TimingWheel:
+    """
+    Двухуровневое колесо таймеров.
+
+    Уровень минут - MINUTES_PER_DAY слотов для текущих суток курсора, уровень дней -
+    days слотов для следующих суток; более поздние записи лежат в словаре по дням.
+    При переходе курсора на новые сутки слот дня раскладывается по минутам.
+    Вставка и отмена - O(1): для каждого ключа хранится ссылка на его слот.
+    """
+
+    def __init__(self, cursor: int, days: int = 64):
+        self.days = days
+        self.cursor = cursor  # Следующая необработанная минута
+        self._minutes: List[Set] = [set() for _ in range(MINUTES_PER_DAY)]
+        self._days: List[Set] = [set() for _ in range(days)]
+        self._overflow: Dict[int, Set] = {}
+        self._slot_of: Dict[Hashable, Set] = {}
+        self._due_at: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._due_at)
+
+    def __contains__(self, key) -> bool:
+        return key in self._due_at
+
+    def due_at(self, key) -> Optional[int]:
+        return self._due_at.get(key)
+
+    def insert(self, key, minute: int):
+        """
+        Ставит (или переносит) ключ на минуту minute; прошедшие минуты - на ближайшую.
+        """
+        self.cancel(key)
+        minute = max(minute, self.cursor)
+        slot = self._slot_for(minute)
+        slot.add(key)
+        self._slot_of[key] = slot
+        self._due_at[key] = minute
+
+    def cancel(self, key) -> bool:
+        slot = self._slot_of.pop(key, None)
+        if slot is None:
+            return False
+        slot.discard(key)
+        del self._due_at[key]
+        return True
+
+    def advance(self, until: int) -> Iterator[Tuple[int, List]]:
+        """
+        Продвигает курсор до минуты until включительно, выдавая сработавшие ключи
+        по минутам: (минута, [ключи]). Ключи, вставленные между шагами, попадают
+        в следующие минуты того же прохода.
+        """
+        while self.cursor <= until:
+            minute = self.cursor
+            if minute % MINUTES_PER_DAY == 0:
+                self._cascade(minute // MINUTES_PER_DAY)
+
+            slot = self._minutes[minute % MINUTES_PER_DAY]
+            self.cursor += 1
+            if slot:
+                keys = list(slot)
+                slot.clear()
+                for key in keys:
+                    del self._slot_of[key]
+                    del self._due_at[key]
+                yield minute, keys
+
+    def next_due(self, start: int, horizon: int) -> Optional[int]:
+        """
+        Первая минута не раньше start (в пределах horizon минут) с записями, или None.
+        """
+        start = max(start, self.cursor)
+        end = start + horizon
+        day = self.cursor // MINUTES_PER_DAY
+        for minute in range(start, min(end, (day + 1) * MINUTES_PER_DAY)):
+            if self._minutes[minute % MINUTES_PER_DAY]:
+                return minute
+
+        # Следующие сутки: минимум по записям слота дня
+        for next_day in range(day + 1, day + self.days):
+            if next_day * MINUTES_PER_DAY >= end:
+                return None
+            slot = self._days[next_day % self.days]
+            if slot:
+                minute = min(self._due_at[key] for key in slot)
+                return minute if minute < end else None
+        return None
+
+    def _slot_for(self, minute: int) -> Set:
+        day = minute // MINUTES_PER_DAY
+        current_day = self.cursor // MINUTES_PER_DAY
+        if day == current_day:
+            return self._minutes[minute % MINUTES_PER_DAY]
+        if day < current_day + self.days:
+            return self._days[day % self.days]
+        return self._overflow.setdefault(day, set())
+
+    def _cascade(self, day: int):
+        # Записи наступивших суток раскладываются по минутам
+        slot = self._days[day % self.days]
+        keys = list(slot)
+        slot.clear()
+        for key in keys:
+            minute_slot = self._minutes[self._due_at[key] % MINUTES_PER_DAY]
+            minute_slot.add(key)
+            self._slot_of[key] = minute_slot
+
+        # В освободившийся слот дня переходят записи из словаря дальних дней
+        far_day = day + self.days - 1
+        far = self._overflow.pop(far_day, None)
+        if far:
+            slot = self._days[far_day % self.days]
+            slot.update(far)
+            for key in far:
+                self._slot_of[key] = slot
+
+
+class ReminderWheel:
+    """
+    Напоминания о привычках в колесе таймеров: привычка хранится в минуте своего
+    следующего напоминания (next_due_for_row) и после срабатывания переставляется
+    на следующее. Интерфейс загрузки и обновления совпадает с ReminderTimetable.
+    """
+
+    def __init__(self):
+        self.wheel: Optional[TimingWheel] = None
+        self._rows: Dict = {}  # habit_id -> строка _schedule_query
+        self._user_habits: Dict = {}  # user_id -> set(habit_id)
+        self._window_end: Dict = {}  # habit_id -> минута конца окна текущего напоминания
+        self.is_loaded = False
+
+    def clear(self):
+        self.wheel = None
+        self._rows = {}
+        self._user_habits = {}
+        self._window_end = {}
+        self.is_loaded = False
+
+    async def load(self, db: AsyncSession, start_utc: Optional[datetime] = None):
+        """
+        Строит колесо из базы данных. Напоминания считаются с минуты start_utc
+        (чтобы после простоя найти пропущенные), по умолчанию - с текущей позиции
+        построенного колеса или с текущей минуты.
+        """
+        from app.bot.services.habit_service import _schedule_query
+
+        if start_utc is not None:
+            start = minute_index(start_utc)
+        elif self.is_loaded:
+            start = self.wheel.cursor
+        else:
+            start = minute_index(clock.now(timezone.utc))
+        self.clear()
+        self.wheel = TimingWheel(start)
+
+        result = await db.stream(_schedule_query().execution_options(yield_per=1000))
+        async for row in result:
+            self._add_row(row)
+
+        self.is_loaded = True
+        logger.info(f"Колесо напоминаний построено: {len(self.wheel)} привычек, {len(self._user_habits)} пользователей.")
+
+    async def reload_user(self, db: AsyncSession, telegram_id: int):
+        """
+        Перестраивает записи одного пользователя (после создания, удаления
+        или изменения расписания привычки либо частоты напоминаний).
+        """
+        from app.bot.services.habit_service import _schedule_query
+
+        if not self.is_loaded:
+            return
+
+        user_result = await db.execute(select(User.id).where(User.telegram_id == telegram_id))
+        user_id = user_result.scalar_one_or_none()
+        if user_id is None:
+            return
+
+        self.remove_user(user_id)
+        result = await db.execute(_schedule_query().where(User.telegram_id == telegram_id))
+        for row in result.all():
+            self._add_row(row)
+
+    def remove_user(self, user_id):
+        for habit_id in self._user_habits.pop(user_id, ()):
+            self._rows.pop(habit_id, None)
+            self._window_end.pop(habit_id, None)
+            if self.wheel is not None:
+                self.wheel.cancel(habit_id)
+
+    def advance(self, now_utc: datetime) -> List[Tuple[datetime, Dict]]:
+        """
+        Продвигает колесо до минуты now_utc и возвращает сработавшие напоминания по минутам:
+        [(минута, {user_id: set(habit_id)})]. Сработавшие привычки переставляются
+        на следующее напоминание.
+        """
+        passes = []
+        for minute, habit_ids in self.wheel.advance(minute_index(now_utc)):
+            moment = minute_moment(minute)
+            after = moment.replace(tzinfo=None)
+            due_habits: Dict = {}
+            for habit_id in habit_ids:
+                row = self._rows[habit_id]
+                due_habits.setdefault(row.user_id, set()).add(habit_id)
+                self._schedule(row, after)
+            passes.append((moment, due_habits))
+        return passes
+
+    def next_due(self, start_utc: datetime, horizon_minutes: int = MINUTES_PER_DAY) -> Optional[datetime]:
+        """
+        Первая минута начиная со start_utc (в пределах horizon_minutes) с напоминаниями, или None.
+        """
+        minute = self.wheel.next_due(minute_index(start_utc), horizon_minutes)
+        return minute_moment(minute) if minute is not None else None
+
+    def _add_row(self, row):
+        self._rows[row.id] = row
+        self._user_habits.setdefault(row.user_id, set()).add(row.id)
+        # Напоминание ищется строго после минуты, предшествующей курсору
+        self._schedule(row, minute_moment(self.wheel.cursor - 1).replace(tzinfo=None))
+
+    def _schedule(self, row, after: datetime):
+        from app.bot.services.habit_service import next_due_window_for_row
+        from app.utils.schedule_utils import next_frequency_fire, reminder_jitter_minutes
+
+        # Пока окно напоминания не закончилось, следующий момент - следующее
+        # срабатывание частоты, без пересчета расписания
+        window_end = self._window_end.get(row.id)
+        if window_end is not None:
+            shift = timedelta(minutes=reminder_jitter_minutes(row.user_id))
+            fire = next_frequency_fire(row.reminder_frequency, after - shift + timedelta(minutes=1))
+            if fire is not None and minute_index(fire + shift) <= window_end:
+                self.wheel.insert(row.id, minute_index(fire + shift))
+                return
+
+        window = next_due_window_for_row(row, after)
+        if window is None:
+            self._window_end.pop(row.id, None)
+            return
+        due_at, window_end = window
+        self._window_end[row.id] = minute_index(window_end)
+        self.wheel.insert(row.id, minute_index(due_at))
+
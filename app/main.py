@@ -5,9 +5,10 @@
 import asyncio
 import logging
 from telegram import Update, BotCommand
-from telegram.ext import ApplicationBuilder, CommandHandler, ConversationHandler, CallbackQueryHandler, MessageHandler, filters, ContextTypes, Application
+from telegram.ext import ApplicationBuilder, CommandHandler, ConversationHandler, CallbackQueryHandler, MessageHandler, TypeHandler, filters, ContextTypes, Application
 from app.core.config import settings
 from app.core.scheduler import HabitReminderScheduler
+from app.core.outbound import PriorityRateLimiter
 from app.bot.handlers.habits import (
     list_habits,
     create_habit_command,
@@ -43,6 +44,8 @@ from app.bot.handlers.admin_bugreport import (
     delete_report, confirm_delete_report, show_reports_statistics,
     start_search_reports, handle_search, WAITING_FOR_COMMENT
 )
+from app.bot.handlers.admin_capacity import capacity_report_command
+from app.bot.handlers.delivery import restore_delivery_on_update
 from app.bot.services.user_service import get_or_create_user
 from app.core.database import get_db_session
 
@@ -175,6 +178,11 @@ async def setup_scheduler(application: Application):
     # Настройка команд бота
     await setup_bot_commands(application)
     
+    # Планировщик может работать в отдельных процессах (start_scheduler_worker.py)
+    if not settings.SCHEDULER_ENABLED:
+        logger.info("Планировщик отключен в процессе бота (SCHEDULER_ENABLED=false).")
+        return
+
     # Запуск планировщика
     scheduler = HabitReminderScheduler(application)
     await scheduler.start()
@@ -189,7 +197,11 @@ def main() -> None:
         return
 
     # Создание приложения
-    application = ApplicationBuilder().token(settings.TELEGRAM_BOT_TOKEN).build()
+    builder = ApplicationBuilder().token(settings.TELEGRAM_BOT_TOKEN)
+    if settings.OUTBOUND_PRIORITY_QUEUE_ENABLED:
+        # Ответы пользователям и напоминания проходят через общую очередь с приоритетами
+        builder = builder.rate_limiter(PriorityRateLimiter())
+    application = builder.build()
 
     # Создаем ConversationHandler для создания привычки
     create_habit_conversation = ConversationHandler(
@@ -243,6 +255,9 @@ def main() -> None:
         per_message=False,
     )
 
+    # Возобновление напоминаний пользователям, снова написавшим боту (до остальных обработчиков)
+    application.add_handler(TypeHandler(Update, restore_delivery_on_update), group=-1)
+
     # Регистрация обработчиков команд
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("help", help_command))
@@ -262,6 +277,7 @@ def main() -> None:
     application.add_handler(bug_report_conversation)
     application.add_handler(CommandHandler("bugreport_help", show_bug_report_help))
     application.add_handler(admin_bug_report_conversation)
+    application.add_handler(CommandHandler("capacity", capacity_report_command))
     
     # Добавляем обработчики callback'ов
     application.add_handler(CallbackQueryHandler(handle_complete_callback, pattern="^complete_"))
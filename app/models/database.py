@@ -5,18 +5,21 @@ SQLAlchemy ORM модели для базы данных.
 from sqlalchemy import (
     Column,
     Integer,
+    BigInteger,
     String,
     Boolean,
     DateTime,
     Date,
     ForeignKey,
     UniqueConstraint,
+    Index,
 )
 from datetime import date
-from sqlalchemy.dialects.postgresql import UUID  # Используем UUID для совместимости
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 import uuid
 
+from app.models.types import GUID  # UUID: 16 байт в SQLite, uuid в PostgreSQL
+
 
 # Используем DeclarativeBase для определения моделей
 class Base(DeclarativeBase):
@@ -33,8 +36,8 @@ class ScheduleType(Base):
 
     __tablename__ = "ScheduleType"
 
-    id: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    id: Mapped[uuid.UUID] = mapped_column(
+        GUID(), primary_key=True, default=uuid.uuid4
     )
     name: Mapped[str] = mapped_column(
         String(50), nullable=False, unique=True
@@ -51,8 +54,8 @@ class RewardType(Base):
 
     __tablename__ = "RewardType"
 
-    id: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    id: Mapped[uuid.UUID] = mapped_column(
+        GUID(), primary_key=True, default=uuid.uuid4
     )
     name: Mapped[str] = mapped_column(
         String(50), nullable=False, unique=True
@@ -70,8 +73,8 @@ class FriendStatus(Base):
 
     __tablename__ = "FriendStatus"
 
-    id: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    id: Mapped[uuid.UUID] = mapped_column(
+        GUID(), primary_key=True, default=uuid.uuid4
     )
     name: Mapped[str] = mapped_column(
         String(50), nullable=False, unique=True
@@ -84,6 +87,12 @@ class FriendStatus(Base):
 # --- Основные сущности ---
 
 
+# Состояние доставки сообщений пользователю (User.delivery_state)
+DELIVERY_OK = "ok"
+DELIVERY_BLOCKED = "blocked"  # Пользователь заблокировал бота (Forbidden)
+DELIVERY_CHAT_NOT_FOUND = "chat_not_found"  # Чат не найден (BadRequest)
+
+
 class User(Base):
     """
     Модель пользователя.
@@ -91,11 +100,11 @@ class User(Base):
 
     __tablename__ = "User"
 
-    id: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    id: Mapped[uuid.UUID] = mapped_column(
+        GUID(), primary_key=True, default=uuid.uuid4
     )
     telegram_id: Mapped[int] = mapped_column(
-        Integer, unique=True, nullable=False
+        BigInteger, unique=True, nullable=False
     )  # Telegram ID как BIGINT
     username: Mapped[str | None] = mapped_column(String(100))
     first_name: Mapped[str | None] = mapped_column(String(100))
@@ -107,6 +116,13 @@ class User(Base):
     longest_streak: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     timezone: Mapped[str | None] = mapped_column(String(50), default="Europe/Moscow")  # Часовой пояс пользователя
     reminder_frequency: Mapped[str | None] = mapped_column(String(20), default="0")  # Частота напоминаний
+    delivery_state: Mapped[str] = mapped_column(
+        String(20), default=DELIVERY_OK, nullable=False
+    )  # Пользователи с недоставляемыми сообщениями исключаются из напоминаний
+
+    __table_args__ = (
+        Index("idx_user_points", points.desc()),  # Рейтинг по очкам
+    )
 
     # Связи
     # habits = relationship("Habit", back_populates="user", cascade="all, delete-orphan")
@@ -125,16 +141,16 @@ class Habit(Base):
 
     __tablename__ = "Habit"
 
-    id: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    id: Mapped[uuid.UUID] = mapped_column(
+        GUID(), primary_key=True, default=uuid.uuid4
     )
-    user_id: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("User.id"), nullable=False
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        GUID(), ForeignKey("User.id"), nullable=False
     )
     name: Mapped[str] = mapped_column(String(200), nullable=False)
     description: Mapped[str | None] = mapped_column(String(500))
-    schedule_type_id: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("ScheduleType.id"), nullable=False
+    schedule_type_id: Mapped[uuid.UUID] = mapped_column(
+        GUID(), ForeignKey("ScheduleType.id"), nullable=False
     )
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
     color: Mapped[str | None] = mapped_column(String(7))  # HEX цвет, например #FF5733
@@ -146,6 +162,19 @@ class Habit(Base):
     custom_schedule_time: Mapped[str | None] = mapped_column(String(10))  # Время в формате HH:MM
     custom_schedule_frequency: Mapped[int] = mapped_column(Integer, default=1, nullable=False)  # Частота (каждый N день)
     timezone: Mapped[str | None] = mapped_column(String(50), default="Europe/Moscow")  # Часовой пояс пользователя
+    # Скомпилированное расписание (см. app/utils/schedule_utils.py)
+    schedule_weekday_mask: Mapped[int | None] = mapped_column(Integer)  # Биты дней недели, 0 = понедельник
+    schedule_minute: Mapped[int | None] = mapped_column(Integer)  # Время напоминания, минут с начала суток
+    next_due_at: Mapped[DateTime | None] = mapped_column(DateTime)  # Следующее напоминание (UTC)
+
+    __table_args__ = (
+        Index("idx_habit_weekday_mask", "is_active", "schedule_weekday_mask"),
+        Index("idx_habit_schedule_minute", "schedule_minute"),
+        Index("idx_habit_next_due", "next_due_at"),
+        Index("idx_habit_user_id", "user_id"),
+        Index("idx_habit_active_user", "is_active", "user_id"),  # Активные привычки пользователя
+        Index("idx_habit_schedule_type", "schedule_type_id"),
+    )
 
     # Связи
     # user = relationship("User", back_populates="habits")
@@ -161,14 +190,14 @@ class HabitCompletion(Base):
 
     __tablename__ = "HabitCompletion"
 
-    id: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    id: Mapped[uuid.UUID] = mapped_column(
+        GUID(), primary_key=True, default=uuid.uuid4
     )
-    habit_id: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("Habit.id"), nullable=False
+    habit_id: Mapped[uuid.UUID] = mapped_column(
+        GUID(), ForeignKey("Habit.id"), nullable=False
     )
-    user_id: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("User.id"), nullable=False
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        GUID(), ForeignKey("User.id"), nullable=False
     )
     completion_date: Mapped[date] = mapped_column(
         Date, nullable=False
@@ -180,6 +209,10 @@ class HabitCompletion(Base):
     # Уникальность: одна привычка не может быть отмечена дважды в один день
     __table_args__ = (
         UniqueConstraint("habit_id", "completion_date", name="_habit_date_uc"),
+        # Отметка привычки за дату (серии, выполненные сегодня) - без чтения таблицы
+        Index("idx_completion_habit_date", "habit_id", "completion_date", "is_completed"),
+        Index("idx_completion_user_date", "user_id", "completion_date"),  # Отметки пользователя за период
+        Index("idx_completion_date", "completion_date"),
     )
 
 
@@ -190,19 +223,23 @@ class Reward(Base):
 
     __tablename__ = "Reward"
 
-    id: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    id: Mapped[uuid.UUID] = mapped_column(
+        GUID(), primary_key=True, default=uuid.uuid4
     )
-    user_id: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("User.id"), nullable=False
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        GUID(), ForeignKey("User.id"), nullable=False
     )
-    reward_type_id: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("RewardType.id"), nullable=False
+    reward_type_id: Mapped[uuid.UUID] = mapped_column(
+        GUID(), ForeignKey("RewardType.id"), nullable=False
     )
     name: Mapped[str] = mapped_column(String(200), nullable=False)
     description: Mapped[str | None] = mapped_column(String(500))
     awarded_at: Mapped[DateTime | None] = mapped_column(DateTime)
 
+    __table_args__ = (
+        Index("idx_reward_user_id", "user_id"),
+    )
+
     # Связи
     # user = relationship("User", back_populates="rewards")
     # reward_type = relationship("RewardType", back_populates="rewards")
@@ -215,17 +252,17 @@ class Friend(Base):
 
     __tablename__ = "Friend"
 
-    id: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    id: Mapped[uuid.UUID] = mapped_column(
+        GUID(), primary_key=True, default=uuid.uuid4
     )
-    user_id: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("User.id"), nullable=False
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        GUID(), ForeignKey("User.id"), nullable=False
     )  # Кто отправил запрос
-    friend_id: Mapped[UUID | None] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("User.id")
+    friend_id: Mapped[uuid.UUID | None] = mapped_column(
+        GUID(), ForeignKey("User.id")
     )  # Кого добавили (NULL, если запрос не принят)
-    friend_status_id: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("FriendStatus.id"), nullable=False
+    friend_status_id: Mapped[uuid.UUID] = mapped_column(
+        GUID(), ForeignKey("FriendStatus.id"), nullable=False
     )
     created_at: Mapped[DateTime | None] = mapped_column(DateTime)
 
@@ -242,8 +279,8 @@ class Challenge(Base):
 
     __tablename__ = "Challenge"
 
-    id: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    id: Mapped[uuid.UUID] = mapped_column(
+        GUID(), primary_key=True, default=uuid.uuid4
     )
     name: Mapped[str] = mapped_column(String(200), nullable=False)
     description: Mapped[str | None] = mapped_column(String(500))
@@ -267,18 +304,22 @@ class ChallengeParticipant(Base):
 
     __tablename__ = "ChallengeParticipant"
 
-    id: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    id: Mapped[uuid.UUID] = mapped_column(
+        GUID(), primary_key=True, default=uuid.uuid4
     )
-    challenge_id: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("Challenge.id"), nullable=False
+    challenge_id: Mapped[uuid.UUID] = mapped_column(
+        GUID(), ForeignKey("Challenge.id"), nullable=False
     )
-    user_id: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("User.id"), nullable=False
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        GUID(), ForeignKey("User.id"), nullable=False
     )
     progress: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     completed: Mapped[bool] = mapped_column(Boolean, default=False)
 
+    __table_args__ = (
+        Index("idx_participant_challenge", "challenge_id", "completed"),
+    )
+
     # Связи
     # challenge = relationship("Challenge", back_populates="participants")
     # user = relationship("User", back_populates="challenge_participations")
@@ -291,21 +332,28 @@ class Notification(Base):
 
     __tablename__ = "Notification"
 
-    id: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    id: Mapped[uuid.UUID] = mapped_column(
+        GUID(), primary_key=True, default=uuid.uuid4
     )
-    user_id: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("User.id"), nullable=False
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        GUID(), ForeignKey("User.id"), nullable=False
     )
-    habit_id: Mapped[UUID | None] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("Habit.id")
+    habit_id: Mapped[uuid.UUID | None] = mapped_column(
+        GUID(), ForeignKey("Habit.id")
     )  # Может быть NULL
-    challenge_id: Mapped[UUID | None] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("Challenge.id")
+    challenge_id: Mapped[uuid.UUID | None] = mapped_column(
+        GUID(), ForeignKey("Challenge.id")
     )  # Может быть NULL
-    notification_time: Mapped[DateTime | None] = mapped_column(DateTime)
+    notification_time: Mapped[DateTime | None] = mapped_column(DateTime)  # Время отправки (UTC)
     is_sent: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     message: Mapped[str | None] = mapped_column(String(500))
+    claimed_at: Mapped[DateTime | None] = mapped_column(DateTime)  # Захвачено диспетчером для отправки (UTC)
+    expired_at: Mapped[DateTime | None] = mapped_column(DateTime)  # Устарело и не будет отправлено (UTC)
+
+    # Индекс для выборки неотправленных уведомлений диспетчером
+    __table_args__ = (
+        Index("idx_notification_pending", "is_sent", "notification_time"),
+    )
 
     # Связи
     # user = relationship("User", back_populates="notifications")
@@ -313,6 +361,65 @@ class Notification(Base):
     # challenge = relationship("Challenge", back_populates="participants") # Связь с Challenge, а не с ChallengeParticipant
 
 
+class ReminderLedger(Base):
+    """
+    Журнал отправленных напоминаний.
+    Одна запись на привычку, локальную дату и слот (минуту суток в часовом поясе привычки),
+    чтобы перезапуск или пересекающиеся проверки не отправляли напоминание повторно.
+    """
+
+    __tablename__ = "ReminderLedger"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(GUID(), primary_key=True)
+    habit_id: Mapped[uuid.UUID] = mapped_column(GUID(), primary_key=True)
+    local_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    slot: Mapped[int] = mapped_column(Integer, primary_key=True)  # Минута суток, 0..1439
+    sent_at: Mapped[DateTime | None] = mapped_column(DateTime)  # UTC
+
+    # Индекс для загрузки кэша за дату и очистки старых записей
+    __table_args__ = (
+        Index("idx_reminder_ledger_date", "local_date"),
+    )
+
+
+class SchedulerLease(Base):
+    """
+    Аренда (lease) для выбора ведущего экземпляра планировщика.
+    Задачи выполняет только экземпляр, удерживающий непросроченную аренду.
+    """
+
+    __tablename__ = "SchedulerLease"
+
+    name: Mapped[str] = mapped_column(String(100), primary_key=True)  # Название аренды
+    holder: Mapped[str] = mapped_column(String(200), nullable=False)  # Идентификатор экземпляра
+    expires_at: Mapped[DateTime] = mapped_column(DateTime, nullable=False)  # UTC
+    heartbeat_at: Mapped[DateTime | None] = mapped_column(DateTime)  # UTC
+
+
+class SchedulerCheckpoint(Base):
+    """
+    Время последней завершенной проверки планировщика (для догоняющего режима).
+    """
+
+    __tablename__ = "SchedulerCheckpoint"
+
+    name: Mapped[str] = mapped_column(String(100), primary_key=True)  # Название проверки
+    last_tick_at: Mapped[DateTime] = mapped_column(DateTime, nullable=False)  # UTC
+
+
+class SchedulerWorker(Base):
+    """
+    Участник шардирования напоминаний.
+    Живые воркеры (с недавним heartbeat_at) делят пользователей по hash(user_id) % N.
+    """
+
+    __tablename__ = "SchedulerWorker"
+
+    worker_id: Mapped[str] = mapped_column(String(200), primary_key=True)
+    heartbeat_at: Mapped[DateTime] = mapped_column(DateTime, nullable=False)  # UTC
+    started_at: Mapped[DateTime | None] = mapped_column(DateTime)  # UTC
+
+
 class BugReport(Base):
     """
     Модель отчета об ошибке.
@@ -320,11 +427,11 @@ class BugReport(Base):
 
     __tablename__ = "BugReport"
 
-    id: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    id: Mapped[uuid.UUID] = mapped_column(
+        GUID(), primary_key=True, default=uuid.uuid4
     )
-    user_id: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("User.id"), nullable=False
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        GUID(), ForeignKey("User.id"), nullable=False
     )
     title: Mapped[str] = mapped_column(String(200), nullable=False)
     description: Mapped[str] = mapped_column(String(2000), nullable=False)
@@ -334,5 +441,10 @@ class BugReport(Base):
     created_at: Mapped[DateTime | None] = mapped_column(DateTime)
     updated_at: Mapped[DateTime | None] = mapped_column(DateTime)
 
+    __table_args__ = (
+        Index("idx_bugreport_user_id", "user_id"),
+        Index("idx_bugreport_status_created", "status", "created_at"),  # Отчеты по статусу, новые первыми
+    )
+
     # Связи
     # user = relationship("User", back_populates="bug_reports")
\ No newline at end of file
@@ -287,6 +287,8 @@ class NotificationUpdate(BaseSchema):
 
 class Notification(NotificationBase):
     id: UUID
+    claimed_at: Optional[datetime] = None  # Захвачено диспетчером outbox
+    expired_at: Optional[datetime] = None  # Устарело и не отправлено
     user: Optional[User] = None  # Опционально
     habit: Optional[Habit] = None  # Опционально
     # challenge: Optional[Challenge] = None # Опционально
@@ -0,0 +1,71 @@
+"""
+Переносимые типы колонок для моделей.
+"""
+
+import uuid
+
+from sqlalchemy import LargeBinary
+from sqlalchemy.dialects.postgresql import UUID as PostgresUUID
+from sqlalchemy.types import TypeDecorator
+
+
+def uuid_bytes(value):
+    """
+    16 байт UUID из uuid.UUID, строки (32 символа или с дефисами) или самих байт.
+    """
+    if value is None:
+        return None
+    if isinstance(value, uuid.UUID):
+        return value.bytes
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        value = bytes(value)
+        if len(value) == 16:
+            return value
+        value = value.decode("ascii")
+    return uuid.UUID(str(value)).bytes
+
+
+class GUID(TypeDecorator):
+    """
+    UUID: в PostgreSQL - нативный uuid, в остальных базах (SQLite) - 16 байт BLOB.
+
+    Текстовый UUID в SQLite занимает 32-36 байт в строке и еще столько же в каждом
+    индексе, где он встречается. Значения в Python всегда uuid.UUID; при чтении
+    понимаются и старые текстовые значения, но искать их по ключу нельзя -
+    существующие базы переводятся миграцией 0010_compact_uuid_storage.
+    """
+
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(PostgresUUID(as_uuid=True))
+        return dialect.type_descriptor(LargeBinary(16))
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if dialect.name == "postgresql":
+            return value if isinstance(value, uuid.UUID) else uuid.UUID(bytes=uuid_bytes(value))
+        return uuid_bytes(value)
+
+    def literal_processor(self, dialect):
+        # Для EXPLAIN и alembic --sql: X'...' в SQLite, '...'::uuid в PostgreSQL
+        postgresql = dialect.name == "postgresql"
+
+        def process(value):
+            if postgresql:
+                return f"'{uuid.UUID(bytes=uuid_bytes(value))}'::uuid"
+            return f"X'{uuid_bytes(value).hex()}'"
+
+        return process
+
+    def process_result_value(self, value, dialect):
+        if value is None or isinstance(value, uuid.UUID):
+            return value
+        return uuid.UUID(bytes=uuid_bytes(value))
+
+    @property
+    def python_type(self):
+        return uuid.UUID
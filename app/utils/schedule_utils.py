@@ -0,0 +1,226 @@
+"""
+Утилиты для компиляции расписания привычек.
+Строковые поля расписания ("пн,ср,пт", "HH:MM") один раз переводятся в целые числа,
+которые хранятся в Habit и сравниваются прямо в SQL.
+"""
+
+import hashlib
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional, Tuple
+from app.utils.timezone_utils import get_user_timezone, parse_habit_days
+
+# Маска "каждый день": биты 0..6 соответствуют дням с понедельника по воскресенье
+ALL_WEEKDAYS_MASK = 0b1111111
+
+MINUTES_PER_DAY = 24 * 60
+# Допустимое отклонение от времени привычки (как в is_habit_time_now)
+REMINDER_TOLERANCE_MINUTES = 5
+# Точка отсчета "каждый N день" для привычек без даты создания (понедельник)
+SCHEDULE_EPOCH = date(2000, 1, 3)
+
+
+def weekday_bit(weekday: int) -> int:
+    """
+    Возвращает бит дня недели (0 = понедельник).
+    """
+    return 1 << weekday
+
+
+def reminder_jitter_minutes(user_id, window: Optional[int] = None) -> int:
+    """
+    Постоянный сдвиг напоминаний пользователя в минутах: от 0 до window - 1
+    (по умолчанию window = REMINDER_JITTER_WINDOW_MINUTES).
+    Хеш стабилен между процессами и не связан с номером шарда (shard_of).
+    """
+    if window is None:
+        from app.core.config import settings
+        window = settings.REMINDER_JITTER_WINDOW_MINUTES
+    if window <= 1 or user_id is None:
+        return 0
+    if not isinstance(user_id, uuid.UUID):
+        user_id = uuid.UUID(str(user_id))
+    digest = hashlib.blake2b(user_id.bytes, digest_size=8).digest()
+    return int.from_bytes(digest, "little") % window
+
+
+def parse_habit_time(habit_time: str) -> Optional[int]:
+    """
+    Преобразует время "HH:MM" в количество минут с начала суток.
+    Возвращает None, если строку не удалось разобрать.
+    """
+    try:
+        hour, minute = map(int, habit_time.strip().split(':'))
+    except (ValueError, AttributeError):
+        return None
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        return None
+    return hour * 60 + minute
+
+
+@dataclass(frozen=True)
+class CompiledSchedule:
+    """
+    Расписание привычки в целочисленном виде.
+    """
+
+    weekday_mask: int  # Дни недели, в которые привычка выполняется
+    minute: Optional[int]  # Время напоминания в минутах с начала суток
+    frequency: int  # Частота (каждый N день)
+
+    def is_due_on(self, weekday: int) -> bool:
+        return bool(self.weekday_mask & weekday_bit(weekday))
+
+    def is_due_on_date(self, day: date, anchor: Optional[date] = None) -> bool:
+        """
+        Проверяет день недели и частоту "каждый N день" (считая от anchor).
+        """
+        return self.is_due_on(day.weekday()) and matches_day_frequency(day, self.frequency, anchor)
+
+
+def matches_day_frequency(day: date, frequency: Optional[int], anchor: Optional[date] = None) -> bool:
+    """
+    Проверяет, приходится ли день на расписание "каждый N день", отсчитываемое от anchor.
+    """
+    if not frequency or frequency <= 1:
+        return True
+    return (day - (anchor or SCHEDULE_EPOCH)).days % frequency == 0
+
+
+def compile_schedule(
+    schedule_type: str,
+    custom_schedule_days: Optional[str] = None,
+    custom_schedule_time: Optional[str] = None,
+    custom_schedule_frequency: Optional[int] = 1,
+) -> CompiledSchedule:
+    """
+    Компилирует расписание привычки по правилам проверки "выполняется ли сегодня":
+    daily - каждый день, weekly - по понедельникам, custom - по указанным дням
+    (без дней - каждый день).
+    """
+    if schedule_type == "weekly":
+        weekday_mask = weekday_bit(0)
+    elif schedule_type == "custom" and custom_schedule_days:
+        weekday_mask = 0
+        for weekday in parse_habit_days(custom_schedule_days):
+            weekday_mask |= weekday_bit(weekday)
+    else:
+        weekday_mask = ALL_WEEKDAYS_MASK
+
+    # "Каждый N день" задается только для custom расписания
+    frequency = (custom_schedule_frequency or 1) if schedule_type == "custom" else 1
+
+    minute = parse_habit_time(custom_schedule_time) if custom_schedule_time else None
+    return CompiledSchedule(weekday_mask, minute, frequency)
+
+
+def next_frequency_fire(reminder_frequency: Optional[str], start: datetime) -> Optional[datetime]:
+    """
+    Возвращает первую UTC-минуту не раньше start, в которую срабатывает частота
+    напоминаний пользователя (те же правила, что в reminder_frequency_matches).
+    start должен быть выровнен по минуте. None - частота никогда не срабатывает.
+    """
+    frequency = reminder_frequency or "0"
+
+    if frequency.startswith("*/"):
+        try:
+            interval = abs(int(frequency[2:]))
+        except ValueError:
+            return None
+        if interval == 0:
+            return None
+        minute = -(-start.minute // interval) * interval
+        if minute < 60:
+            return start.replace(minute=minute)
+        return start.replace(minute=0) + timedelta(hours=1)
+
+    if frequency in ("daily_start", "daily_end"):
+        hour = 0 if frequency == "daily_start" else 18
+        fire = start.replace(hour=hour, minute=0)
+        return fire if fire >= start else fire + timedelta(days=1)
+
+    # "0" и все остальные значения - каждый час в начале часа
+    if start.minute == 0:
+        return start
+    return start.replace(minute=0) + timedelta(hours=1)
+
+
+def _local_minute_to_utc(day: date, minute: int, tz) -> datetime:
+    local = datetime.combine(day, time(minute // 60, minute % 60), tzinfo=tz)
+    return local.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def compute_next_due_at(
+    schedule: CompiledSchedule,
+    habit_timezone: Optional[str],
+    reminder_frequency: Optional[str],
+    after: datetime,
+    anchor: Optional[date] = None,
+    skip_date: Optional[date] = None,
+    jitter_minutes: int = 0,
+) -> Optional[datetime]:
+    """
+    Вычисляет следующий момент напоминания о привычке (UTC, без tzinfo) строго после after.
+    Правила - в compute_next_due_window.
+    """
+    window = compute_next_due_window(
+        schedule, habit_timezone, reminder_frequency, after, anchor, skip_date, jitter_minutes
+    )
+    return window[0] if window is not None else None
+
+
+def compute_next_due_window(
+    schedule: CompiledSchedule,
+    habit_timezone: Optional[str],
+    reminder_frequency: Optional[str],
+    after: datetime,
+    anchor: Optional[date] = None,
+    skip_date: Optional[date] = None,
+    jitter_minutes: int = 0,
+) -> Optional[Tuple[datetime, datetime]]:
+    """
+    Вычисляет следующий момент напоминания о привычке строго после after и конец
+    окна, в котором он лежит: (момент, конец окна), UTC без tzinfo. Следующие
+    срабатывания частоты до конца окна тоже являются моментами напоминания.
+
+    Напоминание приходит в минуту, когда срабатывает частота напоминаний пользователя:
+    для привычки со временем - в окне допуска вокруг него, без времени - в любую минуту
+    подходящего дня. Дни проверяются по маске и частоте "каждый N день"; skip_date
+    (локальная дата, например день выполнения) пропускается.
+    jitter_minutes сдвигает напоминания пользователя на столько минут позже
+    (reminder_jitter_minutes): срабатывания частоты и окно привычки со временем.
+    День без времени остается календарным, как в проверке "выполняется ли сегодня".
+    Возвращает None, если напоминание никогда не сработает.
+    """
+    tz = get_user_timezone(habit_timezone)
+    shift = timedelta(minutes=jitter_minutes)
+    start = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    local_day = start.replace(tzinfo=timezone.utc).astimezone(tz).date()
+
+    if schedule.minute is None:
+        first_minute, last_minute = 0, MINUTES_PER_DAY - 1
+        window_shift = timedelta()
+    else:
+        # Окно не переходит через полночь, как и в is_habit_time_now
+        first_minute = max(0, schedule.minute - REMINDER_TOLERANCE_MINUTES)
+        last_minute = min(MINUTES_PER_DAY - 1, schedule.minute + REMINDER_TOLERANCE_MINUTES)
+        window_shift = shift
+
+    # Сочетание дней недели и "каждый N день" повторяется не реже чем раз в 7 * N дней;
+    # сдвинутое окно предыдущего дня может заходить на текущий
+    for offset in range(-1 if jitter_minutes else 0, 7 * max(schedule.frequency, 1) + 1):
+        day = local_day + timedelta(days=offset)
+        if day == skip_date or not schedule.is_due_on_date(day, anchor):
+            continue
+        window_start = _local_minute_to_utc(day, first_minute, tz) + window_shift
+        window_end = _local_minute_to_utc(day, last_minute, tz) + window_shift
+        if window_end < start:
+            continue
+        fire = next_frequency_fire(reminder_frequency, max(start, window_start) - shift)
+        if fire is None:
+            return None
+        fire += shift
+        if fire <= window_end:
+            return fire, window_end
+    return None
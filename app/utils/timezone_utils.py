@@ -2,23 +2,85 @@
 Утилиты для работы с часовыми поясами.
 """
 
-from datetime import datetime, time
+from datetime import datetime, time, timezone
+from functools import lru_cache
 from zoneinfo import ZoneInfo
-from typing import Optional
+from typing import Dict, FrozenSet, Optional
+from app.core import clock
+
+DEFAULT_TIMEZONE = "Europe/Moscow"
+
+WEEKDAY_NAMES = ["пн", "вт", "ср", "чт", "пт", "сб", "вс"]
+
+
+@lru_cache(maxsize=None)
+def _load_timezone(user_timezone: str) -> ZoneInfo:
+    try:
+        return ZoneInfo(user_timezone)
+    except Exception:
+        # Если часовой пояс неверный, используем Moscow
+        return ZoneInfo(DEFAULT_TIMEZONE)
 
 
 def get_user_timezone(user_timezone: Optional[str] = None) -> ZoneInfo:
     """
     Возвращает объект часового пояса пользователя.
     По умолчанию используется Europe/Moscow.
+    Объекты кэшируются по названию пояса.
+    """
+    return _load_timezone(user_timezone or DEFAULT_TIMEZONE)
+
+
+@lru_cache(maxsize=1024)
+def parse_habit_days(habit_days: str) -> FrozenSet[int]:
+    """
+    Преобразует дни недели "пн,вт,ср" в множество номеров (0 = понедельник).
+    Неизвестные названия пропускаются.
+    """
+    return frozenset(
+        WEEKDAY_NAMES.index(day)
+        for day in (part.strip() for part in habit_days.split(','))
+        if day in WEEKDAY_NAMES
+    )
+
+
+class ZoneClock:
     """
-    if user_timezone:
-        try:
-            return ZoneInfo(user_timezone)
-        except Exception:
-            # Если часовой пояс неверный, используем Moscow
-            pass
-    return ZoneInfo("Europe/Moscow")
+    Текущее время в часовых поясах для одного момента (одного тика планировщика).
+    Локальное время каждого пояса вычисляется один раз, сколько бы привычек в нем ни было.
+    """
+
+    def __init__(self, now_utc: Optional[datetime] = None):
+        self.now_utc = now_utc or clock.now(timezone.utc)
+        self._local: Dict[Optional[str], datetime] = {}
+
+    def local(self, user_timezone: Optional[str] = None) -> datetime:
+        """
+        Локальное время в часовом поясе.
+        """
+        local = self._local.get(user_timezone)
+        if local is None:
+            local = self._local[user_timezone] = self.now_utc.astimezone(get_user_timezone(user_timezone))
+        return local
+
+    def weekday(self, user_timezone: Optional[str] = None) -> int:
+        """
+        Текущий день недели в часовом поясе (0 = понедельник).
+        """
+        return self.local(user_timezone).weekday()
+
+    def minute_of_day(self, user_timezone: Optional[str] = None) -> int:
+        """
+        Текущая минута суток в часовом поясе.
+        """
+        local = self.local(user_timezone)
+        return local.hour * 60 + local.minute
+
+    def is_habit_day(self, habit_days: str, user_timezone: Optional[str] = None) -> bool:
+        """
+        Проверяет, входит ли текущий день недели пояса в дни привычки.
+        """
+        return self.weekday(user_timezone) in parse_habit_days(habit_days)
 
 
 def convert_time_to_utc(time_str: str, user_timezone: Optional[str] = None) -> time:
@@ -39,7 +101,7 @@ def convert_time_to_utc(time_str: str, user_timezone: Optional[str] = None) -> t
     user_time = time(hour, minute)
     
     # Создаем datetime с сегодняшней датой в часовом поясе пользователя
-    today = datetime.now(user_tz).date()
+    today = clock.now(user_tz).date()
     user_datetime = datetime.combine(today, user_time).replace(tzinfo=user_tz)
     
     # Конвертируем в UTC
@@ -53,7 +115,7 @@ def get_current_time_in_user_timezone(user_timezone: Optional[str] = None) -> da
     Возвращает текущее время в часовом поясе пользователя.
     """
     user_tz = get_user_timezone(user_timezone)
-    return datetime.now(user_tz)
+    return clock.now(user_tz)
 
 
 def is_habit_time_now(habit_time: str, user_timezone: Optional[str] = None, tolerance_minutes: int = 5) -> bool:
@@ -68,16 +130,12 @@ def is_habit_time_now(habit_time: str, user_timezone: Optional[str] = None, tole
     Returns:
         bool: True, если время наступило
     """
-    user_tz = get_user_timezone(user_timezone)
-    current_time = datetime.now(user_tz)
-    
     # Парсим время привычки
     hour, minute = map(int, habit_time.split(':'))
     habit_time_obj = time(hour, minute)
-    current_time_obj = current_time.time()
     
     # Вычисляем разность в минутах
-    current_minutes = current_time_obj.hour * 60 + current_time_obj.minute
+    current_minutes = ZoneClock().minute_of_day(user_timezone)
     habit_minutes = habit_time_obj.hour * 60 + habit_time_obj.minute
     
     diff_minutes = abs(current_minutes - habit_minutes)
@@ -90,8 +148,7 @@ def get_weekday_name(weekday_number: int) -> str:
     Возвращает название дня недели по номеру.
     0 = понедельник, 6 = воскресенье
     """
-    weekdays = ["пн", "вт", "ср", "чт", "пт", "сб", "вс"]
-    return weekdays[weekday_number] if 0 <= weekday_number <= 6 else "неизвестно"
+    return WEEKDAY_NAMES[weekday_number] if 0 <= weekday_number <= 6 else "неизвестно"
 
 
 def is_habit_day_today(habit_days: str, user_timezone: Optional[str] = None) -> bool:
@@ -105,12 +162,4 @@ def is_habit_day_today(habit_days: str, user_timezone: Optional[str] = None) ->
     Returns:
         bool: True, если сегодня день для привычки
     """
-    user_tz = get_user_timezone(user_timezone)
-    current_weekday = datetime.now(user_tz).weekday()  # 0 = понедельник, 6 = воскресенье
-    
-    # Преобразуем в русские названия
-    current_day_name = get_weekday_name(current_weekday)
-    
-    # Проверяем, есть ли сегодняшний день в списке дней привычки
-    habit_days_list = [day.strip() for day in habit_days.split(',')]
-    return current_day_name in habit_days_list
+    return ZoneClock().is_habit_day(habit_days, user_timezone)
@@ -0,0 +1,183 @@
+"""
+Бенчмарк еженедельного расчета челленджей.
+
+Заполняет временную базу SQLite участниками недельных челленджей и их отметками
+выполнения за неделю, затем запускает settle_challenges и проверяет результат
+по тем же данным, посчитанным в Python: прогресс, победители, очки, бейджи и уровни.
+Повторный запуск не должен начислять награды еще раз.
+
+Запуск:
+    python benchmark_challenge_settlement.py
+    python benchmark_challenge_settlement.py --participants 100000 --challenges 5
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from app.models.database import (
+    Base, User, Habit, HabitCompletion, ScheduleType, RewardType, Reward, Challenge, ChallengeParticipant,
+)
+from app.bot.services.challenge_service import settle_challenges, POINTS_PER_LEVEL
+
+HABITS_PER_USER = 2
+CHUNK_SIZE = 10_000
+
+
+async def insert_chunked(conn, model, rows):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        await conn.execute(insert(model), rows[start:start + CHUNK_SIZE])
+
+
+async def seed_database(engine, participants_count: int, challenges_count: int, week_start: date, seed: int):
+    """
+    Заполняет базу и возвращает ожидаемые (победители, очки, бейджи, уровни).
+    """
+    rnd = random.Random(seed)
+    week = [week_start + timedelta(days=offset) for offset in range(7)]
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+        schedule_type_id = uuid.uuid4()
+        await conn.execute(insert(ScheduleType), [{"id": schedule_type_id, "name": "daily"}])
+        await conn.execute(insert(RewardType), [
+            {"id": uuid.uuid4(), "name": name} for name in ("badge", "level", "challenge")
+        ])
+
+        challenges = [
+            {
+                "id": uuid.uuid4(),
+                "name": f"Неделя {i}",
+                "start_date": week[0],
+                "end_date": week[-1],
+                "points_reward": rnd.choice((30, 50, 120)),
+                "badge_reward": f"Бейдж {i}" if i % 2 == 0 else None,
+                "challenge_type": "weekly",
+            }
+            for i in range(challenges_count)
+        ]
+        await conn.execute(insert(Challenge), challenges)
+
+        users_count = max(1, participants_count // 2)
+        users = [
+            {"id": uuid.uuid4(), "telegram_id": 10_000 + i, "first_name": f"user{i}", "points": rnd.randrange(200)}
+            for i in range(users_count)
+        ]
+        await insert_chunked(conn, User, users)
+
+        habits, completions, user_days = [], [], {}
+        for user in users:
+            habit_ids = [uuid.uuid4() for _ in range(HABITS_PER_USER)]
+            habits.extend(
+                {"id": habit_id, "user_id": user["id"], "name": "habit", "schedule_type_id": schedule_type_id}
+                for habit_id in habit_ids
+            )
+            # Половина пользователей выполняет привычки всю неделю
+            share = 1.0 if rnd.random() < 0.5 else 0.6
+            days = set()
+            for day in week:
+                for habit_id in habit_ids:
+                    if rnd.random() < share:
+                        days.add(day)
+                        completions.append({
+                            "id": uuid.uuid4(), "habit_id": habit_id, "user_id": user["id"],
+                            "completion_date": day, "is_completed": True,
+                        })
+            user_days[user["id"]] = len(days)
+        await insert_chunked(conn, Habit, habits)
+        await insert_chunked(conn, HabitCompletion, completions)
+
+        participants = [
+            {
+                "id": uuid.uuid4(),
+                # Пользователь участвует в разных челленджах
+                "challenge_id": challenges[(i + i // users_count) % challenges_count]["id"],
+                "user_id": users[i % users_count]["id"],
+                "progress": 0,
+                "completed": False,
+            }
+            for i in range(participants_count)
+        ]
+        await insert_chunked(conn, ChallengeParticipant, participants)
+
+    # Ожидаемый результат
+    by_id = {challenge["id"]: challenge for challenge in challenges}
+    gains, badges, winners = {}, set(), 0
+    for participant in participants:
+        if user_days[participant["user_id"]] < len(week):
+            continue
+        winners += 1
+        challenge = by_id[participant["challenge_id"]]
+        gains[participant["user_id"]] = gains.get(participant["user_id"], 0) + challenge["points_reward"]
+        if challenge["badge_reward"]:
+            badges.add((participant["user_id"], challenge["badge_reward"]))
+    points = {user["id"]: user["points"] for user in users}
+    level_ups = sum(
+        1 for user_id, gain in gains.items()
+        if (points[user_id] + gain) // POINTS_PER_LEVEL + 1 > 1
+    )
+    return winners, sum(gains.values()), len(badges), level_ups
+
+
+async def run(participants_count: int, challenges_count: int, seed: int):
+    week_start = date.today() - timedelta(days=date.today().weekday() + 7)
+    settle_day = week_start + timedelta(days=7)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp_dir, 'bench.db')}")
+        counter = {"queries": 0}
+
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            counter["queries"] += 1
+
+        started = time.perf_counter()
+        expected = await seed_database(engine, participants_count, challenges_count, week_start, seed)
+        print(f"Участников: {participants_count}, челленджей: {challenges_count}, "
+              f"заполнение базы {time.perf_counter() - started:.1f} с")
+
+        session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        for attempt in ("первый", "повторный"):
+            async with session_factory() as db:
+                counter["queries"] = 0
+                started = time.perf_counter()
+                result = await settle_challenges(db, settle_day)
+                elapsed = time.perf_counter() - started
+            print(f"{attempt:>10} запуск: {elapsed:.2f} с, запросов {counter['queries']}, "
+                  f"прогресс {result.participants_updated}, победителей {result.winners}, "
+                  f"очков {result.points_awarded}, бейджей {result.badges_awarded}, уровней {result.level_ups}")
+            if attempt == "первый":
+                actual = (result.winners, result.points_awarded, result.badges_awarded, result.level_ups)
+                status = "совпадает" if actual == expected else f"НЕ совпадает, ожидалось {expected}"
+                print(f"Проверка по данным в Python: {status}")
+
+        async with session_factory() as db:
+            completed = (await db.execute(
+                select(func.count()).select_from(ChallengeParticipant).where(ChallengeParticipant.completed == True)
+            )).scalar_one()
+            rewards = (await db.execute(select(func.count()).select_from(Reward))).scalar_one()
+        print(f"Выполненных участий: {completed}, наград в базе: {rewards}")
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк еженедельного расчета челленджей")
+    parser.add_argument("--participants", type=int, default=100_000, help="Число участников")
+    parser.add_argument("--challenges", type=int, default=5, help="Число челленджей")
+    parser.add_argument("--seed", type=int, default=1, help="Зерно генератора данных")
+    args = parser.parse_args()
+    asyncio.run(run(args.participants, args.challenges, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Бенчмарк колеса таймеров напоминаний.
+
+Сравнивает поминутную проверку всех привычек (как при запуске задачи по
+CronTrigger(minute="*")) с колесом таймеров ReminderWheel, в котором каждая
+привычка лежит в слоте минуты своего следующего напоминания. Замеряются
+построение, стоимость одной минуты, вставка и отмена записи и прирост памяти процесса.
+База данных не используется: строки привычек генерируются в памяти.
+
+Запуск:
+    python benchmark_timing_wheel.py
+    python benchmark_timing_wheel.py --habits 100000 --scan-minutes 30 --wheel-minutes 1440
+"""
+
+import argparse
+import os
+import random
+import resource
+import sys
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.reminder_timetable import reminder_frequency_matches
+from app.core.timing_wheel import ReminderWheel, TimingWheel, minute_index
+from app.utils.schedule_utils import REMINDER_TOLERANCE_MINUTES, compile_schedule
+from app.utils.timezone_utils import ZoneClock
+
+HABITS_PER_USER = 4
+TIMEZONES = ("Europe/Moscow", "Europe/London", "America/New_York", "Asia/Tokyo")
+FREQUENCIES = ("0", "*/10", "*/15", "*/30", "daily_end", None)
+
+# Поля совпадают с _schedule_query из habit_service
+HabitRow = namedtuple(
+    "HabitRow",
+    "id user_id next_due_at timezone created_at schedule_weekday_mask schedule_minute "
+    "custom_schedule_days custom_schedule_time custom_schedule_frequency schedule_type reminder_frequency",
+)
+
+
+def generate_rows(habits_count: int):
+    """
+    Генерирует строки привычек с разными расписаниями, временем и частотой напоминаний.
+    """
+    rnd = random.Random(habits_count)
+    users = [
+        (uuid.uuid4(), rnd.choice(FREQUENCIES))
+        for _ in range(max(1, habits_count // HABITS_PER_USER))
+    ]
+    rows = []
+    for i in range(habits_count):
+        user_id, frequency = users[i % len(users)]
+        schedule_type = rnd.choice(("daily", "weekly", "custom"))
+        days = rnd.choice((None, "пн,ср,пт", "вт,чт,сб,вс")) if schedule_type == "custom" else None
+        habit_time = (
+            f"{rnd.randrange(24):02d}:{rnd.randrange(60):02d}"
+            if schedule_type == "custom" and rnd.random() < 0.7
+            else None
+        )
+        schedule = compile_schedule(schedule_type, days, habit_time, 1)
+        rows.append(HabitRow(
+            uuid.uuid4(), user_id, None, rnd.choice(TIMEZONES), None,
+            schedule.weekday_mask, schedule.minute, days, habit_time, 1, schedule_type, frequency,
+        ))
+    return rows
+
+
+def scan_minute(rows, moment: datetime) -> int:
+    """
+    Поминутная проверка: частота напоминаний, время и день каждой привычки.
+    """
+    clock = ZoneClock(moment)
+    due = 0
+    for row in rows:
+        if not reminder_frequency_matches(row.reminder_frequency, moment.hour, moment.minute):
+            continue
+        if row.schedule_minute is not None:
+            if abs(clock.minute_of_day(row.timezone) - row.schedule_minute) > REMINDER_TOLERANCE_MINUTES:
+                continue
+        if row.schedule_weekday_mask & (1 << clock.weekday(row.timezone)):
+            due += 1
+    return due
+
+
+def build_wheel(rows, start: datetime) -> ReminderWheel:
+    """
+    Строит колесо из строк так же, как ReminderWheel.load из базы данных.
+    """
+    wheel = ReminderWheel()
+    wheel.wheel = TimingWheel(minute_index(start))
+    for row in rows:
+        wheel._add_row(row)
+    wheel.is_loaded = True
+    return wheel
+
+
+def run(habits_count: int, scan_minutes: int, wheel_minutes: int):
+    start = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    rows = generate_rows(habits_count)
+    print(f"Привычек: {habits_count}, пользователей: {len({row.user_id for row in rows})}")
+
+    # Поминутная проверка всех привычек
+    scan_due = 0
+    started = time.perf_counter()
+    for offset in range(scan_minutes):
+        scan_due += scan_minute(rows, start + timedelta(minutes=offset))
+    scan_tick = (time.perf_counter() - started) / scan_minutes
+
+    # Колесо таймеров
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    wheel = build_wheel(rows, start)
+    build_seconds = time.perf_counter() - started
+    # Прирост пикового RSS процесса (ru_maxrss в КБ на Linux)
+    wheel_memory = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) * 1024
+
+    wheel_due = {}
+    started = time.perf_counter()
+    for offset in range(wheel_minutes):
+        for moment, due_habits in wheel.advance(start + timedelta(minutes=offset)):
+            wheel_due[moment] = sum(len(habits) for habits in due_habits.values())
+    wheel_tick = (time.perf_counter() - started) / wheel_minutes
+    wheel_scan_due = sum(
+        count for moment, count in wheel_due.items() if moment < start + timedelta(minutes=scan_minutes)
+    )
+
+    # Вставка и отмена отдельной записи
+    timing = TimingWheel(minute_index(start))
+    keys = [uuid.uuid4() for _ in range(habits_count)]
+    rnd = random.Random(1)
+    minutes = [timing.cursor + rnd.randrange(7 * 1440) for _ in keys]
+    started = time.perf_counter()
+    for key, minute in zip(keys, minutes):
+        timing.insert(key, minute)
+    insert_us = (time.perf_counter() - started) / habits_count * 1e6
+    started = time.perf_counter()
+    for key in keys:
+        timing.cancel(key)
+    cancel_us = (time.perf_counter() - started) / habits_count * 1e6
+
+    print(f"{'вариант':>16} | {'минута, мс':>11} | {'напоминаний':>12}")
+    print("-" * 46)
+    print(f"{'cron-проверка':>16} | {scan_tick * 1000:>11.2f} | {scan_due:>12}")
+    print(f"{'колесо':>16} | {wheel_tick * 1000:>11.3f} | {wheel_scan_due:>12}")
+    print(f"\nНапоминаний за первые {scan_minutes} мин. должно совпадать у обоих вариантов.")
+    print(f"Колесо: построение {build_seconds:.2f} с, память {wheel_memory / 1024 / 1024:.1f} МБ, "
+          f"за {wheel_minutes} мин. сработало {sum(wheel_due.values())} напоминаний")
+    print(f"Вставка {insert_us:.2f} мкс, отмена {cancel_us:.2f} мкс на запись")
+    print(f"Проверка за сутки: cron {scan_tick * 1440:.1f} с, колесо {wheel_tick * 1440:.2f} с")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк колеса таймеров напоминаний")
+    parser.add_argument("--habits", type=int, default=100_000, help="Число привычек")
+    parser.add_argument("--scan-minutes", type=int, default=30, help="Минут поминутной проверки")
+    parser.add_argument("--wheel-minutes", type=int, default=1440, help="Минут работы колеса")
+    args = parser.parse_args()
+    run(args.habits, args.scan_minutes, args.wheel_minutes)
+
+
+if __name__ == "__main__":
+    main()
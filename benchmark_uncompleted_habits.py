@@ -0,0 +1,158 @@
+"""
+Бенчмарк выборки незавершенных привычек для планировщика напоминаний.
+
+Сравнивает прежний вариант (отдельный SELECT HabitCompletion на каждую привычку)
+с текущим get_users_with_uncompleted_daily_habits (один LEFT JOIN с потоковым чтением)
+и показывает, как растут число запросов и время выполнения с объемом данных.
+
+Запуск:
+    python benchmark_uncompleted_habits.py
+    python benchmark_uncompleted_habits.py --sizes 1000 10000 100000 --legacy-max 10000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import event, insert, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from app.models.database import Base, User, Habit, HabitCompletion, ScheduleType
+from app.bot.services.habit_service import get_users_with_uncompleted_daily_habits
+
+HABITS_PER_USER = 4
+COMPLETED_SHARE = 0.5
+
+
+async def legacy_get_users_with_uncompleted_daily_habits(db: AsyncSession, target_date: date):
+    """
+    Прежняя реализация: загрузка всех привычек и отдельный запрос на каждую.
+    """
+    from app.utils.timezone_utils import is_habit_day_today
+
+    result = await db.execute(
+        select(User, Habit, ScheduleType)
+        .join(Habit, User.id == Habit.user_id)
+        .join(ScheduleType, Habit.schedule_type_id == ScheduleType.id)
+        .where(Habit.is_active == True)
+    )
+    users_with_habits = {}
+    for user, habit, schedule_type in result.all():
+        data = users_with_habits.setdefault(user.id, {'user': user, 'uncompleted_habits': []})
+        if schedule_type.name == "custom" and habit.custom_schedule_days:
+            if not is_habit_day_today(habit.custom_schedule_days, habit.timezone):
+                continue
+        completion_result = await db.execute(
+            select(HabitCompletion)
+            .where(HabitCompletion.habit_id == habit.id)
+            .where(HabitCompletion.completion_date == target_date)
+            .where(HabitCompletion.is_completed == True)
+        )
+        if not completion_result.scalar_one_or_none():
+            data['uncompleted_habits'].append(habit)
+    return [data for data in users_with_habits.values() if data['uncompleted_habits']]
+
+
+async def seed_database(engine, habits_count: int, target_date: date):
+    """
+    Заполняет базу пользователями, привычками и отметками выполнения.
+    """
+    rnd = random.Random(habits_count)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+        schedule_types = {name: uuid.uuid4() for name in ("daily", "weekly", "custom")}
+        await conn.execute(insert(ScheduleType), [{"id": i, "name": n} for n, i in schedule_types.items()])
+
+        users_count = max(1, habits_count // HABITS_PER_USER)
+        users = [{"id": uuid.uuid4(), "telegram_id": 10_000 + i, "first_name": f"user{i}"} for i in range(users_count)]
+        await conn.execute(insert(User), users)
+
+        habits, completions = [], []
+        for i in range(habits_count):
+            user_id = users[i % users_count]["id"]
+            schedule = rnd.choice(("daily", "custom"))
+            habit_id = uuid.uuid4()
+            habits.append({
+                "id": habit_id,
+                "user_id": user_id,
+                "name": f"habit{i}",
+                "schedule_type_id": schedule_types[schedule],
+                "custom_schedule_days": "пн,вт,ср,чт,пт,сб,вс" if schedule == "custom" else None,
+                "timezone": "Europe/Moscow",
+            })
+            if rnd.random() < COMPLETED_SHARE:
+                completions.append({
+                    "id": uuid.uuid4(),
+                    "habit_id": habit_id,
+                    "user_id": user_id,
+                    "completion_date": target_date,
+                    "is_completed": True,
+                })
+        for start in range(0, len(habits), 10_000):
+            await conn.execute(insert(Habit), habits[start:start + 10_000])
+        for start in range(0, len(completions), 10_000):
+            await conn.execute(insert(HabitCompletion), completions[start:start + 10_000])
+
+
+async def measure(session_factory, counter: dict, func, target_date: date):
+    """
+    Выполняет функцию выборки и возвращает (число запросов, секунды, найдено привычек).
+    """
+    async with session_factory() as db:
+        counter["queries"] = 0
+        started = time.perf_counter()
+        users = await func(db, target_date)
+        elapsed = time.perf_counter() - started
+        found = sum(len(data['uncompleted_habits']) for data in users)
+    return counter["queries"], elapsed, found
+
+
+async def run(sizes, legacy_max: int):
+    target_date = date.today()
+    print(f"{'привычек':>10} | {'вариант':>8} | {'запросов':>9} | {'время, с':>9} | {'найдено':>8}")
+    print("-" * 58)
+
+    for habits_count in sizes:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp_dir, 'bench.db')}")
+            counter = {"queries": 0}
+
+            @event.listens_for(engine.sync_engine, "before_cursor_execute")
+            def _count(conn, cursor, statement, parameters, context, executemany):
+                counter["queries"] += 1
+
+            await seed_database(engine, habits_count, target_date)
+            session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+            variants = [("join", get_users_with_uncompleted_daily_habits)]
+            if habits_count <= legacy_max:
+                variants.insert(0, ("legacy", legacy_get_users_with_uncompleted_daily_habits))
+
+            for name, func in variants:
+                queries, elapsed, found = await measure(session_factory, counter, func, target_date)
+                print(f"{habits_count:>10} | {name:>8} | {queries:>9} | {elapsed:>9.3f} | {found:>8}")
+
+            await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument(
+        "--legacy-max", type=int, default=10_000,
+        help="Максимальный объем, на котором запускается прежняя реализация (она очень медленная)",
+    )
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.legacy_max))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+Бенчмарк хранения UUID в SQLite: текст (32-36 символов) против 16 байт BLOB (тип GUID).
+
+Готовит базу с текстовыми UUID на ревизии 0009 - копию --sqlite (исходный файл
+не меняется) или сгенерированную - и сжимает ее (VACUUM), а ее копию переводит
+миграцией 0010_compact_uuid_storage. Для обеих баз измеряет размер файла, таблицы
+HabitCompletion с ее индексами и время запросов серии и статистики
+(calculate_current_streak и get_user_statistics) для одной и той же выборки привычек.
+
+Запросы выполняются через sqlite3 тем же SQL, что строят сервисы, с id в формате
+хранения: так сравнивается именно хранение, без разницы в обработке типов.
+
+Запуск:
+    python benchmark_uuid_storage.py
+    python benchmark_uuid_storage.py --users 20000 --days 90 --habits 1000
+    python benchmark_uuid_storage.py --sqlite data/habits_tracker.db
+    sudo python benchmark_uuid_storage.py --cold
+
+С --cold перед каждым прогоном сбрасывается страничный кэш ОС: так видно, сколько
+стоит чтение страниц с диска, когда база не помещается в память. Временная база
+должна лежать на диске, а не в tmpfs (каталог задается переменной TMPDIR).
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from alembic import command
+from alembic.config import Config
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")
+HABITS_PER_USER = 3
+CHUNK_SIZE = 50_000
+
+# SQL запросов сервисов (app/bot/services/habit_service.py)
+STREAK_DAY = (
+    'SELECT * FROM "HabitCompletion" WHERE habit_id = ? AND completion_date = ? AND is_completed = 1'
+)
+STATS_TOTAL = 'SELECT count(id) FROM "HabitCompletion" WHERE habit_id = ? AND is_completed = 1'
+STATS_WEEK = (
+    'SELECT count(id) FROM "HabitCompletion" WHERE habit_id = ? AND completion_date >= ? AND is_completed = 1'
+)
+
+
+def alembic_upgrade(path: str, revision: str):
+    config = Config(ALEMBIC_INI)
+    config.cmd_opts = argparse.Namespace(x=[f"url=sqlite+aiosqlite:///{path}"])
+    command.upgrade(config, revision)
+
+
+def generate_database(path: str, users_count: int, days: int, seed: int):
+    """
+    Схема миграциями до 0009 и данные с UUID в виде 32 шестнадцатеричных символов,
+    как в базах до GUID.
+    """
+    alembic_upgrade(path, "0009")
+    rnd = random.Random(seed)
+    today = date.today()
+    conn = sqlite3.connect(path)
+    schedule_type_id = conn.execute("SELECT id FROM ScheduleType WHERE name = 'daily'").fetchone()[0]
+    completions = []
+
+    def flush():
+        conn.executemany(
+            'INSERT INTO "HabitCompletion" (id, habit_id, user_id, completion_date, is_completed, '
+            "bonus_point, streak_increment) VALUES (?, ?, ?, ?, ?, 0, 0)",
+            completions,
+        )
+        completions.clear()
+
+    for i in range(users_count):
+        user_id = uuid.uuid4().hex
+        conn.execute(
+            'INSERT INTO "User" (id, telegram_id, first_name, level, points, current_streak, longest_streak, '
+            "delivery_state) VALUES (?, ?, ?, 1, 0, 0, 0, 'ok')",
+            (user_id, 10_000 + i, f"user{i}"),
+        )
+        for _ in range(HABITS_PER_USER):
+            habit_id = uuid.uuid4().hex
+            conn.execute(
+                'INSERT INTO "Habit" (id, user_id, name, schedule_type_id, is_active, base_points, '
+                "custom_schedule_frequency) VALUES (?, ?, 'habit', ?, 1, 10, 1)",
+                (habit_id, user_id, schedule_type_id),
+            )
+            # Серии разной длины: последние дни выполнены подряд, дальше - случайно
+            streak = rnd.randrange(days)
+            completions.extend(
+                (uuid.uuid4().hex, habit_id, user_id, (today - timedelta(days=day)).isoformat(),
+                 1 if day < streak or rnd.random() < 0.7 else 0)
+                for day in range(days)
+            )
+            if len(completions) >= CHUNK_SIZE:
+                flush()
+    flush()
+    conn.commit()
+    conn.close()
+
+
+def table_sizes(conn, table: str) -> dict:
+    """
+    Байты на диске таблицы и каждого ее индекса (виртуальная таблица dbstat).
+    """
+    rows = conn.execute(
+        "SELECT name, SUM(pgsize) FROM dbstat WHERE name IN "
+        "(SELECT name FROM sqlite_master WHERE tbl_name = ?) GROUP BY name",
+        (table,),
+    ).fetchall()
+    return dict(rows)
+
+
+def drop_page_cache():
+    """
+    Сбрасывает страничный кэш ОС (Linux, нужен root), чтобы страницы базы читались с диска.
+    """
+    os.sync()
+    with open("/proc/sys/vm/drop_caches", "w") as f:
+        f.write("3\n")
+
+
+def streak_pass(conn, habit_ids) -> int:
+    """
+    Серия каждой привычки: запрос на каждый день, пока привычка выполнялась. Возвращает число запросов.
+    """
+    today = date.today()
+    queries = 0
+    for habit_id in habit_ids:
+        current = today
+        while True:
+            queries += 1
+            if conn.execute(STREAK_DAY, (habit_id, current.isoformat())).fetchone() is None:
+                break
+            current -= timedelta(days=1)
+    return queries
+
+
+def stats_pass(conn, habit_ids) -> int:
+    """
+    Три запроса статистики на каждую привычку.
+    """
+    today = date.today()
+    week_ago = (today - timedelta(days=7)).isoformat()
+    for habit_id in habit_ids:
+        conn.execute(STATS_TOTAL, (habit_id,)).fetchone()
+        conn.execute(STREAK_DAY, (habit_id, today.isoformat())).fetchone()
+        conn.execute(STATS_WEEK, (habit_id, week_ago)).fetchone()
+    return len(habit_ids) * 3
+
+
+def time_run(path: str, habit_ids, cold: bool) -> dict:
+    """
+    Один прогон запросов серии и статистики, каждый вид - в новом подключении.
+    С cold перед каждым видом сбрасывается кэш ОС.
+    """
+    times = {}
+    for name, query_pass in (("streak", streak_pass), ("stats", stats_pass)):
+        if cold:
+            drop_page_cache()
+        conn = sqlite3.connect(path)
+        started = time.perf_counter()
+        times[f"{name}_queries"] = query_pass(conn, habit_ids)
+        times[name] = time.perf_counter() - started
+        conn.close()
+    return times
+
+
+def describe(path: str, habit_rowids) -> dict:
+    """
+    Размеры базы и id выбранных привычек в формате хранения.
+    """
+    conn = sqlite3.connect(path)
+    conn.execute("ANALYZE")
+    conn.commit()
+    placeholders = ", ".join("?" * len(habit_rowids))
+    habit_ids = [row[0] for row in conn.execute(
+        f'SELECT id FROM "Habit" WHERE rowid IN ({placeholders}) ORDER BY rowid', habit_rowids
+    )]
+    result = {
+        "path": path,
+        "habit_ids": habit_ids,
+        "habits": len(habit_ids),
+        "file": os.path.getsize(path),
+        "completions": conn.execute('SELECT count(*) FROM "HabitCompletion"').fetchone()[0],
+        "sizes": table_sizes(conn, "HabitCompletion"),
+        "id_type": conn.execute('SELECT typeof(id), length(id) FROM "HabitCompletion" LIMIT 1').fetchone(),
+    }
+    conn.close()
+    return result
+
+
+def time_variants(variants, repeat: int, cold: bool):
+    """
+    Лучшее из repeat прогонов для каждой базы. Прогоны баз чередуются, чтобы фоновая
+    нагрузка одинаково влияла на обе. Без cold первый прогон прогревает кэш и не учитывается.
+    """
+    for run in range(repeat if cold else repeat + 1):
+        for variant in (variants if run % 2 else variants[::-1]):
+            times = time_run(variant["path"], variant["habit_ids"], cold)
+            variant["streak_queries"] = times["streak_queries"]
+            if cold or run:
+                for name in ("streak", "stats"):
+                    variant[name] = min(variant.get(name, times[name]), times[name])
+
+
+def megabytes(value: int) -> str:
+    return f"{value / 1024 / 1024:.1f} МБ"
+
+
+def print_comparison(before: dict, after: dict, cold: bool):
+    habits = before["habits"]
+    print(f"\nОтметок: {before['completions']}, привычек в выборке: {habits}, "
+          f"запросов серии на прогон: {before['streak_queries']}, "
+          f"кэш ОС {'сбрасывается' if cold else 'прогрет'}")
+    print(f"{'':<38}{'текст':>14}{'BLOB':>14}{'изменение':>12}")
+
+    def row(title, old, new, fmt):
+        change = f"{(new - old) / old:+.0%}" if old else ""
+        print(f"{title:<38}{fmt(old):>14}{fmt(new):>14}{change:>12}")
+
+    print(f"{'id':<38}{'%s, %s байт' % before['id_type']:>14}{'%s, %s байт' % after['id_type']:>14}")
+    row("Файл базы", before["file"], after["file"], megabytes)
+    total_before = sum(before["sizes"].values())
+    total_after = sum(after["sizes"].values())
+    row("HabitCompletion с индексами", total_before, total_after, megabytes)
+    for name in sorted(before["sizes"]):
+        row(f"  {name}", before["sizes"][name], after["sizes"].get(name, 0), megabytes)
+    row("Байт на отметку (с индексами)", total_before / before["completions"],
+        total_after / after["completions"], lambda value: f"{value:.0f}")
+    row("Серия, мс на привычку", before["streak"] / habits * 1000, after["streak"] / habits * 1000,
+        lambda value: f"{value:.3f}")
+    row("Статистика, мс на привычку", before["stats"] / habits * 1000, after["stats"] / habits * 1000,
+        lambda value: f"{value:.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк хранения UUID в SQLite: текст против 16 байт")
+    parser.add_argument("--sqlite", help="Существующая база с текстовыми UUID (копируется, исходная не меняется)")
+    parser.add_argument("--users", type=int, default=5000, help="Пользователей в сгенерированной базе")
+    parser.add_argument("--days", type=int, default=60, help="Дней отметок на привычку")
+    parser.add_argument("--habits", type=int, default=500, help="Привычек в выборке для запросов")
+    parser.add_argument("--repeat", type=int, default=5, help="Прогонов запросов (берется лучший)")
+    parser.add_argument("--cold", action="store_true",
+                        help="Сбрасывать кэш ОС перед каждым прогоном (Linux, root)")
+    parser.add_argument("--seed", type=int, default=1, help="Зерно генератора данных")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        text_path = os.path.join(tmp_dir, "uuid_text.db")
+        blob_path = os.path.join(tmp_dir, "uuid_blob.db")
+        started = time.perf_counter()
+        if args.sqlite:
+            shutil.copyfile(args.sqlite, text_path)
+            alembic_upgrade(text_path, "0009")
+        else:
+            generate_database(text_path, args.users, args.days, args.seed)
+        conn = sqlite3.connect(text_path)
+        conn.execute("VACUUM")
+        habits_count = conn.execute('SELECT max(rowid) FROM "Habit"').fetchone()[0] or 0
+        conn.close()
+        print(f"База с текстовыми UUID готова за {time.perf_counter() - started:.1f} с")
+
+        shutil.copyfile(text_path, blob_path)
+        started = time.perf_counter()
+        alembic_upgrade(blob_path, "0010")
+        print(f"Миграция 0010 (перевод и VACUUM): {time.perf_counter() - started:.1f} с")
+
+        # Одни и те же привычки в обеих базах: rowid при переводе не меняется
+        habit_rowids = random.Random(args.seed).sample(range(1, habits_count + 1), min(args.habits, habits_count))
+        before = describe(text_path, habit_rowids)
+        after = describe(blob_path, habit_rowids)
+        time_variants([before, after], args.repeat, args.cold)
+
+    print_comparison(before, after, args.cold)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Прогноз нагрузки напоминаний по UTC-минутам суток.
+
+Читает активные привычки, частоту напоминаний и часовые пояса пользователей
+из базы DATABASE_URL и выводит сводку: пик, минуты сверх предела частоты Telegram
+(TELEGRAM_GLOBAL_RATE_LIMIT) и рекомендуемый разброс отправки.
+
+Запуск:
+    python capacity_report.py
+    python capacity_report.py --date 2025-01-31 --csv capacity.csv
+    python capacity_report.py --json capacity.json --rate-limit 25
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+async def run(args):
+    from app.core.database import AsyncSessionLocal
+    from app.bot.services.capacity_service import (
+        project_reminder_volume, format_capacity_report, capacity_report_csv,
+    )
+
+    async with AsyncSessionLocal() as db:
+        report = await project_reminder_volume(db, args.date)
+    if args.rate_limit:
+        report.rate_limit = args.rate_limit
+
+    print(format_capacity_report(report, top=args.top))
+    if args.csv:
+        with open(args.csv, "w", encoding="utf-8") as output:
+            output.write(capacity_report_csv(report))
+        print(f"\nГистограмма по минутам: {args.csv}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(report.to_dict(), output, ensure_ascii=False, indent=2)
+        print(f"Отчет в JSON: {args.json}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Прогноз нагрузки напоминаний по минутам")
+    parser.add_argument("--date", type=date.fromisoformat, help="Дата UTC в формате ГГГГ-ММ-ДД (по умолчанию - сегодня)")
+    parser.add_argument("--rate-limit", type=float, help="Предел сообщений в секунду вместо TELEGRAM_GLOBAL_RATE_LIMIT")
+    parser.add_argument("--top", type=int, default=10, help="Сколько самых нагруженных минут показать")
+    parser.add_argument("--csv", help="Файл для гистограммы на 1440 минут в CSV")
+    parser.add_argument("--json", help="Файл для полного отчета в JSON")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
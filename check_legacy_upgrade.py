@@ -0,0 +1,121 @@
+"""
+Проверка обновления старой базы SQLite: alembic upgrade head и update_database_schedule.py.
+
+Старая база повторяет то, что было до миграций: схема ревизии 0001, справочники
+с id в виде UUID с дефисами (так их записывал create_database.py), пользователи
+и привычки с id из 32 шестнадцатеричных символов (так их записывало приложение).
+После обновления у каждой активной привычки должно быть скомпилировано расписание
+и заполнен next_due_at - иначе при REMINDER_DUE_INDEX_ENABLED напоминания по ней
+не придут, пока привычку не изменят.
+
+Запуск:
+    python check_legacy_upgrade.py
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import traceback
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from alembic import command
+from alembic.config import Config
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")
+
+# (тип расписания, дни, время, активна); время в начале часа - частота напоминаний "0" срабатывает раз в час
+HABITS = (
+    ("daily", None, "08:00", 1),
+    ("weekly", None, None, 1),
+    ("custom", "пн,ср,пт", "19:00", 1),
+    ("daily", None, "07:00", 0),
+)
+USERS_COUNT = 5
+
+
+def alembic_upgrade(path: str, revision: str):
+    config = Config(ALEMBIC_INI)
+    config.cmd_opts = argparse.Namespace(x=[f"url=sqlite+aiosqlite:///{path}"])
+    command.upgrade(config, revision)
+
+
+def create_legacy_database(path: str):
+    alembic_upgrade(path, "0001")
+    conn = sqlite3.connect(path)
+    for (type_id,) in conn.execute("SELECT id FROM ScheduleType").fetchall():
+        conn.execute("UPDATE ScheduleType SET id = ? WHERE id = ?", (str(uuid.UUID(type_id)), type_id))
+    schedule_types = {name: uuid.UUID(type_id).hex for type_id, name in conn.execute("SELECT id, name FROM ScheduleType")}
+    for number in range(USERS_COUNT):
+        user_id = uuid.uuid4().hex
+        conn.execute(
+            'INSERT INTO "User" (id, telegram_id, first_name, created_at, level, points, current_streak, '
+            'longest_streak, timezone, reminder_frequency) VALUES (?, ?, ?, ?, 1, 0, 0, 0, ?, ?)',
+            (user_id, 6_000_000_000 + number, f"Старый {number}", "2026-01-01 10:00:00.000000",
+             "Europe/Moscow", "0"),
+        )
+        for schedule_type, days, habit_time, is_active in HABITS:
+            conn.execute(
+                'INSERT INTO "Habit" (id, user_id, name, schedule_type_id, is_active, base_points, created_at, '
+                'custom_schedule_days, custom_schedule_time, custom_schedule_frequency, timezone) '
+                'VALUES (?, ?, ?, ?, ?, 10, ?, ?, ?, 1, ?)',
+                (uuid.uuid4().hex, user_id, schedule_type, schedule_types[schedule_type], is_active,
+                 "2026-01-01 10:00:00.000000", days, habit_time, "Asia/Tokyo"),
+            )
+    conn.commit()
+    conn.close()
+
+
+def check_active_habits(path: str):
+    conn = sqlite3.connect(path)
+    active, compiled, due = conn.execute(
+        "SELECT COUNT(*), COUNT(schedule_weekday_mask), COUNT(next_due_at) FROM Habit WHERE is_active = 1"
+    ).fetchone()
+    conn.close()
+    assert active == USERS_COUNT * sum(habit[3] for habit in HABITS), f"активных привычек {active}"
+    assert compiled == active, f"расписание скомпилировано для {compiled} из {active}"
+    assert due == active, f"next_due_at заполнен для {due} из {active}"
+
+
+def main():
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        legacy_path = os.path.join(tmp_dir, "legacy.db")
+        create_legacy_database(legacy_path)
+
+        script_path = os.path.join(tmp_dir, "script.db")
+        shutil.copy(legacy_path, script_path)
+
+        def alembic_head():
+            alembic_upgrade(legacy_path, "head")
+            check_active_habits(legacy_path)
+
+        def update_script():
+            from update_database_schedule import update_database_schedule
+
+            assert update_database_schedule(script_path), "скрипт сообщил об ошибке"
+            check_active_habits(script_path)
+
+        for title, step in (("alembic upgrade head", alembic_head), ("update_database_schedule.py", update_script)):
+            output = io.StringIO()
+            try:
+                with contextlib.redirect_stdout(output):
+                    step()
+                print(f"✓ {title}")
+            except Exception as e:
+                ok = False
+                print(output.getvalue(), end="")
+                print(f"✗ {title}: {type(e).__name__}: {e}")
+                traceback.print_exc()
+    print("Все проверки пройдены" if ok else "Есть ошибки")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -18,7 +18,7 @@ def create_database(db_path="habits_tracker.db"):
     cursor.execute(
         """
         CREATE TABLE IF NOT EXISTS "ScheduleType" (
-            "id" TEXT PRIMARY KEY,
+            "id" BLOB PRIMARY KEY,
             "name" TEXT NOT NULL UNIQUE
         );
     """
@@ -28,7 +28,7 @@ def create_database(db_path="habits_tracker.db"):
     cursor.execute(
         """
         CREATE TABLE IF NOT EXISTS "RewardType" (
-            "id" TEXT PRIMARY KEY,
+            "id" BLOB PRIMARY KEY,
             "name" TEXT NOT NULL UNIQUE
         );
     """
@@ -38,7 +38,7 @@ def create_database(db_path="habits_tracker.db"):
     cursor.execute(
         """
         CREATE TABLE IF NOT EXISTS "FriendStatus" (
-            "id" TEXT PRIMARY KEY,
+            "id" BLOB PRIMARY KEY,
             "name" TEXT NOT NULL UNIQUE
         );
     """
@@ -48,7 +48,7 @@ def create_database(db_path="habits_tracker.db"):
     cursor.execute(
         """
         CREATE TABLE IF NOT EXISTS "User" (
-            "id" TEXT PRIMARY KEY,
+            "id" BLOB PRIMARY KEY,
             "telegram_id" INTEGER UNIQUE NOT NULL,
             "username" TEXT,
             "first_name" TEXT,
@@ -59,7 +59,8 @@ def create_database(db_path="habits_tracker.db"):
             "current_streak" INTEGER NOT NULL DEFAULT 0,
             "longest_streak" INTEGER NOT NULL DEFAULT 0,
             "timezone" TEXT DEFAULT "Europe/Moscow",
-            "reminder_frequency" TEXT DEFAULT "0"
+            "reminder_frequency" TEXT DEFAULT "0",
+            "delivery_state" TEXT NOT NULL DEFAULT 'ok'
         );
     """
     )
@@ -68,11 +69,11 @@ def create_database(db_path="habits_tracker.db"):
     cursor.execute(
         """
         CREATE TABLE IF NOT EXISTS "Habit" (
-            "id" TEXT PRIMARY KEY,
-            "user_id" TEXT NOT NULL,
+            "id" BLOB PRIMARY KEY,
+            "user_id" BLOB NOT NULL,
             "name" TEXT NOT NULL,
             "description" TEXT,
-            "schedule_type_id" TEXT NOT NULL,
+            "schedule_type_id" BLOB NOT NULL,
             "is_active" INTEGER NOT NULL DEFAULT 1,
             "color" TEXT,
             "emoji" TEXT,
@@ -82,6 +83,9 @@ def create_database(db_path="habits_tracker.db"):
             "custom_schedule_time" TEXT,
             "custom_schedule_frequency" INTEGER NOT NULL DEFAULT 1,
             "timezone" TEXT DEFAULT "Europe/Moscow",
+            "schedule_weekday_mask" INTEGER,
+            "schedule_minute" INTEGER,
+            "next_due_at" TEXT,
             FOREIGN KEY ("user_id") REFERENCES "User" ("id"),
             FOREIGN KEY ("schedule_type_id") REFERENCES "ScheduleType" ("id")
         );
@@ -92,9 +96,9 @@ def create_database(db_path="habits_tracker.db"):
     cursor.execute(
         """
         CREATE TABLE IF NOT EXISTS "HabitCompletion" (
-            "id" TEXT PRIMARY KEY,
-            "habit_id" TEXT NOT NULL,
-            "user_id" TEXT NOT NULL,
+            "id" BLOB PRIMARY KEY,
+            "habit_id" BLOB NOT NULL,
+            "user_id" BLOB NOT NULL,
             "completion_date" TEXT NOT NULL,
             "is_completed" INTEGER DEFAULT 0,
             "bonus_point" INTEGER NOT NULL DEFAULT 0,
@@ -110,9 +114,9 @@ def create_database(db_path="habits_tracker.db"):
     cursor.execute(
         """
         CREATE TABLE IF NOT EXISTS "Reward" (
-            "id" TEXT PRIMARY KEY,
-            "user_id" TEXT NOT NULL,
-            "reward_type_id" TEXT NOT NULL,
+            "id" BLOB PRIMARY KEY,
+            "user_id" BLOB NOT NULL,
+            "reward_type_id" BLOB NOT NULL,
             "name" TEXT NOT NULL,
             "description" TEXT,
             "awarded_at" TEXT,
@@ -126,10 +130,10 @@ def create_database(db_path="habits_tracker.db"):
     cursor.execute(
         """
         CREATE TABLE IF NOT EXISTS "Friend" (
-            "id" TEXT PRIMARY KEY,
-            "user_id" TEXT NOT NULL,
-            "friend_id" TEXT,
-            "friend_status_id" TEXT NOT NULL,
+            "id" BLOB PRIMARY KEY,
+            "user_id" BLOB NOT NULL,
+            "friend_id" BLOB,
+            "friend_status_id" BLOB NOT NULL,
             "created_at" TEXT,
             FOREIGN KEY ("user_id") REFERENCES "User" ("id"),
             FOREIGN KEY ("friend_id") REFERENCES "User" ("id"),
@@ -138,12 +142,110 @@ def create_database(db_path="habits_tracker.db"):
     """
     )
 
+    # Таблица челленджей
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS "Challenge" (
+            "id" BLOB PRIMARY KEY,
+            "name" TEXT NOT NULL,
+            "description" TEXT,
+            "start_date" TEXT,
+            "end_date" TEXT,
+            "points_reward" INTEGER NOT NULL DEFAULT 0,
+            "badge_reward" TEXT,
+            "challenge_type" TEXT
+        );
+    """
+    )
+
+    # Таблица участников челленджей
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS "ChallengeParticipant" (
+            "id" BLOB PRIMARY KEY,
+            "challenge_id" BLOB NOT NULL,
+            "user_id" BLOB NOT NULL,
+            "progress" INTEGER NOT NULL DEFAULT 0,
+            "completed" INTEGER DEFAULT 0,
+            FOREIGN KEY ("challenge_id") REFERENCES "Challenge" ("id"),
+            FOREIGN KEY ("user_id") REFERENCES "User" ("id")
+        );
+    """
+    )
+
+    # Таблица уведомлений (outbox напоминаний)
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS "Notification" (
+            "id" BLOB PRIMARY KEY,
+            "user_id" BLOB NOT NULL,
+            "habit_id" BLOB,
+            "challenge_id" BLOB,
+            "notification_time" TEXT,
+            "is_sent" INTEGER NOT NULL DEFAULT 0,
+            "message" TEXT,
+            "claimed_at" TEXT,
+            "expired_at" TEXT,
+            FOREIGN KEY ("user_id") REFERENCES "User" ("id"),
+            FOREIGN KEY ("habit_id") REFERENCES "Habit" ("id"),
+            FOREIGN KEY ("challenge_id") REFERENCES "Challenge" ("id")
+        );
+    """
+    )
+
+    # Таблица аренды ведущего экземпляра планировщика
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS "SchedulerLease" (
+            "name" TEXT PRIMARY KEY,
+            "holder" TEXT NOT NULL,
+            "expires_at" TEXT NOT NULL,
+            "heartbeat_at" TEXT
+        );
+    """
+    )
+
+    # Таблица времени последней проверки планировщика
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS "SchedulerCheckpoint" (
+            "name" TEXT PRIMARY KEY,
+            "last_tick_at" TEXT NOT NULL
+        );
+    """
+    )
+
+    # Таблица журнала отправленных напоминаний
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS "ReminderLedger" (
+            "user_id" BLOB NOT NULL,
+            "habit_id" BLOB NOT NULL,
+            "local_date" TEXT NOT NULL,
+            "slot" INTEGER NOT NULL,
+            "sent_at" TEXT,
+            PRIMARY KEY ("user_id", "habit_id", "local_date", "slot")
+        );
+    """
+    )
+
+    # Таблица воркеров планировщика (шардирование напоминаний)
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS "SchedulerWorker" (
+            "worker_id" TEXT PRIMARY KEY,
+            "heartbeat_at" TEXT NOT NULL,
+            "started_at" TEXT
+        );
+    """
+    )
+
     # Таблица отчетов об ошибках
     cursor.execute(
         """
         CREATE TABLE IF NOT EXISTS "BugReport" (
-            "id" TEXT PRIMARY KEY,
-            "user_id" TEXT NOT NULL,
+            "id" BLOB PRIMARY KEY,
+            "user_id" BLOB NOT NULL,
             "title" TEXT NOT NULL,
             "description" TEXT NOT NULL,
             "incident_type" TEXT NOT NULL,
@@ -158,10 +260,11 @@ def create_database(db_path="habits_tracker.db"):
 
     # --- Заполнение справочников ---
 
+    # UUID хранятся как 16 байт BLOB, как у типа GUID в моделях
     # Вставляем типы расписаний
-    daily_uuid = str(uuid.uuid4())
-    weekly_uuid = str(uuid.uuid4())
-    custom_uuid = str(uuid.uuid4())
+    daily_uuid = uuid.uuid4().bytes
+    weekly_uuid = uuid.uuid4().bytes
+    custom_uuid = uuid.uuid4().bytes
     
     cursor.execute(
         "INSERT OR IGNORE INTO ScheduleType (id, name) VALUES (?, ?);",
@@ -177,9 +280,9 @@ def create_database(db_path="habits_tracker.db"):
     )
 
     # Вставляем типы наград
-    badge_uuid = str(uuid.uuid4())
-    level_uuid = str(uuid.uuid4())
-    challenge_uuid = str(uuid.uuid4())
+    badge_uuid = uuid.uuid4().bytes
+    level_uuid = uuid.uuid4().bytes
+    challenge_uuid = uuid.uuid4().bytes
     
     cursor.execute(
         "INSERT OR IGNORE INTO RewardType (id, name) VALUES (?, ?);",
@@ -195,9 +298,9 @@ def create_database(db_path="habits_tracker.db"):
     )
 
     # Вставляем статусы дружбы
-    pending_uuid = str(uuid.uuid4())
-    accepted_uuid = str(uuid.uuid4())
-    rejected_uuid = str(uuid.uuid4())
+    pending_uuid = uuid.uuid4().bytes
+    accepted_uuid = uuid.uuid4().bytes
+    rejected_uuid = uuid.uuid4().bytes
     
     cursor.execute(
         "INSERT OR IGNORE INTO FriendStatus (id, name) VALUES (?, ?);",
@@ -213,15 +316,23 @@ def create_database(db_path="habits_tracker.db"):
     )
 
     # Создаем индексы для улучшения производительности
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_telegram_id ON User(telegram_id);")
+    # Индексы объявлены в моделях (app/models/database.py) и поддерживаются миграциями Alembic
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_points ON User(points DESC);")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_habit_user_id ON Habit(user_id);")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_habit_active_user ON Habit(is_active, user_id);")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_habit_schedule_type ON Habit(schedule_type_id);")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_completion_habit_id ON HabitCompletion(habit_id);")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_completion_user_id ON HabitCompletion(user_id);")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_habit_weekday_mask ON Habit(is_active, schedule_weekday_mask);")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_habit_schedule_minute ON Habit(schedule_minute);")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_habit_next_due ON Habit(next_due_at);")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_completion_habit_date ON HabitCompletion(habit_id, completion_date, is_completed);")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_completion_user_date ON HabitCompletion(user_id, completion_date);")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_completion_date ON HabitCompletion(completion_date);")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_reward_user_id ON Reward(user_id);")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_participant_challenge ON ChallengeParticipant(challenge_id, completed);")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_bugreport_user_id ON BugReport(user_id);")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_bugreport_status ON BugReport(status);")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_bugreport_status_created ON BugReport(status, created_at);")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_notification_pending ON Notification(is_sent, notification_time);")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reminder_ledger_date ON ReminderLedger(local_date);")
 
     # Подтверждаем изменения и закрываем соединение
     conn.commit()
@@ -237,6 +348,12 @@ def create_database(db_path="habits_tracker.db"):
     print("   - HabitCompletion (отметки выполнения)")
     print("   - Reward (награды)")
     print("   - Friend (дружба)")
+    print("   - Challenge, ChallengeParticipant (челленджи)")
+    print("   - Notification (outbox напоминаний)")
+    print("   - ReminderLedger (журнал отправленных напоминаний)")
+    print("   - SchedulerLease (выбор ведущего экземпляра планировщика)")
+    print("   - SchedulerCheckpoint (последняя завершенная проверка напоминаний)")
+    print("   - SchedulerWorker (воркеры шардированного планировщика)")
     print("   - BugReport (отчеты об ошибках)")
     print("[INFO] Индексы созданы для оптимизации запросов")
 
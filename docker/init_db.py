@@ -14,10 +14,39 @@ sys.path.append('/app')
 from create_database import create_database
 
 
+def init_postgres_database():
+    """Создает таблицы, индексы и справочники в базе PostgreSQL из DATABASE_URL."""
+    from app.core.database import engine, create_schema
+
+    async def create():
+        await create_schema(engine)
+        await engine.dispose()
+
+    print(f"Инициализация базы PostgreSQL: {engine.url.render_as_string(hide_password=True)}")
+    asyncio.run(create())
+    print("Схема PostgreSQL готова!")
+
+
+def upgrade_schema():
+    """Применяет миграции Alembic: новые индексы и изменения схемы доходят и до существующих баз."""
+    from alembic import command
+    from alembic.config import Config
+
+    print("Применение миграций Alembic...")
+    command.upgrade(Config("/app/alembic.ini"), "head")
+    print("Миграции применены!")
+
+
 def init_database():
     """Инициализирует базу данных."""
     print("Инициализация базы данных...")
     
+    from app.core.database import normalize_database_url
+    database_url = os.getenv("DATABASE_URL")
+    if database_url and normalize_database_url(database_url).get_backend_name() == "postgresql":
+        init_postgres_database()
+        return
+    
     # Создаем директорию для базы данных
     data_dir = Path("/app/data")
     data_dir.mkdir(exist_ok=True)
@@ -85,3 +114,4 @@ def init_database():
 
 if __name__ == "__main__":
     init_database()
+    upgrade_schema()
@@ -1,8 +1,12 @@
 """
 Скрипт для исправления формата UUID в базе данных.
+
+Все UUID хранятся как 16 байт BLOB (тип GUID); разные текстовые форматы в старых базах
+приводит к нему миграция alembic 0010_compact_uuid_storage.
 """
 
 import sqlite3
+import uuid
 
 
 def fix_uuid_format():
@@ -11,10 +15,10 @@ def fix_uuid_format():
     cursor = conn.cursor()
     
     try:
-        # Обновляем UUID в таблице ScheduleType, убирая дефисы
-        cursor.execute('UPDATE ScheduleType SET id = "aba8bdc339414bb3900055977fc1369e" WHERE name = "daily"')
-        cursor.execute('UPDATE ScheduleType SET id = "5059ca09c319425baa8fe9a19a7a0fb1" WHERE name = "weekly"')
-        cursor.execute('UPDATE ScheduleType SET id = "0fef53cd7a39460dbc99d85da28a6f74" WHERE name = "custom"')
+        # Обновляем UUID в таблице ScheduleType (16 байт, как у типа GUID)
+        cursor.execute('UPDATE ScheduleType SET id = ? WHERE name = "daily"', (uuid.UUID("aba8bdc339414bb3900055977fc1369e").bytes,))
+        cursor.execute('UPDATE ScheduleType SET id = ? WHERE name = "weekly"', (uuid.UUID("5059ca09c319425baa8fe9a19a7a0fb1").bytes,))
+        cursor.execute('UPDATE ScheduleType SET id = ? WHERE name = "custom"', (uuid.UUID("0fef53cd7a39460dbc99d85da28a6f74").bytes,))
         
         conn.commit()
         print("UUID в таблице ScheduleType обновлены")
@@ -24,7 +28,7 @@ def fix_uuid_format():
         schedule_types = cursor.fetchall()
         print("Обновленные типы расписания:")
         for st in schedule_types:
-            print(f"  {st[0]} - {st[1]}")
+            print(f"  {uuid.UUID(bytes=st[0])} - {st[1]}")
         
         # Проверяем JOIN
         cursor.execute('SELECT h.name, h.is_active, st.name FROM Habit h JOIN ScheduleType st ON h.schedule_type_id = st.id WHERE h.is_active = 1')
@@ -0,0 +1,311 @@
+"""
+Симулятор планировщика напоминаний на виртуальных часах.
+
+Заполняет временную базу SQLite пользователями и привычками, подставляет
+виртуальные часы (app.core.clock) и прогоняет проверки напоминаний
+HabitReminderScheduler за заданное число часов быстрее реального времени.
+Сообщения не отправляются, а записываются поддельным ботом.
+Результат - JSON: задержка проверки, число запросов к базе на проверку
+и число сообщений в минуту.
+
+Запуск:
+    python simulate_reminders.py
+    python simulate_reminders.py --users 5000 --habits-per-user 3 --hours 24 --mode wheel
+    python simulate_reminders.py --adaptive --output report.json
+    python simulate_reminders.py --jitter 15
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+TIMEZONES = ("Europe/Moscow", "Europe/London", "America/New_York", "Asia/Tokyo")
+FREQUENCIES = ("0", "*/10", "*/15", "*/30", "daily_start", "daily_end", None)
+MODES = ("timetable", "index", "wheel")
+COMPLETED_SHARE = 0.3
+
+
+def configure_environment(args, db_path: str):
+    """
+    Настройки читаются при импорте app.core.config, поэтому задаются до импорта приложения.
+    """
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{db_path}"
+    os.environ["REMINDER_DUE_INDEX_ENABLED"] = "true" if args.mode == "index" else "false"
+    os.environ["REMINDER_TIMING_WHEEL_ENABLED"] = "true" if args.mode == "wheel" else "false"
+    os.environ["REMINDER_OUTBOX_ENABLED"] = "false"
+    os.environ["REMINDER_COALESCE_WINDOW_SECONDS"] = "0"
+    os.environ["LEADER_ELECTION_ENABLED"] = "false"
+    os.environ["SCHEDULER_SHARDING_ENABLED"] = "false"
+    os.environ["REMINDER_JITTER_WINDOW_MINUTES"] = str(args.jitter)
+
+
+class RecordingBot:
+    """
+    Поддельный бот: запоминает сообщения вместе с виртуальным временем отправки.
+    """
+
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        from app.core import clock
+
+        self.sent.append((clock.utcnow(), chat_id))
+
+
+class SimulatedDelivery:
+    """
+    Замена конвейера доставки: сообщение сразу передается поддельному боту,
+    без ограничений частоты, которые работают по реальному времени.
+    """
+
+    outbound = None
+
+    def __init__(self, bot: RecordingBot):
+        self.bot = bot
+
+    async def start(self):
+        pass
+
+    async def stop(self, drain: bool = False):
+        pass
+
+    def submit(self, chat_id: int, text: str, result=None) -> bool:
+        from app.core import clock
+
+        self.bot.sent.append((clock.utcnow(), chat_id))
+        if result is not None and not result.done():
+            result.set_result(True)
+        return True
+
+    def pop_undeliverable(self) -> dict:
+        return {}
+
+
+class SimulatedApplication:
+    def __init__(self):
+        self.bot = RecordingBot()
+        self.bot_data = {}
+
+
+async def seed_database(users_count: int, habits_per_user: int, start: datetime, seed: int):
+    """
+    Заполняет базу пользователями, привычками и отметками выполнения за первый день.
+    """
+    from sqlalchemy import insert
+    from app.core.database import engine, AsyncSessionLocal
+    from app.models.database import Base, User, Habit, HabitCompletion, ScheduleType
+    from app.bot.services.habit_service import reschedule_habits
+    from app.utils.schedule_utils import compile_schedule
+
+    rnd = random.Random(seed)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+        schedule_types = {name: uuid.uuid4() for name in ("daily", "weekly", "custom")}
+        await conn.execute(insert(ScheduleType), [{"id": i, "name": n} for n, i in schedule_types.items()])
+
+        users = [
+            {
+                "id": uuid.uuid4(),
+                "telegram_id": 100_000 + i,
+                "first_name": f"user{i}",
+                "reminder_frequency": rnd.choice(FREQUENCIES),
+            }
+            for i in range(users_count)
+        ]
+        for chunk in range(0, len(users), 10_000):
+            await conn.execute(insert(User), users[chunk:chunk + 10_000])
+
+        habits, completions = [], []
+        created_at = (start - timedelta(days=1)).replace(tzinfo=None)
+        for user in users:
+            habit_timezone = rnd.choice(TIMEZONES)
+            for j in range(habits_per_user):
+                schedule = rnd.choice(("daily", "weekly", "custom"))
+                days = rnd.choice((None, "пн,ср,пт", "вт,чт,сб,вс")) if schedule == "custom" else None
+                habit_time = (
+                    f"{rnd.randrange(24):02d}:{rnd.choice((0, 15, 30, 45)):02d}"
+                    if schedule == "custom" and rnd.random() < 0.7
+                    else None
+                )
+                compiled = compile_schedule(schedule, days, habit_time, 1)
+                habit_id = uuid.uuid4()
+                habits.append({
+                    "id": habit_id,
+                    "user_id": user["id"],
+                    "name": f"habit{j}",
+                    "schedule_type_id": schedule_types[schedule],
+                    "custom_schedule_days": days,
+                    "custom_schedule_time": habit_time,
+                    "timezone": habit_timezone,
+                    "created_at": created_at,
+                    "schedule_weekday_mask": compiled.weekday_mask,
+                    "schedule_minute": compiled.minute,
+                })
+                if rnd.random() < COMPLETED_SHARE:
+                    completions.append({
+                        "id": uuid.uuid4(),
+                        "habit_id": habit_id,
+                        "user_id": user["id"],
+                        "completion_date": start.date(),
+                        "is_completed": True,
+                    })
+        for chunk in range(0, len(habits), 10_000):
+            await conn.execute(insert(Habit), habits[chunk:chunk + 10_000])
+        for chunk in range(0, len(completions), 10_000):
+            await conn.execute(insert(HabitCompletion), completions[chunk:chunk + 10_000])
+
+    async with AsyncSessionLocal() as db:
+        await reschedule_habits(db, after=(start - timedelta(minutes=1)).replace(tzinfo=None))
+
+    return len(habits)
+
+
+def percentile(values, share: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+def summarize(values, digits: int = 2) -> dict:
+    if not values:
+        return {"mean": 0, "p50": 0, "p95": 0, "p99": 0, "max": 0}
+    return {
+        "mean": round(statistics.fmean(values), digits),
+        "p50": round(percentile(values, 0.50), digits),
+        "p95": round(percentile(values, 0.95), digits),
+        "p99": round(percentile(values, 0.99), digits),
+        "max": round(max(values), digits),
+    }
+
+
+async def simulate(args) -> dict:
+    from sqlalchemy import event
+    from app.core import clock
+    from app.core.config import settings
+    from app.core.database import engine
+    from app.core.scheduler import HabitReminderScheduler
+
+    start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    virtual_clock = clock.VirtualClock(start)
+    clock.set_clock(virtual_clock)
+
+    seeding_started = time.perf_counter()
+    habits_count = await seed_database(args.users, args.habits_per_user, start, args.seed)
+    seeding_seconds = time.perf_counter() - seeding_started
+
+    queries = {"count": 0}
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        queries["count"] += 1
+
+    application = SimulatedApplication()
+    scheduler = HabitReminderScheduler(application)
+    scheduler.delivery = SimulatedDelivery(application.bot)
+    application.bot_data["scheduler"] = scheduler
+
+    end = start + timedelta(hours=args.hours)
+    latencies, tick_queries, tick_messages = [], [], []
+    moment = start
+    started = time.perf_counter()
+    while moment < end:
+        virtual_clock.set(moment)
+        queries_before, sent_before = queries["count"], len(application.bot.sent)
+
+        tick_started = time.perf_counter()
+        await scheduler.send_daily_reminders()
+        latencies.append((time.perf_counter() - tick_started) * 1000)
+        # Даем завершиться закрытию сессий брошенных генераторов get_db_session
+        await asyncio.sleep(0)
+
+        tick_queries.append(queries["count"] - queries_before)
+        tick_messages.append(len(application.bot.sent) - sent_before)
+
+        if args.adaptive:
+            next_minute = moment + timedelta(minutes=1)
+            latest = moment + timedelta(minutes=settings.REMINDER_MAX_SLEEP_MINUTES)
+            due_at = await scheduler._next_reminder_time(None, next_minute, latest)
+            moment = min(max(due_at, next_minute), latest) if due_at is not None else latest
+        else:
+            moment += timedelta(minutes=1)
+    wall_seconds = time.perf_counter() - started
+    clock.set_clock(None)
+
+    per_minute = {}
+    for sent_at, _ in application.bot.sent:
+        key = sent_at.strftime("%H:%M")
+        per_minute[key] = per_minute.get(key, 0) + 1
+    minutes = args.hours * 60
+    messages_per_minute = [per_minute.get((start + timedelta(minutes=m)).strftime("%H:%M"), 0) for m in range(minutes)]
+
+    report = {
+        "config": {
+            "mode": args.mode,
+            "adaptive": args.adaptive,
+            "jitter_window_minutes": args.jitter,
+            "users": args.users,
+            "habits": habits_count,
+            "hours": args.hours,
+            "seed": args.seed,
+            "start": start.isoformat(),
+        },
+        "seeding_seconds": round(seeding_seconds, 2),
+        "wall_seconds": round(wall_seconds, 2),
+        "simulated_speedup": round(args.hours * 3600 / wall_seconds, 1) if wall_seconds else None,
+        "ticks": len(latencies),
+        "tick_latency_ms": summarize(latencies),
+        "queries_per_tick": summarize(tick_queries),
+        "messages_total": len(application.bot.sent),
+        "messages_per_minute": summarize(messages_per_minute),
+        "peak_minutes": sorted(per_minute.items(), key=lambda item: item[1], reverse=True)[:args.top],
+    }
+    if args.series:
+        report["messages_per_minute_series"] = messages_per_minute
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Симулятор планировщика напоминаний на виртуальных часах")
+    parser.add_argument("--users", type=int, default=2000, help="Число пользователей")
+    parser.add_argument("--habits-per-user", type=int, default=3, help="Привычек на пользователя")
+    parser.add_argument("--hours", type=int, default=24, help="Сколько часов симулировать")
+    parser.add_argument("--mode", choices=MODES, default="timetable", help="Источник напоминаний планировщика")
+    parser.add_argument("--adaptive", action="store_true", help="Проверять только минуты с напоминаниями")
+    parser.add_argument("--jitter", type=int, default=0, help="Окно сдвига напоминаний, мин (REMINDER_JITTER_WINDOW_MINUTES)")
+    parser.add_argument("--seed", type=int, default=1, help="Зерно генератора данных")
+    parser.add_argument("--top", type=int, default=10, help="Сколько самых нагруженных минут показать")
+    parser.add_argument("--series", action="store_true", help="Добавить в отчет сообщения по каждой минуте")
+    parser.add_argument("--output", help="Файл для JSON-отчета (по умолчанию - stdout)")
+    parser.add_argument("--verbose", action="store_true", help="Выводить журнал планировщика")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        configure_environment(args, os.path.join(tmp_dir, "simulation.db"))
+        report = asyncio.run(simulate(args))
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            output.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
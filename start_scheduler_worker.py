@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Скрипт для запуска воркеров планировщика напоминаний в отдельных процессах.
+
+Каждый воркер отмечается в таблице SchedulerWorker и обрабатывает только своих
+пользователей (hash(user_id) % N). Бот при этом запускается с SCHEDULER_ENABLED=false.
+
+Лимит Telegram (TELEGRAM_GLOBAL_RATE_LIMIT сообщений в секунду) один на бота, а не на
+процесс: каждый воркер отправляет не больше TELEGRAM_GLOBAL_RATE_LIMIT / N сообщений
+в секунду, где N - текущее число живых шардов по SchedulerWorker (пересчитывается
+при каждом heartbeat), поэтому вместе воркеры не превышают общий лимит.
+
+Пример:
+    SCHEDULER_SHARDING_ENABLED=true python start_scheduler_worker.py --processes 4
+"""
+
+import sys
+import os
+import asyncio
+import argparse
+import logging
+import multiprocessing
+
+# Добавляем корневую директорию проекта в путь Python
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def run_worker(instance_id: str):
+    """
+    Запускает планировщик напоминаний без обработки входящих обновлений.
+    """
+    from telegram.ext import ApplicationBuilder
+    from app.core.config import settings
+    from app.core.scheduler import HabitReminderScheduler
+
+    application = ApplicationBuilder().token(settings.TELEGRAM_BOT_TOKEN).build()
+    await application.initialize()
+
+    scheduler = HabitReminderScheduler(application, instance_id=instance_id)
+    await scheduler.start()
+    logger.info(f"Воркер планировщика {instance_id} запущен.")
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await scheduler.stop()
+        await application.shutdown()
+
+
+def worker_main(instance_id: str):
+    """Точка входа процесса-воркера."""
+    try:
+        asyncio.run(run_worker(instance_id))
+    except KeyboardInterrupt:
+        logger.info(f"Воркер {instance_id} остановлен.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Запуск воркеров планировщика напоминаний")
+    parser.add_argument("--processes", type=int, default=1, help="Число процессов-воркеров")
+    args = parser.parse_args()
+
+    from app.core.config import settings
+
+    if not settings.TELEGRAM_BOT_TOKEN:
+        logger.error("TELEGRAM_BOT_TOKEN не установлен в переменных окружения.")
+        sys.exit(1)
+    if args.processes > 1 and not settings.SCHEDULER_SHARDING_ENABLED:
+        logger.error("Для нескольких процессов включите SCHEDULER_SHARDING_ENABLED=true.")
+        sys.exit(1)
+    if args.processes > 1 and settings.SCHEDULER_SHARD_COUNT > 0:
+        logger.error("Фиксированный номер шарда задается на процесс; используйте SCHEDULER_SHARD_COUNT=0.")
+        sys.exit(1)
+
+    if args.processes == 1:
+        worker_main(settings.INSTANCE_ID)
+        return
+
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=worker_main, args=(f"{settings.INSTANCE_ID}-w{i}",), name=f"scheduler-worker-{i}")
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        logger.info("Остановка воркеров планировщика...")
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
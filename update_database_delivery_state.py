@@ -0,0 +1,61 @@
+"""
+Скрипт для обновления существующей базы данных - добавление поля delivery_state
+(состояние доставки сообщений пользователю).
+
+То же при alembic upgrade head делает миграция 0006_user_delivery_state.
+"""
+
+import sqlite3
+import os
+import sys
+
+
+def update_database_delivery_state(db_path="habits_tracker.db"):
+    """
+    Добавляет поле delivery_state в таблицу User.
+    """
+    if not os.path.exists(db_path):
+        print(f"[ERROR] База данных '{db_path}' не найдена!")
+        return False
+    
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("PRAGMA table_info(User);")
+        user_columns = [col[1] for col in cursor.fetchall()]
+        
+        if "delivery_state" not in user_columns:
+            print("[INFO] Добавляем поле delivery_state в таблицу User...")
+            cursor.execute("ALTER TABLE User ADD COLUMN delivery_state TEXT NOT NULL DEFAULT 'ok';")
+            print("[OK] Поле delivery_state добавлено в таблицу User")
+        else:
+            print("[INFO] Поле delivery_state уже существует в таблице User")
+        
+        conn.commit()
+        print("[OK] База данных успешно обновлена!")
+        
+        cursor.execute("SELECT delivery_state, COUNT(*) FROM User GROUP BY delivery_state;")
+        for state, count in cursor.fetchall():
+            print(f"[INFO] Пользователей в состоянии {state}: {count}")
+        
+        return True
+        
+    except Exception as e:
+        print(f"[ERROR] Ошибка при обновлении базы данных: {e}")
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    print("=== Обновление базы данных - добавление состояния доставки пользователя ===")
+    
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "habits_tracker.db"
+    success = update_database_delivery_state(db_path)
+    
+    if success:
+        print("\n[OK] Обновление завершено успешно!")
+    else:
+        print("\n[ERROR] Обновление не удалось!")
@@ -0,0 +1,156 @@
+"""
+Скрипт для обновления существующей базы данных - добавление скомпилированного расписания
+привычек (schedule_weekday_mask, schedule_minute, next_due_at) и заполнение его для существующих записей.
+
+То же при alembic upgrade head делает миграция 0004_habit_compiled_schedule (кроме режима --sql);
+скрипт пересчитывает расписание всех привычек.
+"""
+
+import sqlite3
+import os
+import sys
+import uuid
+from datetime import datetime, timezone
+
+# Добавляем корневую директорию проекта в путь Python
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.models.types import uuid_bytes
+from app.utils.schedule_utils import compile_schedule, compute_next_due_at, reminder_jitter_minutes
+from app.utils.timezone_utils import get_user_timezone
+
+# Размер пачки обновляемых записей
+BATCH_SIZE = 1000
+# Формат, в котором SQLAlchemy хранит DateTime в SQLite
+SQLITE_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+def _local_date(value, habit_timezone):
+    """Локальная дата создания привычки (created_at хранится в UTC)."""
+    if not value:
+        return None
+    created_at = datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+    return created_at.astimezone(get_user_timezone(habit_timezone)).date()
+
+
+def update_database_schedule(db_path="habits_tracker.db"):
+    """
+    Добавляет поля скомпилированного расписания в таблицу Habit и заполняет их.
+    """
+    if not os.path.exists(db_path):
+        print(f"[ERROR] База данных '{db_path}' не найдена!")
+        return False
+    
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("PRAGMA table_info(Habit);")
+        habit_columns = [col[1] for col in cursor.fetchall()]
+        
+        for column, column_type in (
+            ("schedule_weekday_mask", "INTEGER"),
+            ("schedule_minute", "INTEGER"),
+            ("next_due_at", "TEXT"),
+        ):
+            if column not in habit_columns:
+                print(f"[INFO] Добавляем поле {column} в таблицу Habit...")
+                cursor.execute(f"ALTER TABLE Habit ADD COLUMN {column} {column_type};")
+                print(f"[OK] Поле {column} добавлено в таблицу Habit")
+            else:
+                print(f"[INFO] Поле {column} уже существует в таблице Habit")
+        
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_habit_weekday_mask ON Habit(is_active, schedule_weekday_mask);")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_habit_schedule_minute ON Habit(schedule_minute);")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_habit_next_due ON Habit(next_due_at);")
+        print("[OK] Индексы расписания созданы")
+        
+        # Заполняем расписание для всех привычек (повторный запуск пересчитывает значения)
+        print("[INFO] Компилируем расписание существующих привычек...")
+        now = datetime.utcnow()
+        # Ключи сравниваются как байты UUID: id справочников из create_database.py хранятся
+        # с дефисами, а ссылки на них из приложения - 32 символами, и JOIN в SQL их не сопоставит
+        schedule_types = {
+            uuid_bytes(type_id): name
+            for type_id, name in cursor.execute("SELECT id, name FROM ScheduleType;").fetchall()
+        }
+        frequencies = {
+            uuid_bytes(user_id): frequency
+            for user_id, frequency in cursor.execute("SELECT id, reminder_frequency FROM User;").fetchall()
+        }
+        read_cursor = conn.cursor()
+        read_cursor.execute('''
+            SELECT id, user_id, schedule_type_id, custom_schedule_days, custom_schedule_time, custom_schedule_frequency,
+                   timezone, created_at
+            FROM Habit
+        ''')
+        
+        updated = 0
+        skipped = 0
+        while True:
+            rows = read_cursor.fetchmany(BATCH_SIZE)
+            if not rows:
+                break
+            values = []
+            for (habit_id, user_id, schedule_type_id, days, habit_time, frequency, habit_timezone,
+                 created_at) in rows:
+                user_key = uuid_bytes(user_id)
+                schedule_type = schedule_types.get(uuid_bytes(schedule_type_id))
+                if schedule_type is None or user_key not in frequencies:
+                    skipped += 1
+                    continue
+                schedule = compile_schedule(schedule_type, days, habit_time, frequency)
+                next_due_at = compute_next_due_at(
+                    schedule, habit_timezone, frequencies[user_key], now,
+                    anchor=_local_date(created_at, habit_timezone),
+                    jitter_minutes=reminder_jitter_minutes(uuid.UUID(bytes=user_key)),
+                )
+                values.append((
+                    schedule.weekday_mask,
+                    schedule.minute,
+                    next_due_at.strftime(SQLITE_DATETIME_FORMAT) if next_due_at else None,
+                    habit_id,
+                ))
+            cursor.executemany(
+                "UPDATE Habit SET schedule_weekday_mask = ?, schedule_minute = ?, next_due_at = ? WHERE id = ?;",
+                values
+            )
+            updated += len(values)
+        
+        # Подтверждаем изменения
+        conn.commit()
+        print(f"[INFO] Обновлено привычек: {updated}")
+        if skipped:
+            print(f"[WARNING] Пропущено привычек с несуществующим пользователем или типом расписания: {skipped}")
+        
+        cursor.execute("SELECT COUNT(*) FROM Habit WHERE schedule_minute IS NOT NULL;")
+        print(f"[INFO] Привычек со временем напоминания: {cursor.fetchone()[0]}")
+        
+        cursor.execute("SELECT COUNT(*), COUNT(schedule_weekday_mask) FROM Habit WHERE is_active = 1;")
+        active, compiled = cursor.fetchone()
+        if compiled < active:
+            print(f"[ERROR] Расписание скомпилировано для {compiled} из {active} активных привычек - "
+                  "остальным напоминания не придут")
+            return False
+        
+        print("[OK] База данных успешно обновлена!")
+        return True
+        
+    except Exception as e:
+        print(f"[ERROR] Ошибка при обновлении базы данных: {e}")
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    print("=== Обновление базы данных - компиляция расписания привычек ===")
+    
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "habits_tracker.db"
+    success = update_database_schedule(db_path)
+    
+    if success:
+        print("\n[OK] Обновление завершено успешно!")
+    else:
+        print("\n[ERROR] Обновление не удалось!")